@@ -31,6 +31,7 @@ from minindn.minindn import Minindn
 from minindn.apps.app_manager import AppManager
 from minindn.apps.nfd import Nfd
 from minindn.apps.nlsr import Nlsr
+from minindn.helpers.nfd_status import NfdStatus
 
 from nlsr_common import getParser
 
@@ -67,7 +68,8 @@ if __name__ == '__main__':
 
     time.sleep(60)
 
-    advertiseCount = int(host2.cmd('nfdc fib | grep host1 | wc -l'))
+    fib = NfdStatus([host2]).getNode(host2).fibPrefixes()
+    advertiseCount = len([prefix for prefix in fib if 'host1' in prefix])
     info(advertiseCount)
     if advertiseCount == expectedTotalCount:
         info('\nSuccessfully advertised {} prefixes\n'.format(expectedTotalCount))
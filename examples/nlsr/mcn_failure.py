@@ -32,15 +32,14 @@ from minindn.apps.nfd import Nfd
 from minindn.apps.nlsr import Nlsr
 from minindn.helpers.experiment import Experiment
 from minindn.helpers.nfdc import Nfdc
-from minindn.helpers.ndnping import NDNPing
 
 from nlsr_common import getParser
 
 def mcnFailure(ndn, nfds, nlsrs, args):
     Experiment.checkConvergence(ndn, ndn.net.hosts, args.ctime, quit=True)
     if args.nPings != 0:
-        Experiment.setupPing(ndn.net.hosts, Nfdc.STRATEGY_BEST_ROUTE)
-        pingedDict = Experiment.startPctPings(ndn.net, args.nPings, args.pctTraffic)
+        Experiment.setupPing(ndn.net.hosts, Nfdc.STRATEGY_BEST_ROUTE, ndn)
+        pingedDict = Experiment.startPctPings(ndn.net, args.nPings, args.pctTraffic, ndn)
 
     PING_COLLECTION_TIME_BEFORE_FAILURE = 60
     PING_COLLECTION_TIME_AFTER_RECOVERY = 120
@@ -57,13 +56,15 @@ def mcnFailure(ndn, nfds, nlsrs, args):
 
     info('Bringing up node {}\n'.format(mcn.name))
     nfds[mcn.name].start()
+    nfds[mcn.name].waitUntilReady()
     nlsrs[mcn.name].start()
+    nlsrs[mcn.name].waitUntilReady()
 
     # Restart pings
     if args.nPings != 0:
-        Experiment.setupPing([mcn], Nfdc.STRATEGY_BEST_ROUTE)
-        for nodeToPing in pingedDict[mcn]:
-            NDNPing.ping(mcn, nodeToPing, nPings=PING_COLLECTION_TIME_AFTER_RECOVERY)
+        Experiment.setupPing([mcn], Nfdc.STRATEGY_BEST_ROUTE, ndn)
+        Experiment.startPings([(mcn, nodeToPing) for nodeToPing in pingedDict[mcn]],
+                              PING_COLLECTION_TIME_AFTER_RECOVERY, ndn)
 
         time.sleep(PING_COLLECTION_TIME_AFTER_RECOVERY)
 
@@ -32,14 +32,13 @@ from minindn.apps.nfd import Nfd
 from minindn.apps.nlsr import Nlsr
 from minindn.helpers.experiment import Experiment
 from minindn.helpers.nfdc import Nfdc
-from minindn.helpers.ndnping import NDNPing
 
 from nlsr_common import getParser
 
 def multipleFailure(ndn, nfds, nlsrs, args):
 
     Experiment.checkConvergence(ndn, ndn.net.hosts, args.ctime, quit=True)
-    Experiment.setupPing(ndn.net.hosts, Nfdc.STRATEGY_BEST_ROUTE)
+    Experiment.setupPing(ndn.net.hosts, Nfdc.STRATEGY_BEST_ROUTE, ndn)
 
     PING_COLLECTION_TIME_BEFORE_FAILURE = 60
     FAILURE_INTERVAL = 60
@@ -50,7 +49,7 @@ def multipleFailure(ndn, nfds, nlsrs, args):
                      len(ndn.net.hosts) * (FAILURE_INTERVAL + RECOVERY_INTERVAL))
     print('Scheduling with {} initial pings'.format(nInitialPings))
 
-    pingedDict = Experiment.startPctPings(ndn.net, nInitialPings, args.pctTraffic)
+    pingedDict = Experiment.startPctPings(ndn.net, nInitialPings, args.pctTraffic, ndn)
     time.sleep(PING_COLLECTION_TIME_BEFORE_FAILURE)
 
     nNodesRemainingToFail = len(ndn.net.hosts)
@@ -68,8 +67,10 @@ def multipleFailure(ndn, nfds, nlsrs, args):
         start_time = time.time()
         info('Bringing up node {}\n'.format(host.name))
         nfds[host.name].start()
+        nfds[host.name].waitUntilReady()
         nlsrs[host.name].start()
-        Experiment.setupPing([host], Nfdc.STRATEGY_BEST_ROUTE)
+        nlsrs[host.name].waitUntilReady()
+        Experiment.setupPing([host], Nfdc.STRATEGY_BEST_ROUTE, ndn)
 
         recovery_time = int(time.time() - start_time)
 
@@ -81,8 +82,8 @@ def multipleFailure(ndn, nfds, nlsrs, args):
         info('Scheduling with {} remaining pings\n'.format(nPings))
 
         # Restart pings
-        for nodeToPing in pingedDict[host]:
-            NDNPing.ping(host, nodeToPing, nPings=nPings)
+        Experiment.startPings([(host, nodeToPing) for nodeToPing in pingedDict[host]],
+                              nPings, ndn)
 
         time.sleep(RECOVERY_INTERVAL - recovery_time)
 
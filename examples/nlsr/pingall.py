@@ -23,13 +23,14 @@
 
 import time
 
-from mininet.log import setLogLevel
+from mininet.log import setLogLevel, info
 
 from minindn.minindn import Minindn
 from minindn.util import MiniNDNCLI
 from minindn.apps.app_manager import AppManager
 from minindn.apps.nfd import Nfd
 from minindn.apps.nlsr import Nlsr
+from minindn.apps.ndnping import readPingResults
 from minindn.helpers.experiment import Experiment
 from minindn.helpers.nfdc import Nfdc
 
@@ -52,11 +53,15 @@ if __name__ == '__main__':
     Experiment.checkConvergence(ndn, ndn.net.hosts, args.ctime, quit=False)
 
     if args.nPings != 0:
-        Experiment.setupPing(ndn.net.hosts, Nfdc.STRATEGY_BEST_ROUTE)
-        Experiment.startPctPings(ndn.net, args.nPings, args.pctTraffic)
+        Experiment.setupPing(ndn.net.hosts, Nfdc.STRATEGY_BEST_ROUTE, ndn)
+        Experiment.startPctPings(ndn.net, args.nPings, args.pctTraffic, ndn)
 
         time.sleep(args.nPings + 10)
 
+        for (source, destination), result in sorted(readPingResults(ndn.workDir).items()):
+            info('{} -> {}: {}/{} pings received\n'.format(source, destination,
+                                                            result.received, result.sent))
+
     if args.isCliEnabled:
         MiniNDNCLI(ndn.net)
 
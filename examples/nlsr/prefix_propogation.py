@@ -32,6 +32,7 @@ from minindn.apps.app_manager import AppManager
 from minindn.apps.nfd import Nfd
 from minindn.apps.nlsr import Nlsr
 from minindn.helpers.experiment import Experiment
+from minindn.helpers.nfd_status import NfdStatus
 
 from nlsr_common import getParser
 
@@ -59,9 +60,10 @@ if __name__ == '__main__':
     firstNode.cmd('nlsrc advertise /testPrefix')
     time.sleep(30)
 
+    status = NfdStatus(ndn.net.hosts)
     for host in ndn.net.hosts:
         if host.name != firstNode.name:
-            if (int(host.cmd('nfdc fib | grep testPrefix | wc -l')) != 1 or
+            if ('/testPrefix' not in status.getNode(host).fibPrefixes() or
                int(host.cmd('nlsrc status | grep testPrefix | wc -l')) != 1):
                 info('Advertise test failed\n')
                 ndn.stop()
@@ -71,9 +73,10 @@ if __name__ == '__main__':
     firstNode.cmd('nlsrc withdraw /testPrefix')
     time.sleep(30)
 
+    status.invalidate()
     for host in ndn.net.hosts:
         if host.name != firstNode.name:
-            if (int(host.cmd('nfdc fib | grep testPrefix | wc -l')) != 0 or
+            if ('/testPrefix' in status.getNode(host).fibPrefixes() or
                int(host.cmd('nlsrc status | grep testPrefix | wc -l')) != 0):
                 info('Withdraw test failed\n')
                 ndn.stop()
@@ -32,6 +32,7 @@ from minindn.util import MiniNDNCLI
 from minindn.apps.app_manager import AppManager
 from minindn.apps.nfd import Nfd
 from minindn.helpers.ndn_routing_helper import NdnRoutingHelper
+from minindn.helpers.nfd_status import NfdStatus
 
 if __name__ == '__main__':
     setLogLevel('info')
@@ -81,13 +82,14 @@ if __name__ == '__main__':
     '''
     prefix "/abc" is advertise from node A, it should be reachable from all other nodes.
     '''
-    routesFromA = ndn.net['a'].cmd("nfdc route | grep -v '/localhost/nfd'")
+    status = NfdStatus(ndn.net.hosts)
+    routesFromA = status.getNode(ndn.net['a']).ribPrefixes()
     if '/ndn/b-site/b' not in routesFromA or \
        '/ndn/c-site/c' not in routesFromA or \
        '/ndn/d-site/d' not in routesFromA:
         info("Route addition failed\n")
 
-    routesToPrefix = ndn.net['b'].cmd("nfdc fib | grep '/abc'")
+    routesToPrefix = status.getNode(ndn.net['b']).fibPrefixes()
     if '/abc' not in routesToPrefix:
         info("Missing route to advertised prefix, Route addition failed\n")
         ndn.net.stop()
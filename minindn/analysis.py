@@ -0,0 +1,576 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Offline analysis of the NDN traffic captured by the Tshark application (minindn-analyze).
+
+Captures (pcap or pcapng, per node or per interface) and packet summaries written
+with Tshark(summarize=True) are read one file at a time: pcap files are memory-mapped
+and decoded frame by frame into compact numpy columns, so the memory needed is bounded
+by the largest file, not by the whole capture set. Metrics are then computed on the
+columns:
+
+- Interest, Data and Nack counts per name prefix
+- throughput time series of every link (node and interface)
+- satisfaction ratio: share of the Interest names for which a Data was seen on the same link
+- Interest to Data round trip time: between a Data received by the node and the Interest
+  for the same name it sent just before on the same link. The direction of the frames comes
+  from the Linux cooked capture header, or, for Ethernet captures, from the MAC addresses of
+  the node which Tshark writes to <node>-interfaces.txt; frames of unknown direction give
+  no round trip time
+
+Each link is seen from the capture of one node, so a packet forwarded over several hops
+is counted once per hop.
+
+    minindn-analyze /tmp/minindn --prefix-components 2 --interval 1 -o analysis.json
+'''
+
+import argparse
+import csv
+import gzip
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+from joblib import Parallel, delayed
+
+from minindn.helpers.packet_summary import readTlv, decodeName, locateFramePackets, \
+    readInterfaces, interfacesFileName, PCAP_MAGICS
+
+CAPTURE_SUFFIXES = ('.pcap', '.pcapng')
+SUMMARY_SUFFIX = '-packets.csv.gz'
+_RING_BUFFER_SUFFIX = re.compile(r'_\d{5}_\d{14}$')
+INTEREST, DATA, NACK, OTHER = 0, 1, 2, 3
+_TYPE_CODES = {'Interest': INTEREST, 'Data': DATA, 'Nack': NACK}
+UNKNOWN, IN, OUT = 0, 1, 2
+_DIRECTION_CODES = {'in': IN, 'out': OUT}
+
+class CaptureError(ValueError):
+    pass
+
+_PCAPNG_SECTION = 0x0A0D0D0A
+_PCAPNG_INTERFACE = 1
+_PCAPNG_ENHANCED_PACKET = 6
+
+class CaptureFile(object):
+    """Memory-mapped pcap or pcapng file"""
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.file = open(fileName, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.size = size
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def frames(self):
+        """Yield (timestamp, link type, frame offset, frame end, original length)"""
+        if self.size < 4:
+            return iter(())
+        magic = bytes(self.buffer[:4])
+        if magic in PCAP_MAGICS:
+            return self._pcapFrames(*PCAP_MAGICS[magic])
+        if struct.unpack('<I', magic)[0] == _PCAPNG_SECTION:
+            return self._pcapngFrames()
+        raise CaptureError('{} is not a pcap or pcapng file'.format(self.fileName))
+
+    def _pcapFrames(self, byteOrder, resolution):
+        buf, size = self.buffer, self.size
+        if size < 24:
+            return
+        linkType = struct.unpack_from(byteOrder + 'I', buf, 20)[0] & 0x0fffffff
+        record = struct.Struct(byteOrder + 'IIII')
+        offset = 24
+        # The last record is incomplete when the capture was interrupted
+        while offset + 16 <= size:
+            seconds, fraction, capturedLength, originalLength = record.unpack_from(buf, offset)
+            start = offset + 16
+            offset = start + capturedLength
+            if offset > size:
+                break
+            yield seconds + fraction * resolution, linkType, start, offset, originalLength
+
+    def _pcapngFrames(self):
+        buf, size = self.buffer, self.size
+        offset = 0
+        byteOrder = '<'
+        interfaces = []
+        while offset + 12 <= size:
+            blockType = struct.unpack_from(byteOrder + 'I', buf, offset)[0]
+            if blockType == _PCAPNG_SECTION:
+                byteOrder = '<' if struct.unpack_from('<I', buf, offset + 8)[0] == 0x1A2B3C4D \
+                            else '>'
+                interfaces = []
+            blockLength = struct.unpack_from(byteOrder + 'I', buf, offset + 4)[0]
+            if blockLength < 12 or offset + blockLength > size:
+                break
+            body = offset + 8
+            if blockType == _PCAPNG_INTERFACE:
+                linkType = struct.unpack_from(byteOrder + 'H', buf, body)[0]
+                interfaces.append((linkType, self._timestampResolution(
+                    byteOrder, body + 8, offset + blockLength - 4)))
+            elif blockType == _PCAPNG_ENHANCED_PACKET:
+                interface, high, low, capturedLength, originalLength = \
+                    struct.unpack_from(byteOrder + 'IIIII', buf, body)
+                if interface < len(interfaces):
+                    linkType, resolution = interfaces[interface]
+                    start = body + 20
+                    yield (((high << 32) | low) * resolution, linkType, start,
+                           start + capturedLength, originalLength)
+            offset += blockLength
+
+    def _timestampResolution(self, byteOrder, offset, end):
+        """if_tsresol option of an interface description block, microseconds by default"""
+        buf = self.buffer
+        while offset + 4 <= end:
+            code, length = struct.unpack_from(byteOrder + 'HH', buf, offset)
+            if code == 0:
+                break
+            if code == 9 and length >= 1:
+                value = buf[offset + 4]
+                return 2.0 ** -(value & 0x7f) if value & 0x80 else 10.0 ** -value
+            offset += 4 + (length + 3) // 4 * 4
+        return 1e-6
+
+def _prefixEnd(buf, nameStart, nameEnd, nComponents):
+    offset = nameStart
+    for _ in range(nComponents):
+        if offset >= nameEnd:
+            break
+        _, _, offset = readTlv(buf, offset, nameEnd)
+    return min(offset, nameEnd)
+
+class PacketColumns(object):
+    """NDN packets of one capture file as numpy columns"""
+    def __init__(self, time, face, direction, packetType, nameHash, prefix, size, wireSize,
+                 faces, prefixes):
+        self.time = time
+        self.face = face
+        self.direction = direction
+        self.type = packetType
+        self.nameHash = nameHash
+        self.prefix = prefix
+        self.size = size
+        self.wireSize = wireSize
+        self.faces = faces
+        self.prefixes = prefixes
+
+    def __len__(self):
+        return len(self.time)
+
+class _ColumnBuilder(object):
+    """Append only columns stored in compact arrays"""
+    def __init__(self, defaultFace):
+        self.time = array('d')
+        self.face = array('i')
+        self.direction = array('b')
+        self.type = array('b')
+        self.nameHash = array('q')
+        self.prefix = array('i')
+        self.size = array('i')
+        self.wireSize = array('i')
+        self.faces = [defaultFace]
+        self.faceIds = {defaultFace: 0}
+        self.prefixes = []
+        self.prefixIds = {}
+
+    def faceId(self, face):
+        if face not in self.faceIds:
+            self.faceIds[face] = len(self.faces)
+            self.faces.append(face)
+        return self.faceIds[face]
+
+    def prefixId(self, key, decode):
+        prefixId = self.prefixIds.get(key)
+        if prefixId is None:
+            prefixId = self.prefixIds[key] = len(self.prefixes)
+            self.prefixes.append(decode())
+        return prefixId
+
+    def append(self, time, face, direction, packetType, nameHash, prefix, size, wireSize):
+        self.time.append(time)
+        self.face.append(face)
+        self.direction.append(direction)
+        self.type.append(packetType)
+        self.nameHash.append(nameHash)
+        self.prefix.append(prefix)
+        self.size.append(size)
+        self.wireSize.append(wireSize)
+
+    def build(self):
+        return PacketColumns(np.frombuffer(self.time, dtype=np.float64),
+                             np.frombuffer(self.face, dtype=np.int32),
+                             np.frombuffer(self.direction, dtype=np.int8),
+                             np.frombuffer(self.type, dtype=np.int8),
+                             np.frombuffer(self.nameHash, dtype=np.int64),
+                             np.frombuffer(self.prefix, dtype=np.int32),
+                             np.frombuffer(self.size, dtype=np.int32),
+                             np.frombuffer(self.wireSize, dtype=np.int32),
+                             self.faces, self.prefixes)
+
+def readCapture(fileName, face, prefixComponents=2, faces=None, localMacs=None):
+    """
+    Decode the NDN packets of a pcap or pcapng file into PacketColumns. fileName may also
+    be the list of the segments of a ring buffer capture, decoded in order into one set
+    of columns.
+
+    :param face: Name of the captured interface
+    :param prefixComponents: (optional) Number of name components of the prefixes
+    :param faces: (optional) ifindex to interface name, for captures on the any interface
+    :param localMacs: (optional) MAC addresses of the node, for the direction of Ethernet frames
+    """
+    columns = _ColumnBuilder(face)
+    faceNames = {}
+    unknownName = columns.prefixId(None, lambda: '')
+    for segment in [fileName] if isinstance(fileName, str) else fileName:
+        _readFrames(columns, segment, prefixComponents, faces, localMacs, faceNames, unknownName)
+    return columns.build()
+
+def _readFrames(columns, fileName, prefixComponents, faces, localMacs, faceNames, unknownName):
+    with CaptureFile(fileName) as capture:
+        buf = capture.buffer
+        for timestamp, linkType, start, end, wireSize in capture.frames():
+            located = locateFramePackets(buf, start, end, linkType, localMacs)
+            if not located or not located[2]:
+                continue
+            direction, ifindex, packets = located
+            direction = _DIRECTION_CODES.get(direction, UNKNOWN)
+            faceId = 0
+            if ifindex is not None:
+                if ifindex not in faceNames:
+                    faceNames[ifindex] = columns.faceId((faces or {}).get(ifindex,
+                                                                          'if{}'.format(ifindex)))
+                faceId = faceNames[ifindex]
+            for packetType, nameStart, nameEnd, size in packets:
+                if nameStart is None:
+                    nameHash, prefixId = 0, unknownName
+                else:
+                    nameHash = hash(buf[nameStart:nameEnd])
+                    try:
+                        prefixEnd = _prefixEnd(buf, nameStart, nameEnd, prefixComponents)
+                        prefixId = columns.prefixId(
+                            buf[nameStart:prefixEnd],
+                            lambda: decodeName(buf, nameStart, prefixEnd))
+                    except IndexError:
+                        prefixId = unknownName
+                columns.append(timestamp, faceId, direction, _TYPE_CODES.get(packetType, OTHER),
+                               nameHash, prefixId, size, wireSize)
+
+def readSummary(fileName, face, prefixComponents=2):
+    """Read a packet summary of Tshark(summarize=True) into PacketColumns"""
+    columns = _ColumnBuilder(face)
+    with gzip.open(fileName, 'rt', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return columns.build()
+        index = {field: i for i, field in enumerate(header)}
+        for row in reader:
+            name = row[index['name']]
+            components = name.split('/')[1:prefixComponents + 1] if name else []
+            prefix = '/' + '/'.join(components) if name else ''
+            columns.append(float(row[index['time']]), columns.faceId(row[index['face']]),
+                           _DIRECTION_CODES.get(row[index['direction']], UNKNOWN),
+                           _TYPE_CODES.get(row[index['type']], OTHER),
+                           hash(name) if name else 0, columns.prefixId(prefix, lambda: prefix),
+                           int(row[index['size']]), int(row[index['size']]))
+    return columns.build()
+
+def computeMetrics(columns, node, interval=1.0):
+    """
+    Compute the metrics of the packets of one file with numpy. Returns a dict with per
+    prefix counts, per link throughput and round trip times, merged by Analysis.
+    """
+    n = len(columns)
+    metrics = {'prefixes': {}, 'links': {}}
+    if n == 0:
+        return metrics
+    prefixes = np.asarray(columns.prefixes, dtype=object)
+    nPrefixes, nFaces = len(columns.prefixes), len(columns.faces)
+
+    # Packet counts per prefix and type
+    counts = np.bincount(columns.prefix.astype(np.int64) * 4 + columns.type,
+                         minlength=nPrefixes * 4).reshape(nPrefixes, 4)
+
+    # Sort by face, name and time: the packets for a name on a link are then consecutive
+    order = np.lexsort((columns.time, columns.nameHash, columns.face))
+    time = columns.time[order]
+    face = columns.face[order]
+    direction = columns.direction[order]
+    nameHash = columns.nameHash[order]
+    packetType = columns.type[order]
+    prefix = columns.prefix[order]
+    named = nameHash != 0
+    sameName = np.zeros(n, dtype=bool)
+    sameName[1:] = (nameHash[1:] == nameHash[:-1]) & (face[1:] == face[:-1]) & named[1:]
+    # A Data right after an Interest for the same name satisfies it, later Data are duplicates
+    matched = np.zeros(n, dtype=bool)
+    matched[1:] = sameName[1:] & (packetType[1:] == DATA) & (packetType[:-1] == INTEREST)
+    # Only an Interest sent by the node and the Data it receives back make a round trip,
+    # a received Interest answered by the node measures the node itself
+    roundTrip = np.zeros(n, dtype=bool)
+    roundTrip[1:] = matched[1:] & (direction[:-1] == OUT) & (direction[1:] == IN)
+    rtt = np.zeros(n)
+    rtt[1:] = time[1:] - time[:-1]
+
+    # Satisfaction per (link, name) group
+    starts = np.flatnonzero(~sameName)
+    hasInterest = np.logical_or.reduceat((packetType == INTEREST) & named, starts)
+    hasData = np.logical_or.reduceat(matched, starts)
+    groupPrefix = prefix[starts]
+    interestNames = np.bincount(groupPrefix, weights=hasInterest, minlength=nPrefixes)
+    satisfiedNames = np.bincount(groupPrefix, weights=hasInterest & hasData, minlength=nPrefixes)
+
+    for prefixId, prefixName in enumerate(prefixes):
+        if not counts[prefixId].any():
+            continue
+        metrics['prefixes'][prefixName] = {
+            'Interest': int(counts[prefixId, INTEREST]), 'Data': int(counts[prefixId, DATA]),
+            'Nack': int(counts[prefixId, NACK]), 'Other': int(counts[prefixId, OTHER]),
+            'interestNames': int(interestNames[prefixId]),
+            'satisfiedNames': int(satisfiedNames[prefixId])
+        }
+
+    # Throughput per link, in bins of interval seconds
+    bins = np.floor(columns.time / interval).astype(np.int64)
+    firstBin = int(bins.min())
+    nBins = int(bins.max()) - firstBin + 1
+    throughput = np.bincount(columns.face.astype(np.int64) * nBins + (bins - firstBin),
+                             weights=columns.wireSize, minlength=nFaces * nBins) \
+                   .reshape(nFaces, nBins)
+    for faceId, faceName in enumerate(columns.faces):
+        onFace = face == faceId
+        if not onFace.any():
+            continue
+        metrics['links']['{}:{}'.format(node, faceName)] = {
+            'firstBin': firstBin,
+            'bytes': throughput[faceId],
+            'rtt': rtt[roundTrip & onFace]
+        }
+    return metrics
+
+def analyzeFile(fileName, node, face, prefixComponents=2, interval=1.0, faces=None):
+    """
+    Read one capture or summary file, or the list of segments of a ring buffer capture,
+    and compute its metrics. The interfaces of the node written by Tshark next to the file
+    name the faces and tell the direction of the frames.
+    """
+    fileNames = [fileName] if isinstance(fileName, str) else fileName
+    if fileNames[0].endswith(SUMMARY_SUFFIX):
+        columns = readSummary(fileNames[0], face, prefixComponents)
+    else:
+        interfaces = readInterfaces(interfacesFileName(os.path.dirname(fileNames[0]), node))
+        if faces is None and interfaces:
+            faces = {ifindex: name for ifindex, (name, _) in interfaces.items()}
+        localMacs = {mac for _, mac in interfaces.values() if mac}
+        columns = readCapture(fileName, face, prefixComponents, faces, localMacs)
+    metrics = computeMetrics(columns, node, interval)
+    metrics['packets'] = len(columns)
+    metrics['files'] = len(fileNames)
+    return metrics
+
+def findCaptures(paths):
+    """
+    Return (file name, node, interface) of the capture and summary files under paths.
+    Nodes and interfaces are named after the files written by Tshark: <node>-interfaces.pcap,
+    <interface>.pcap (Mininet interfaces are named <node>-ethN), their ring buffer segments
+    and <node>-packets.csv.gz. The segments of a ring buffer capture are returned as one
+    entry whose file name is the list of the segments in order, so that the Interests and
+    Data on both sides of a segment boundary are matched.
+    """
+    fileNames = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                fileNames += [os.path.join(root, name) for name in sorted(names)
+                              if name.endswith(CAPTURE_SUFFIXES + (SUMMARY_SUFFIX,))]
+        else:
+            fileNames.append(path)
+
+    captures = []
+    # (directory, stem, extension) of a ring buffer capture to its entry in captures
+    ringBuffers = {}
+    for fileName in fileNames:
+        base = os.path.basename(fileName)
+        if base.endswith(SUMMARY_SUFFIX):
+            captures.append((fileName, base[:-len(SUMMARY_SUFFIX)], 'any'))
+            continue
+        # Segments of a ring buffer capture are named <stem>_<NNNNN>_<YYYYmmddHHMMSS>,
+        # the zero-padded segment number sorts them in capture order
+        stem, extension = os.path.splitext(base)
+        segmentStem = _RING_BUFFER_SUFFIX.sub('', stem)
+        if segmentStem != stem:
+            key = (os.path.dirname(fileName), segmentStem, extension)
+            if key in ringBuffers:
+                captures[ringBuffers[key]][0].append(fileName)
+                continue
+            ringBuffers[key] = len(captures)
+            fileName = [fileName]
+        if segmentStem.endswith('-interfaces'):
+            captures.append((fileName, segmentStem[:-len('-interfaces')], 'any'))
+        else:
+            captures.append((fileName, segmentStem.rsplit('-', 1)[0], segmentStem))
+    for index in ringBuffers.values():
+        captures[index][0].sort(key=os.path.basename)
+    return captures
+
+class Analysis(object):
+    """Metrics of a set of capture files"""
+    def __init__(self, prefixComponents=2, interval=1.0):
+        self.prefixComponents = prefixComponents
+        self.interval = interval
+        self.files = 0
+        self.packets = 0
+        self.prefixes = {}
+        # Link to (first bin, bytes per bin) and round trip times
+        self.throughput = {}
+        self.rtts = {}
+
+    def run(self, paths, jobs=1):
+        """Analyze the capture files under paths, jobs files at a time in separate processes"""
+        captures = findCaptures(paths)
+        for metrics in Parallel(n_jobs=jobs)(
+                delayed(analyzeFile)(fileName, node, face, self.prefixComponents, self.interval)
+                for fileName, node, face in captures):
+            self.add(metrics)
+        return self
+
+    def add(self, metrics):
+        """Merge the metrics of one file, or of the segments of a ring buffer capture"""
+        self.files += metrics.get('files', 1)
+        self.packets += metrics.get('packets', 0)
+        for prefix, counts in metrics['prefixes'].items():
+            total = self.prefixes.setdefault(prefix, dict.fromkeys(counts, 0))
+            for key, value in counts.items():
+                total[key] += value
+        for link, values in metrics['links'].items():
+            self.throughput[link] = _addSeries(self.throughput.get(link),
+                                               (values['firstBin'], values['bytes']))
+            self.rtts[link] = np.concatenate([self.rtts.get(link, np.zeros(0)), values['rtt']])
+
+    def satisfactionRatio(self, prefix=None):
+        """Share of the Interest names of prefix (all prefixes by default) which got a Data"""
+        entries = [self.prefixes[prefix]] if prefix is not None else self.prefixes.values()
+        interests = sum(entry['interestNames'] for entry in entries)
+        satisfied = sum(entry['satisfiedNames'] for entry in entries)
+        return float(satisfied) / interests if interests else None
+
+    def throughputSeries(self, link):
+        """Return (bin start times, bits per second) of link"""
+        firstBin, values = self.throughput[link]
+        times = (firstBin + np.arange(len(values))) * self.interval
+        return times, values * 8.0 / self.interval
+
+    def rttStats(self, link=None):
+        """Round trip time statistics in milliseconds, of one link or of all links"""
+        samples = self.rtts[link] if link is not None else \
+                  np.concatenate(list(self.rtts.values()) or [np.zeros(0)])
+        if len(samples) == 0:
+            return {'count': 0}
+        ms = samples * 1000.0
+        p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+        return {'count': int(len(ms)), 'mean': float(ms.mean()), 'min': float(ms.min()),
+                'p50': float(p50), 'p90': float(p90), 'p99': float(p99), 'max': float(ms.max())}
+
+    def toDict(self):
+        links = OrderedDict()
+        for link in sorted(self.throughput):
+            times, bps = self.throughputSeries(link)
+            links[link] = {'start': float(times[0]) if len(times) else None,
+                           'bitsPerSecond': [round(float(v), 1) for v in bps],
+                           'rtt': self.rttStats(link) if link in self.rtts else {'count': 0}}
+        prefixes = OrderedDict()
+        for prefix in sorted(self.prefixes):
+            counts = dict(self.prefixes[prefix])
+            counts['satisfactionRatio'] = self.satisfactionRatio(prefix)
+            prefixes[prefix] = counts
+        return OrderedDict([
+            ('files', self.files), ('packets', self.packets),
+            ('prefixComponents', self.prefixComponents), ('interval', self.interval),
+            ('satisfactionRatio', self.satisfactionRatio()), ('rtt', self.rttStats()),
+            ('prefixes', prefixes), ('links', links)
+        ])
+
+def _addSeries(series, other):
+    """Sum two (first bin, values) time series"""
+    if series is None:
+        return other
+    first = min(series[0], other[0])
+    last = max(series[0] + len(series[1]), other[0] + len(other[1]))
+    values = np.zeros(last - first)
+    for start, part in (series, other):
+        values[start - first:start - first + len(part)] += part
+    return first, values
+
+def main():
+    parser = argparse.ArgumentParser(prog='minindn-analyze',
+                                     description='Analyze the NDN traffic captured by Tshark')
+    parser.add_argument('paths', nargs='+',
+                        help='Capture files (.pcap, .pcapng, -packets.csv.gz) or directories')
+    parser.add_argument('--prefix-components', type=int, default=2, dest='prefixComponents',
+                        help='Number of name components of the prefixes counted')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Seconds per bin of the throughput time series')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of files analyzed at the same time')
+    parser.add_argument('-o', '--output', help='Write the metrics to this JSON file')
+    args = parser.parse_args()
+
+    analysis = Analysis(args.prefixComponents, args.interval).run(args.paths, args.jobs)
+    print('{} files, {} NDN packets'.format(analysis.files, analysis.packets))
+    print('{:<40} {:>10} {:>10} {:>8} {:>12}'
+          .format('prefix', 'Interests', 'Data', 'Nacks', 'satisfaction'))
+    for prefix, counts in sorted(analysis.prefixes.items()):
+        ratio = analysis.satisfactionRatio(prefix)
+        print('{:<40} {:>10} {:>10} {:>8} {:>12}'
+              .format(prefix or '<unknown>', counts['Interest'], counts['Data'], counts['Nack'],
+                      '-' if ratio is None else '{:.3f}'.format(ratio)))
+    rtt = analysis.rttStats()
+    if rtt['count']:
+        print('RTT (ms): mean {mean:.3f} p50 {p50:.3f} p90 {p90:.3f} p99 {p99:.3f} '
+              'over {count} samples'.format(**rtt))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(analysis.toDict(), f, indent=1)
+        print('Metrics written to {}'.format(args.output))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -21,27 +21,115 @@
 # along with Mini-NDN, e.g., in COPYING.md file.
 # If not, see <http://www.gnu.org/licenses/>.
 
+from joblib import Parallel, delayed
+
+from mininet.log import error, warn
 from mininet.node import Node
 
+# Default upper bound on the number of nodes configured at the same time in parallel mode
+DEFAULT_MAX_WORKERS = 32
+
 class AppManager(object):
-    def __init__(self, minindn, hosts, cls, **appParams):
+    def __init__(self, minindn, hosts, cls, parallel=False, maxWorkers=DEFAULT_MAX_WORKERS,
+                 **appParams):
+        """
+        Create and start an application on each of the given hosts
+
+        :param minindn: Minindn object, used to register the cleanup function,
+          or None to leave calling cleanup to the caller
+        :param hosts: List of hosts to run the application on
+        :param cls: Application class
+        :param parallel: (optional) Configure and start the application on several nodes
+          at the same time instead of one node after the other
+        :param maxWorkers: (optional) Maximum number of nodes processed at the same time
+          in parallel mode
+        :param appParams: Any params to pass to the application
+        """
         self.cls = cls
         self.apps = []
-        for host in hosts:
-            # Don't run NDN apps on switches
-            if isinstance(host, Node):
-                self.startOnNode(host, **appParams)
+        # Node name to exception raised while starting the application on it (parallel mode)
+        self.errors = {}
 
-        minindn.cleanups.append(self.cleanup)
+        # Don't run NDN apps on switches
+        nodes = [host for host in hosts if isinstance(host, Node)]
+
+        if minindn is not None:
+            minindn.cleanups.append(self.cleanup)
+
+        if not parallel:
+            for host in nodes:
+                app = self.cls(host, **appParams)
+                app.start()
+                self.apps.append(app)
+            self.waitUntilReady(self.apps, maxWorkers)
+        else:
+            self.startOnNodes(nodes, maxWorkers, **appParams)
 
     def startOnNode(self, host, **appParams):
         app = self.cls(host, **appParams)
         app.start()
         self.apps.append(app)
+        self.waitUntilReady([app])
 
-    def cleanup(self):
-        for app in self.apps:
-            app.stop()
+    def waitUntilReady(self, apps=None, maxWorkers=DEFAULT_MAX_WORKERS):
+        """
+        Wait concurrently until the readiness probe of every application succeeds or
+        times out, instead of sleeping a fixed time per node. Returns the applications
+        which are not ready.
+
+        :param apps: (optional) applications to wait for, default is all applications
+        :param maxWorkers: (optional) maximum number of applications probed at the same time
+        """
+        apps = self.apps if apps is None else apps
+        if not apps:
+            return []
+        ready = Parallel(n_jobs=max(1, min(maxWorkers, len(apps))), require='sharedmem',
+                         prefer='threads')(delayed(app.waitUntilReady)() for app in apps)
+        notReady = [app for app, isReady in zip(apps, ready) if not isReady]
+        for app in notReady:
+            warn('[{}] {} is not ready after {} seconds\n'
+                 .format(app.node.name, self.cls.__name__, app.readyTimeout))
+        return notReady
+
+    def startOnNodes(self, hosts, maxWorkers=DEFAULT_MAX_WORKERS, **appParams):
+        """
+        Configure and start the application on several nodes concurrently using a bounded
+        pool of worker threads. Errors are collected per node in self.errors and a
+        RuntimeError is raised once every node has been processed.
+        """
+        def _start(host):
+            try:
+                app = self.cls(host, **appParams)
+                app.start()
+                return app, None
+            except Exception as e:
+                return None, e
+
+        results = Parallel(n_jobs=max(1, min(maxWorkers, len(hosts))), require='sharedmem',
+                           prefer='threads')(delayed(_start)(host) for host in hosts)
+
+        started = []
+        for host, (app, exception) in zip(hosts, results):
+            if app is not None:
+                started.append(app)
+            else:
+                error('[{}] Failed to start {}: {}\n'.format(host.name, self.cls.__name__,
+                                                             exception))
+                self.errors[host.name] = exception
+        self.apps.extend(started)
+        self.waitUntilReady(started, maxWorkers)
+
+        if self.errors:
+            raise RuntimeError('{} failed to start on {} node(s): {}'
+                               .format(self.cls.__name__, len(self.errors),
+                                       ', '.join(sorted(self.errors))))
+
+    def cleanup(self, maxWorkers=DEFAULT_MAX_WORKERS):
+        """Stop the application on every node, several nodes at a time"""
+        if not self.apps:
+            return
+        Parallel(n_jobs=max(1, min(maxWorkers, len(self.apps))), require='sharedmem',
+                 prefer='threads')(delayed(app.stop)() for app in self.apps)
 
     def __getitem__(self, nodeName):
         for app in self.apps:
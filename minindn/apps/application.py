@@ -21,24 +21,87 @@
 # along with Mini-NDN, e.g., in COPYING.md file.
 # If not, see <http://www.gnu.org/licenses/>.
 
-from minindn.util import getPopen
+import os
+from subprocess import PIPE, STDOUT
+
+from mininet.log import warn
+
+from minindn.minindn import Minindn
+from minindn.util import getPopen, waitUntil
+from minindn.apps.log_pipeline import LogWriter
 
 class Application(object):
-    def __init__(self, node):
+    # Seconds waitUntilReady waits for the readiness probe to succeed, and between two probes
+    readyTimeout = 10
+    readyPollInterval = 0.05
+    # Default LogPolicy of the applications, None writes the output unbounded to the log file
+    logPolicy = None
+    # Seconds stop waits for the remaining output of the application to be written
+    logDrainTimeout = 5
+
+    def __init__(self, node, logPolicy=None):
         self.node = node
         self.process = None
         self.logfile = None
+        self.logStream = None
+        self.cgroup = None
+        if logPolicy is not None:
+            self.logPolicy = logPolicy
         self.homeDir = self.node.params['params']['homeDir']
 
         # Make directory for log file
         self.logDir = '{}/log'.format(self.homeDir)
         self.node.cmd('mkdir -p {}'.format(self.logDir))
 
-    def start(self, command, logfile, envDict=None):
+    def start(self, command, logfile, envDict=None, append=False):
+        if self.process is None:
+            logPath = '{}/{}'.format(self.logDir, logfile)
+            if self.logPolicy is None:
+                self.logfile = open(logPath, 'a' if append else 'w')
+                self.process = getPopen(self.node, command.split(), envDict,
+                                        stdout=self.logfile, stderr=self.logfile)
+            else:
+                # Truncate like the unbounded log, the log stream appends to its segments
+                if not append:
+                    open(logPath, 'w').close()
+                self.process = getPopen(self.node, command.split(), envDict,
+                                        stdout=PIPE, stderr=STDOUT)
+                self.logStream = LogWriter.get().add(self.process.stdout, logPath,
+                                                     self.logPolicy)
+            if Minindn.cgroups is not None:
+                self.joinCgroup(os.path.basename(command.split()[0]))
+
+    def joinCgroup(self, appName, pid=None):
+        """
+        Move the process to its own cgroup, for resource accounting and node CPU quotas
+
+        :param pid: (optional) process to move, default is the process of the application
+        """
+        try:
+            self.cgroup = Minindn.cgroups.addProcess(self.node.name, appName,
+                                                     self.process.pid if pid is None else pid)
+        except (IOError, OSError) as e:
+            warn('[{}] Cannot move {} to its cgroup: {}\n'.format(self.node.name, appName, e))
+
+    def isReady(self):
+        """
+        Readiness probe, returns True once the application can be used.
+        By default an application is ready as soon as its process is running.
+        """
+        return self.process is not None and self.process.poll() is None
+
+    def waitUntilReady(self, timeout=None):
+        """
+        Wait until the readiness probe succeeds, the process exits or the timeout expires.
+        Returns True if the application is ready.
+
+        :param timeout: (optional) seconds to wait, default is readyTimeout
+        """
+        timeout = self.readyTimeout if timeout is None else timeout
         if self.process is None:
-            self.logfile = open('{}/{}'.format(self.logDir, logfile), 'w')
-            self.process = getPopen(self.node, command.split(), envDict,
-                                    stdout=self.logfile, stderr=self.logfile)
+            return False
+        return waitUntil(lambda: self.process.poll() is not None or self.isReady(), timeout,
+                         self.readyPollInterval) and self.process.poll() is None
 
     def stop(self):
         if self.process is not None:
@@ -46,3 +109,7 @@ class Application(object):
             self.process = None
         if self.logfile is not None:
             self.logfile.close()
+        if self.logStream is not None:
+            # Let the writer thread write the last output before the logs are collected
+            self.logStream.closed.wait(self.logDrainTimeout)
+            self.logStream = None
@@ -0,0 +1,282 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Bounded application logs: the output of an application is read from a pipe by a
+single background thread shared by all applications, which writes it to size or
+time rotated segments, compresses the rotated segments and stops writing once the
+byte cap of the application is reached. The pipe is always drained, so a capped
+application never blocks on its output.
+
+    from minindn.apps.application import Application
+    from minindn.apps.log_pipeline import LogPolicy
+
+    # Every application started afterwards, or per application with logPolicy=
+    Application.logPolicy = LogPolicy(maxBytes=16 << 20, backupCount=4, compression='zstd',
+                                      maxTotalBytes=256 << 20)
+'''
+
+import fcntl
+import gzip
+import itertools
+import os
+import selectors
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mininet.log import debug, warn
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+# Bytes read from a pipe at once
+READ_SIZE = 1 << 16
+# Pipe capacity requested so that bursts of output do not block the application
+PIPE_SIZE = 1 << 20
+_F_SETPIPE_SZ = 1031
+
+class LogPolicy(object):
+    def __init__(self, maxBytes=None, maxAge=None, backupCount=5, compression=None,
+                 maxTotalBytes=None, bufferSize=1 << 16, flushInterval=1.0):
+        """
+        How the output of an application is written
+
+        :param maxBytes: (optional) Rotate the log once it holds this many bytes
+        :param maxAge: (optional) Rotate the log once it is this many seconds old
+        :param backupCount: (optional) Number of rotated segments kept, older ones are deleted
+        :param compression: (optional) None, gzip or zstd (needs the zstandard module),
+          applied to the rotated segments, the current segment stays plain text
+        :param maxTotalBytes: (optional) Bytes written by the application over all segments,
+          later output is discarded
+        :param bufferSize: (optional) Write buffer of the current segment
+        :param flushInterval: (optional) Seconds between two flushes of the write buffers
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError('Unknown log compression {}, expected gzip or zstd'
+                             .format(compression))
+        if compression == 'zstd' and zstandard is None:
+            raise ImportError('zstandard module is required for zstd compressed logs')
+        self.maxBytes = maxBytes
+        self.maxAge = maxAge
+        self.backupCount = backupCount
+        self.compression = compression
+        self.maxTotalBytes = maxTotalBytes
+        self.bufferSize = bufferSize
+        self.flushInterval = flushInterval
+
+_compressor = None
+_compressorLock = threading.Lock()
+
+def _getCompressor():
+    """Thread compressing the rotated segments of all the logs, one segment after the other"""
+    global _compressor
+    with _compressorLock:
+        if _compressor is None:
+            _compressor = ThreadPoolExecutor(max_workers=1,
+                                             thread_name_prefix='minindn-log-compressor')
+        return _compressor
+
+def compressFile(source, destination, compression):
+    """Compress source into destination and remove source"""
+    with open(source, 'rb') as f:
+        if compression == 'gzip':
+            with gzip.open(destination, 'wb', compresslevel=1) as out:
+                shutil.copyfileobj(f, out)
+        else:
+            with open(destination, 'wb') as out:
+                zstandard.ZstdCompressor(level=3).copy_stream(f, out)
+    os.remove(source)
+
+class LogStream(object):
+    """The log of one application, written by the LogWriter thread"""
+    def __init__(self, pipe, fileName, policy):
+        self.pipe = pipe
+        self.fileName = fileName
+        self.policy = policy
+        self.totalBytes = 0
+        self.discardedBytes = 0
+        self.closed = threading.Event()
+        self._rotations = itertools.count(1)
+        self._open()
+
+    def _open(self):
+        self.file = open(self.fileName, 'ab', buffering=self.policy.bufferSize)
+        self.size = self.file.tell()
+        self.opened = time.time()
+
+    def _segmentName(self, index):
+        return '{}.{}{}'.format(self.fileName, index, COMPRESSIONS[self.policy.compression])
+
+    def rotate(self):
+        """
+        Close the current segment, shift the rotated ones and start a new segment.
+        Compressed segments are shifted and compressed by the compressor thread, so that
+        the writer thread keeps draining the pipes meanwhile.
+        """
+        self.file.close()
+        if self.policy.backupCount <= 0:
+            os.remove(self.fileName)
+        elif self.policy.compression is None:
+            self._shift()
+            os.rename(self.fileName, self._segmentName(1))
+        else:
+            rotated = '{}.rotated-{}'.format(self.fileName, next(self._rotations))
+            os.rename(self.fileName, rotated)
+            _getCompressor().submit(self._compressRotated, rotated)
+        self._open()
+
+    def _shift(self):
+        oldest = self._segmentName(self.policy.backupCount)
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for index in range(self.policy.backupCount - 1, 0, -1):
+            if os.path.exists(self._segmentName(index)):
+                os.rename(self._segmentName(index), self._segmentName(index + 1))
+
+    def _compressRotated(self, rotated):
+        try:
+            self._shift()
+            compressFile(rotated, self._segmentName(1), self.policy.compression)
+        except (OSError, IOError) as e:
+            warn('Cannot compress the rotated log {}: {}\n'.format(rotated, e))
+
+    def write(self, data):
+        policy = self.policy
+        if policy.maxTotalBytes is not None:
+            room = policy.maxTotalBytes - self.totalBytes
+            if room <= 0:
+                self.discardedBytes += len(data)
+                return
+            if len(data) > room:
+                self.discardedBytes += len(data) - room
+                data = data[:room]
+        if (policy.maxBytes is not None and self.size > 0 and self.size + len(data) > policy.maxBytes) or \
+           (policy.maxAge is not None and time.time() - self.opened > policy.maxAge):
+            self.rotate()
+        self.file.write(data)
+        self.size += len(data)
+        self.totalBytes += len(data)
+        if policy.maxTotalBytes is not None and self.totalBytes >= policy.maxTotalBytes:
+            self.file.write('\n[Log cap of {} bytes reached, later output is discarded]\n'
+                            .format(policy.maxTotalBytes).encode('utf-8'))
+
+    def flush(self):
+        if not self.file.closed:
+            self.file.flush()
+
+    def close(self):
+        if self.discardedBytes:
+            debug('{}: {} bytes discarded\n'.format(self.fileName, self.discardedBytes))
+        self.file.close()
+        self.pipe.close()
+        if self.policy.compression is not None and self.policy.backupCount > 0:
+            # Closed once the segments rotated before are compressed, before logs are collected
+            _getCompressor().submit(self.closed.set)
+        else:
+            self.closed.set()
+
+class LogWriter(object):
+    """Background thread writing the logs of all the applications"""
+    _instance = None
+    _instanceLock = threading.Lock()
+
+    @staticmethod
+    def get():
+        """Return the shared writer, started on first use"""
+        with LogWriter._instanceLock:
+            if LogWriter._instance is None:
+                LogWriter._instance = LogWriter()
+            return LogWriter._instance
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.lock = threading.Lock()
+        self.pending = []
+        self.streams = []
+        self.wakeRead, self.wakeWrite = os.pipe()
+        os.set_blocking(self.wakeWrite, False)
+        self.selector.register(self.wakeRead, selectors.EVENT_READ, None)
+        self.thread = threading.Thread(target=self._run, name='minindn-log-writer', daemon=True)
+        self.thread.start()
+
+    def add(self, pipe, fileName, policy):
+        """
+        Write what is read from pipe (the stdout of an application) to fileName
+        according to policy. Returns the LogStream, closed at the end of the pipe.
+        """
+        try:
+            # Larger pipe to absorb bursts of output, Linux only
+            fcntl.fcntl(pipe.fileno(), _F_SETPIPE_SZ, PIPE_SIZE)
+        except (OSError, IOError):
+            pass
+        stream = LogStream(pipe, fileName, policy)
+        with self.lock:
+            self.pending.append(stream)
+        self._wake()
+        return stream
+
+    def _wake(self):
+        try:
+            os.write(self.wakeWrite, b'\0')
+        except BlockingIOError:
+            pass
+
+    def _run(self):
+        lastFlush = time.time()
+        while True:
+            flushInterval = min([s.policy.flushInterval for s in self.streams] or [1.0])
+            for key, _ in self.selector.select(timeout=flushInterval):
+                stream = key.data
+                if stream is None:
+                    os.read(self.wakeRead, READ_SIZE)
+                    continue
+                try:
+                    data = os.read(stream.pipe.fileno(), READ_SIZE)
+                except OSError as e:
+                    warn('Cannot read the output for {}: {}\n'.format(stream.fileName, e))
+                    data = b''
+                if data:
+                    try:
+                        stream.write(data)
+                    except (OSError, IOError) as e:
+                        warn('Cannot write {}: {}\n'.format(stream.fileName, e))
+                else:
+                    self.selector.unregister(stream.pipe)
+                    self.streams.remove(stream)
+                    stream.close()
+
+            with self.lock:
+                pending, self.pending = self.pending, []
+            for stream in pending:
+                self.selector.register(stream.pipe, selectors.EVENT_READ, stream)
+                self.streams.append(stream)
+
+            if time.time() - lastFlush >= flushInterval:
+                for stream in self.streams:
+                    stream.flush()
+                lastFlush = time.time()
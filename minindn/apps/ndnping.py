@@ -0,0 +1,229 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+ndnpingserver and ndnping as applications, and a parser of the ping output.
+
+The output is written to <node home>/ping-data: output-server.txt for the server and
+<destination>.txt for each client, appended to so that restarted pings keep the
+earlier results.
+
+    servers = AppManager(ndn, ndn.net.hosts, NDNPingServer, parallel=True)
+    client = NDNPingClient(a, NDNPingServer.defaultPrefix(b), destination=b.name, nPings=60)
+    client.start()
+    client.wait(timeout=70)
+    result = client.results()
+    print(result.lossRatio, np.nanmean(result.rtt))
+'''
+
+import glob
+import os
+import re
+import subprocess
+from datetime import datetime
+
+import numpy as np
+
+from minindn.apps.application import Application
+from minindn.util import getSafeName
+
+PING_DATA_DIR = 'ping-data'
+SERVER_LOG = 'output-server.txt'
+CONTENT = 'content'
+NACK = 'nack'
+TIMEOUT = 'timeout'
+
+# e.g. "20211018T123010.123456 - content from /ndn/b-site/b: seq=42 time=1.234 ms" with -t,
+# older ndn-tools print the Unix time in milliseconds instead: "1634560210123 - timeout from ..."
+_RESULT_LINE = re.compile(r'^(?:(\d{8}T\d{6}(?:\.\d+)?) - |(\d+) - )?'
+                          r'(content|nack|timeout) from \S+: seq=(\d+)(?: time=([\d.]+) ms)?')
+
+class PingResult(object):
+    """Results of the pings of one client, one entry per ping in the order of the output"""
+    def __init__(self, seq, timestamp, rtt, status):
+        # Sequence numbers, restarted pings start again from a random number
+        self.seq = seq
+        # Unix time of each result, NaN without timestamps in the output
+        self.timestamp = timestamp
+        # Round trip time in milliseconds, NaN for timeouts
+        self.rtt = rtt
+        # CONTENT, NACK or TIMEOUT
+        self.status = status
+
+    def __len__(self):
+        return len(self.seq)
+
+    @property
+    def sent(self):
+        return len(self.seq)
+
+    @property
+    def received(self):
+        return int(np.count_nonzero(self.status == CONTENT))
+
+    @property
+    def lossRatio(self):
+        """Ratio of the pings without content, NaN if no ping was sent"""
+        return 1 - self.received / float(self.sent) if self.sent else float('nan')
+
+    def rttStats(self):
+        """Return min, mean, median, max and standard deviation of the RTT of the received pings"""
+        rtt = self.rtt[self.status == CONTENT]
+        if len(rtt) == 0:
+            return None
+        return {'min': float(rtt.min()), 'mean': float(rtt.mean()), 'median': float(np.median(rtt)),
+                'max': float(rtt.max()), 'std': float(rtt.std())}
+
+def _parseTimestamp(isoTime, unixTimeMs):
+    if unixTimeMs is not None:
+        return int(unixTimeMs) / 1000.0
+    if isoTime is not None:
+        fmt = '%Y%m%dT%H%M%S.%f' if '.' in isoTime else '%Y%m%dT%H%M%S'
+        return (datetime.strptime(isoTime, fmt) - datetime(1970, 1, 1)).total_seconds()
+    return float('nan')
+
+def parsePingOutput(text):
+    """Parse the output of ndnping into a PingResult, other lines are ignored"""
+    seq = []
+    timestamp = []
+    rtt = []
+    status = []
+    for line in text.splitlines():
+        match = _RESULT_LINE.match(line.strip())
+        if match is None:
+            continue
+        isoTime, unixTimeMs, kind, number, time = match.groups()
+        seq.append(int(number))
+        timestamp.append(_parseTimestamp(isoTime, unixTimeMs))
+        # Nacks carry the time until the nack was received, it is not a round trip time
+        rtt.append(float(time) if time is not None and kind == CONTENT else float('nan'))
+        status.append(kind)
+    return PingResult(np.array(seq, dtype=np.uint64), np.array(timestamp, dtype=np.float64),
+                      np.array(rtt, dtype=np.float64), np.array(status, dtype='U7'))
+
+def readPingFile(fileName):
+    with open(fileName, errors='replace') as f:
+        return parsePingOutput(f.read())
+
+def readPingResults(workDir):
+    """
+    Parse the client output of every node of an experiment
+
+    :param workDir: work directory (or result directory) holding one folder per node
+    :return: {(source node name, destination): PingResult}
+    """
+    results = {}
+    for fileName in sorted(glob.glob(os.path.join(workDir, '*', PING_DATA_DIR, '*.txt'))):
+        if os.path.basename(fileName) == SERVER_LOG:
+            continue
+        source = os.path.basename(os.path.dirname(os.path.dirname(fileName)))
+        destination = os.path.splitext(os.path.basename(fileName))[0]
+        results[(source, destination)] = readPingFile(fileName)
+    return results
+
+class NDNPingServer(Application):
+    def __init__(self, node, prefix=None, freshness=None, satisfy=None, size=None,
+                 timestamp=False, quiet=False, logPolicy=None):
+        """
+        ndnpingserver on a node
+
+        :param prefix: (optional) prefix to serve, default is /ndn/<node>-site/<node>
+        :param freshness: (optional) FreshnessPeriod of the ping responses, in milliseconds
+        :param satisfy: (optional) maximum number of pings to satisfy
+        :param size: (optional) size of the response payload
+        :param timestamp: (optional) prepend a timestamp to each log message
+        :param quiet: (optional) do not print a log message each time a ping is received
+        """
+        Application.__init__(self, node, logPolicy)
+        self.prefix = prefix if prefix is not None else NDNPingServer.defaultPrefix(node)
+        self.logDir = os.path.join(self.homeDir, PING_DATA_DIR)
+        os.makedirs(self.logDir, exist_ok=True)
+        self.command = 'ndnpingserver{}{}{}{}{} {}'.format(
+            ' -f {}'.format(freshness) if freshness else '',
+            ' -p {}'.format(satisfy) if satisfy else '',
+            ' -s {}'.format(size) if size else '',
+            ' -t' if timestamp else '',
+            ' -q' if quiet else '',
+            self.prefix)
+
+    @staticmethod
+    def defaultPrefix(node):
+        return getSafeName('/ndn/{}-site/{}'.format(node.name, node.name))
+
+    def start(self):
+        Application.start(self, self.command, SERVER_LOG, append=True)
+
+class NDNPingClient(Application):
+    def __init__(self, node, prefix, destination=None, nPings=1, interval=None, timeout=None,
+                 startSeq=None, identifier=None, allowStale=False, printTimestamp=True,
+                 logPolicy=None):
+        """
+        ndnping from a node
+
+        :param prefix: prefix to ping
+        :param destination: (optional) name of the output file in ping-data, usually the name
+          of the pinged node, default is output-client
+        :param nPings: number of pings
+        :param interval: (optional) milliseconds between two pings
+        :param timeout: (optional) timeout of each ping, in milliseconds
+        :param startSeq: (optional) sequence number of the first ping
+        :param identifier: (optional) identifier added to the ping names
+        :param allowStale: (optional) accept stale data
+        :param printTimestamp: (optional) prepend a timestamp to each result
+        """
+        Application.__init__(self, node, logPolicy)
+        self.prefix = prefix
+        self.destination = destination or 'output-client'
+        self.logDir = os.path.join(self.homeDir, PING_DATA_DIR)
+        os.makedirs(self.logDir, exist_ok=True)
+        self.logFile = '{}.txt'.format(self.destination)
+        self.command = 'ndnping -c {}{}{}{}{}{}{} {}'.format(
+            nPings,
+            ' -i {}'.format(interval) if interval else '',
+            ' -o {}'.format(timeout) if timeout else '',
+            ' -n {}'.format(startSeq) if startSeq is not None else '',
+            ' -p {}'.format(identifier) if identifier else '',
+            ' -a' if allowStale else '',
+            ' -t' if printTimestamp else '',
+            prefix)
+
+    def start(self):
+        Application.start(self, self.command, self.logFile, append=True)
+
+    def waitUntilReady(self, timeout=None):
+        # A client may finish its pings before it is probed, it is ready once started
+        return self.process is not None
+
+    def wait(self, timeout=None):
+        """Wait until all the pings are done, returns False if the timeout expired first"""
+        if self.process is None:
+            return True
+        try:
+            self.process.wait(timeout)
+            return True
+        except subprocess.TimeoutExpired:
+            return False
+
+    def results(self):
+        """Parse the output written so far, including the output of earlier runs"""
+        return readPingFile(os.path.join(self.logDir, self.logFile))
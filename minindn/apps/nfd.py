@@ -21,15 +21,18 @@
 # along with Mini-NDN, e.g., in COPYING.md file.
 # If not, see <http://www.gnu.org/licenses/>.
 
+import socket
+
 from minindn.apps.application import Application
-from minindn.util import copyExistentFile
+from minindn.util import copyExistentFile, findExistentFile
 from minindn.minindn import Minindn
+from minindn.helpers.infoedit import InfoTree
 
 class Nfd(Application):
 
     def __init__(self, node, logLevel='NONE', csSize=65536,
-                 csPolicy='lru', csUnsolicitedPolicy='drop-all'):
-        Application.__init__(self, node)
+                 csPolicy='lru', csUnsolicitedPolicy='drop-all', logPolicy=None):
+        Application.__init__(self, node, logPolicy)
 
         self.logLevel = node.params['params'].get('nfd-log-level', logLevel)
 
@@ -39,21 +42,23 @@ class Nfd(Application):
         self.ndnFolder = '{}/.ndn'.format(self.homeDir)
         self.clientConf = '{}/client.conf'.format(self.ndnFolder)
 
-        # Copy nfd.conf file from /usr/local/etc/ndn or /etc/ndn to the node's home directory
-        # Use nfd.conf as default configuration for NFD, else use the sample
+        # Use nfd.conf from /usr/local/etc/ndn or /etc/ndn as the template for the node's
+        # configuration, else use the sample. The template is parsed once per process.
         possibleConfPaths = ['/usr/local/etc/ndn/nfd.conf.sample', '/usr/local/etc/ndn/nfd.conf',
                              '/etc/ndn/nfd.conf.sample', '/etc/ndn/nfd.conf']
-        copyExistentFile(node, possibleConfPaths, self.confFile)
+        self.config = InfoTree.load(findExistentFile(possibleConfPaths))
 
         # Set log level
-        node.cmd('infoedit -f {} -s log.default_level -v {}'.format(self.confFile, self.logLevel))
-        # Open the conf file and change socket file name
-        node.cmd('infoedit -f {} -s face_system.unix.path -v {}'.format(self.confFile, self.sockFile))
+        self.config.set('log.default_level', self.logLevel)
+        # Change socket file name
+        self.config.set('face_system.unix.path', self.sockFile)
 
         # Set CS parameters
-        node.cmd('infoedit -f {} -s tables.cs_max_packets -v {}'.format(self.confFile, csSize))
-        node.cmd('infoedit -f {} -s tables.cs_policy -v {}'.format(self.confFile, csPolicy))
-        node.cmd('infoedit -f {} -s tables.cs_unsolicited_policy -v {}'.format(self.confFile, csUnsolicitedPolicy))
+        self.config.set('tables.cs_max_packets', csSize)
+        self.config.set('tables.cs_policy', csPolicy)
+        self.config.set('tables.cs_unsolicited_policy', csUnsolicitedPolicy)
+
+        self.config.write(self.confFile)
 
         # Make NDN folder
         node.cmd('mkdir -p {}'.format(self.ndnFolder))
@@ -72,4 +77,14 @@ class Nfd(Application):
 
     def start(self):
         Application.start(self, 'nfd --config {}'.format(self.confFile), logfile=self.logFile)
-        Minindn.sleep(0.5)
+
+    def isReady(self):
+        """NFD is ready when its unix socket accepts connections"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.sockFile)
+            return True
+        except (IOError, OSError):
+            return False
+        finally:
+            sock.close()
@@ -23,6 +23,7 @@
 
 import shutil
 import os, sys
+from threading import Lock
 
 from mininet.clean import sh
 from mininet.examples.cluster import RemoteMixin
@@ -30,19 +31,26 @@ from mininet.log import warn
 from mininet.node import Switch
 
 from minindn.apps.application import Application
-from minindn.util import scp, copyExistentFile
-from minindn.helpers.nfdc import Nfdc
+from minindn.util import scp, findExistentFile
+from minindn.helpers.nfdc import Nfdc, NfdcSession
+from minindn.helpers.infoedit import InfoTree
 from minindn.minindn import Minindn
 
+# Serializes creation of the shared root certificate when NLSR is configured in parallel
+rootCertLock = Lock()
+
 class Nlsr(Application):
     ROUTING_LINK_STATE = 'link-state'
     ROUTING_HYPERBOLIC = 'hr'
     ROUTING_DRY_RUN = 'dry'
     SYNC_PSYNC = 'psync'
+    readyTimeout = 30
+    readyPollInterval = 0.5
 
     def __init__(self, node, logLevel='NONE', security=False, sync=SYNC_PSYNC,
-                 faceType='udp', nFaces=3, routingType=ROUTING_LINK_STATE, faceDict=None):
-        Application.__init__(self, node)
+                 faceType='udp', nFaces=3, routingType=ROUTING_LINK_STATE, faceDict=None,
+                 logPolicy=None):
+        Application.__init__(self, node, logPolicy)
         try:
             from mn_wifi.node import Node_wifi
             if isinstance(node, Node_wifi) and faceDict == None:
@@ -70,7 +78,6 @@ class Nlsr(Application):
         self.security = security
         self.sync = sync
         self.faceType = faceType
-        self.infocmd = 'infoedit -f nlsr.conf'
         # Expected format- node : tuple (node name, IP, cost)
         self.faceDict = faceDict
 
@@ -94,7 +101,8 @@ class Nlsr(Application):
 
         self.neighborIPs = []
         possibleConfPaths = ['/usr/local/etc/ndn/nlsr.conf.sample', '/etc/ndn/nlsr.conf.sample']
-        copyExistentFile(node, possibleConfPaths, '{}/nlsr.conf'.format(self.homeDir))
+        # The sample is parsed once per process, each node edits its own copy
+        self.config = InfoTree.load(findExistentFile(possibleConfPaths))
 
         self.createConfigFile()
 
@@ -104,11 +112,22 @@ class Nlsr(Application):
     def start(self):
         self.createFaces()
         Application.start(self, 'nlsr -f {}'.format(self.confFile), self.logFile, self.envDict)
-        Minindn.sleep(1)
+
+    def isReady(self):
+        """NLSR is ready when it answers nlsrc status"""
+        return self.node.cmd('nlsrc status > /dev/null 2>&1; echo $?').strip() == '0'
 
     def createFaces(self):
-        for ip in self.neighborIPs:
-            Nfdc.createFace(self.node, ip, self.faceType, isPermanent=True)
+        """Create the faces to all the neighbors with one nfdc session"""
+        if not self.neighborIPs:
+            return
+        with NfdcSession(self.node) as session:
+            results = session.execute([Nfdc.faceCreateCommand(ip, self.faceType, isPermanent=True)
+                                       for ip in self.neighborIPs])
+        for result in results:
+            if not result.success:
+                warn('[{}] Face creation failed: {} {}\n'
+                     .format(self.node.name, result.command, ' '.join(result.output)))
 
     @staticmethod
     def createKey(host, name, outputFile):
@@ -121,15 +140,15 @@ class Nlsr(Application):
     def createKeysAndCertificates(self):
         securityDir = '{}/security'.format(Minindn.workDir)
 
-        if not os.path.exists(securityDir):
-            os.mkdir(securityDir)
+        os.makedirs(securityDir, exist_ok=True)
 
         rootName = self.network
         rootCertFile = '{}/root.cert'.format(securityDir)
-        if not os.path.isfile(rootCertFile):
-            # Create root certificate
-            sh('ndnsec-keygen {}'.format(rootName)) # Installs a self-signed cert into the system
-            sh('ndnsec-cert-dump -i {} > {}'.format(rootName, rootCertFile))
+        with rootCertLock:
+            if not os.path.isfile(rootCertFile):
+                # Create root certificate
+                sh('ndnsec-keygen {}'.format(rootName)) # Installs a self-signed cert into the system
+                sh('ndnsec-cert-dump -i {} > {}'.format(rootName, rootCertFile))
 
         # Create necessary certificates for each site
         nodeSecurityFolder = '{}/security'.format(self.homeDir)
@@ -200,17 +219,27 @@ class Nlsr(Application):
         self.__editAdvertisingSection()
         self.__editSecuritySection()
 
+        self.config.write(self.confFile)
+
     def __editGeneralSection(self):
 
-        self.node.cmd('{} -s general.network -v {}'.format(self.infocmd, self.network))
-        self.node.cmd('{} -s general.site -v /{}-site'.format(self.infocmd, self.node.name))
-        self.node.cmd('{} -s general.router -v /%C1.Router/cs/{}'.format(self.infocmd, self.node.name))
-        self.node.cmd('{} -s general.state-dir -v {}/log'.format(self.infocmd, self.homeDir))
-        self.node.cmd('{} -s general.sync-protocol -v {}'.format(self.infocmd, self.sync))
+        self.config.set('general.network', self.network)
+        self.config.set('general.site', '/{}-site'.format(self.node.name))
+        self.config.set('general.router', '/%C1.Router/cs/{}'.format(self.node.name))
+        self.config.set('general.state-dir', '{}/log'.format(self.homeDir))
+        self.config.set('general.sync-protocol', self.sync)
+
+    def __addNeighbor(self, name, ip, linkCost):
+
+        neighbor = InfoTree()
+        neighbor.put('name', '{}{}-site/%C1.Router/cs/{}'.format(self.network, name, name))
+        neighbor.put('face-uri', '{}://{}'.format(self.faceType, ip))
+        neighbor.put('link-cost', linkCost)
+        self.config.add('neighbors.neighbor', neighbor)
 
     def __editNeighborsSection(self):
 
-        self.node.cmd('{} -d neighbors.neighbor'.format(self.infocmd))
+        self.config.delete('neighbors.neighbor')
         for intf in self.node.intfList():
             link = intf.link
             if not link:
@@ -233,14 +262,11 @@ class Nlsr(Application):
 
             self.neighborIPs.append(ip)
 
-            self.node.cmd('{} -a neighbors.neighbor \
-                          <<<\'name {}{}-site/%C1.Router/cs/{} face-uri {}://{}\n link-cost {}\''
-                          .format(self.infocmd, self.network, other.name, other.name,
-                                  self.faceType, ip, linkCost))
+            self.__addNeighbor(other.name, ip, linkCost)
 
     def __editNeighborsSectionManual(self):
 
-        self.node.cmd('{} -d neighbors.neighbor'.format(self.infocmd))
+        self.config.delete('neighbors.neighbor')
         if self.node not in self.faceDict:
             return
         for link in self.faceDict[self.node]:
@@ -248,39 +274,36 @@ class Nlsr(Application):
             nodeIP = link[1]
             linkCost = link[2]
 
-            self.node.cmd('{} -a neighbors.neighbor \
-                          <<<\'name {}{}-site/%C1.Router/cs/{} face-uri {}://{}\n link-cost {}\''
-                          .format(self.infocmd, self.network, nodeName, nodeName,
-                                  self.faceType, nodeIP, linkCost))
-
+            self.__addNeighbor(nodeName, nodeIP, linkCost)
 
     def __editHyperbolicSection(self):
 
-        self.node.cmd('{} -s hyperbolic.state -v {}'.format(self.infocmd, self.hyperbolicState))
-        self.node.cmd('{} -s hyperbolic.radius -v {}'.format(self.infocmd, self.hyperRadius))
-        self.node.cmd('{} -s hyperbolic.angle -v {}'.format(self.infocmd, self.hyperAngle))
+        self.config.set('hyperbolic.state', self.hyperbolicState)
+        self.config.set('hyperbolic.radius', self.hyperRadius)
+        self.config.set('hyperbolic.angle', self.hyperAngle)
 
     def __editFibSection(self):
 
-        self.node.cmd('{} -s fib.max-faces-per-prefix  -v {}'.format(self.infocmd, self.nFaces))
+        self.config.set('fib.max-faces-per-prefix', self.nFaces)
 
     def __editAdvertisingSection(self):
 
-        self.node.cmd('{} -d advertising.prefix'.format(self.infocmd))
-        self.node.cmd('{} -s advertising.prefix -v {}{}-site/{}'
-                      .format(self.infocmd, self.network, self.node.name, self.node.name))
+        self.config.delete('advertising.prefix')
+        self.config.set('advertising.prefix', '{}{}-site/{}'
+                        .format(self.network, self.node.name, self.node.name))
 
     def __editSecuritySection(self):
 
-        self.node.cmd('{} -d security.cert-to-publish'.format(self.infocmd))
+        self.config.delete('security.cert-to-publish')
         if not self.security:
-            self.node.cmd('{} -s security.validator.trust-anchor.type -v any'.format(self.infocmd))
-            self.node.cmd('{} -d security.validator.trust-anchor.file-name'.format(self.infocmd))
-            self.node.cmd('{} -s security.prefix-update-validator.trust-anchor.type -v any'.format(self.infocmd))
-            self.node.cmd('{} -d security.prefix-update-validator.trust-anchor.file-name'.format(self.infocmd))
+            self.config.set('security.validator.trust-anchor.type', 'any')
+            self.config.delete('security.validator.trust-anchor.file-name')
+            self.config.set('security.prefix-update-validator.trust-anchor.type', 'any')
+            self.config.delete('security.prefix-update-validator.trust-anchor.file-name')
         else:
-            self.node.cmd('{} -s security.validator.trust-anchor.file-name -v security/root.cert'.format(self.infocmd))
-            self.node.cmd('{} -s security.prefix-update-validator.trust-anchor.file-name -v security/site.cert'.format(self.infocmd))
-            self.node.cmd('{} -p security.cert-to-publish -v security/site.cert'.format(self.infocmd))
-            self.node.cmd('{} -p security.cert-to-publish -v security/op.cert'.format(self.infocmd))
-            self.node.cmd('{} -p security.cert-to-publish -v security/router.cert'.format(self.infocmd))
\ No newline at end of file
+            self.config.set('security.validator.trust-anchor.file-name', 'security/root.cert')
+            self.config.set('security.prefix-update-validator.trust-anchor.file-name',
+                            'security/site.cert')
+            self.config.put('security.cert-to-publish', 'security/site.cert')
+            self.config.put('security.cert-to-publish', 'security/op.cert')
+            self.config.put('security.cert-to-publish', 'security/router.cert')
@@ -21,8 +21,26 @@
 # along with Mini-NDN, e.g., in COPYING.md file.
 # If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import selectors
+import threading
+from collections import OrderedDict
+from subprocess import PIPE, TimeoutExpired
+
+from mininet.log import debug, warn
+
+from minindn.minindn import Minindn
 from minindn.apps.application import Application
-from mininet.log import debug
+from minindn.util import getPopen
+from minindn.helpers.packet_summary import PcapStream, PcapError, PacketSummaryWriter, \
+    summarizeFrame, parseInterfaces, interfacesFileName, writeInterfaces
+
+# Only NDN traffic is captured when summarizing: NDN over UDP, TCP and Ethernet
+NDN_CAPTURE_FILTER = 'udp port 6363 or tcp port 6363 or udp port 56363 or ether proto 0x8624'
+# Bytes captured per packet when summarizing, enough for the headers and the name
+SUMMARY_SNAPLEN = 512
+# Seconds stop waits for tshark to flush its output after SIGTERM
+STOP_TIMEOUT = 5
 
 
 class Tshark(Application):
@@ -30,30 +48,164 @@ class Tshark(Application):
     Logging utility to dump network traffic of a node to a PCAP file.
 
     The app is based on the command line tool tshark and requires tshark to be installed on the system.
+
+    With summarize=True, no PCAP file is written: tshark streams the NDN packets to Mini-NDN,
+    which decodes them while they are captured and writes one line per NDN packet (time,
+    interface, direction, Interest/Data/Nack, name, size) to <node>-packets.csv.gz.
     """
 
-    def __init__(self, node, logFolder="./", singleLogFile=False):
+    def __init__(self, node, logFolder="./", singleLogFile=False, snaplen=None, ringBuffer=None,
+                 captureFilter=None, summarize=False):
         """
         :param logFolder Folder, where PCAP files are stored.
         :param singleLogFile Single PCAP file per node, or individual PCAP for each interface
+        :param snaplen Bytes captured per packet, the whole packet by default
+          (SUMMARY_SNAPLEN when summarizing)
+        :param ringBuffer (file size in kB, number of files) to rotate the PCAP files and only
+          keep the most recent ones
+        :param captureFilter Capture filter of the packets (NDN_CAPTURE_FILTER when summarizing)
+        :param summarize Write a summary of the NDN packets instead of PCAP files
         """
 
         Application.__init__(self, node)
 
         self.logFolder = logFolder
         self.singleLogFile = singleLogFile
+        self.summarize = summarize
+        self.snaplen = SUMMARY_SNAPLEN if snaplen is None and summarize else snaplen
+        self.captureFilter = NDN_CAPTURE_FILTER if captureFilter is None and summarize \
+                             else captureFilter
+        self.ringBuffer = ringBuffer
+        if summarize and ringBuffer is not None:
+            warn('[{}] Tshark ring buffer is not used when summarizing\n'.format(node.name))
+        # Interface to its tshark process and log file
+        self.processes = OrderedDict()
+        self.logfiles = []
+        self.summaryFile = os.path.join(self.homeDir, logFolder,
+                                        '{}-packets.csv.gz'.format(node.name))
+        self.summarizer = None
 
         # Create logfile folder in case it does not exist
         node.cmd('mkdir -p {}'.format(self.logFolder))
 
+    def captureCommand(self, intf, outputFile):
+        """Return the tshark command line capturing intf to outputFile, - for stdout"""
+        command = ['tshark', '-i', intf, '-q']
+        if intf == 'any':
+            # Unlike LINUX_SLL, the LINUX_SLL2 header holds the interface index of each packet
+            command += ['-y', 'LINUX_SLL2']
+        if self.snaplen is not None:
+            command += ['-s', str(self.snaplen)]
+        if self.captureFilter is not None:
+            command += ['-f', self.captureFilter]
+        if outputFile == '-':
+            # Stream in libpcap format, which PcapStream decodes
+            command += ['-F', 'pcap']
+        elif self.ringBuffer is not None:
+            fileSize, nFiles = self.ringBuffer
+            command += ['-b', 'filesize:{}'.format(fileSize), '-b', 'files:{}'.format(nFiles)]
+        return command + ['-w', outputFile]
+
     def start(self):
         # Start capturing traffic with Tshark.
         debug("[{0}] Starting tshark logging\n".format(self.node.name))
+        if self.processes:
+            return
 
         if self.singleLogFile:
-            ndnDumpOutputFile = "{}{}-interfaces.pcap".format(self.logFolder, self.node.name)
-            Application.start(self, "tshark -i any -w {}".format(ndnDumpOutputFile), logfile=self.logFolder + 'shark.log')
+            captures = [('any', "{}{}-interfaces.pcap".format(self.logFolder, self.node.name),
+                         'shark.log')]
         else:
-            for intf in self.node.intfNames():
-                ndnDumpOutputFile = "{}/{}.pcap".format(self.logFolder, intf)
-                self.node.cmd("tshark -i {} -w {} -q &".format(intf, ndnDumpOutputFile))
+            captures = [(intf, "{}/{}.pcap".format(self.logFolder, intf),
+                         'shark-{}.log'.format(intf)) for intf in self.node.intfNames()]
+
+        for intf, ndnDumpOutputFile, logfile in captures:
+            logfile = open('{}/{}'.format(self.logDir, logfile), 'w')
+            self.logfiles.append(logfile)
+            outputFile = '-' if self.summarize else ndnDumpOutputFile
+            self.processes[intf] = getPopen(self.node, self.captureCommand(intf, outputFile),
+                                            stdout=PIPE if self.summarize else logfile,
+                                            stderr=logfile)
+            if Minindn.cgroups is not None:
+                self.joinCgroup('tshark-{}'.format(intf), self.processes[intf].pid)
+        self.process = next(iter(self.processes.values()), None)
+
+        # Interface names and addresses, with which the captures are analyzed offline
+        interfaces = self.interfaces()
+        writeInterfaces(interfacesFileName(os.path.join(self.homeDir, self.logFolder),
+                                           self.node.name), interfaces)
+        if self.summarize:
+            self.summarizer = _CaptureSummarizer(
+                self.node.name, self.summaryFile, self.processes,
+                {ifindex: name for ifindex, (name, _) in interfaces.items()},
+                {mac for _, mac in interfaces.values() if mac})
+            self.summarizer.start()
+
+    def interfaces(self):
+        """Return {ifindex: (name, MAC address)} of the node's interfaces"""
+        return parseInterfaces(self.node.cmd('ip -o link show'))
+
+    def isReady(self):
+        return bool(self.processes) and all(process.poll() is None
+                                            for process in self.processes.values())
+
+    def stop(self):
+        # SIGTERM lets tshark flush the end of the capture
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.terminate()
+        for intf, process in self.processes.items():
+            try:
+                process.wait(STOP_TIMEOUT)
+            except TimeoutExpired:
+                warn('[{}] tshark on {} did not stop, killing it\n'.format(self.node.name, intf))
+                process.kill()
+        if self.summarizer is not None:
+            self.summarizer.join(STOP_TIMEOUT)
+            self.summarizer = None
+        for logfile in self.logfiles:
+            logfile.close()
+        self.processes = OrderedDict()
+        self.logfiles = []
+        self.process = None
+
+
+class _CaptureSummarizer(threading.Thread):
+    """Decode the libpcap streams of the tshark processes of a node into its packet summary"""
+    def __init__(self, nodeName, summaryFile, processes, faces, localMacs=None):
+        threading.Thread.__init__(self, name='tshark-summary-{}'.format(nodeName), daemon=True)
+        self.nodeName = nodeName
+        self.summaryFile = summaryFile
+        self.processes = processes
+        self.faces = faces
+        self.localMacs = localMacs
+
+    def run(self):
+        writer = PacketSummaryWriter(self.summaryFile)
+        selector = selectors.DefaultSelector()
+        for intf, process in self.processes.items():
+            selector.register(process.stdout, selectors.EVENT_READ, (intf, PcapStream()))
+        try:
+            while selector.get_map():
+                for key, _ in selector.select():
+                    intf, stream = key.data
+                    data = os.read(key.fd, 1 << 16)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+                        continue
+                    try:
+                        for timestamp, _, frame in stream.feed(data):
+                            for record in summarizeFrame(self.nodeName, intf, stream.linkType,
+                                                         timestamp, frame, self.faces,
+                                                         self.localMacs):
+                                writer.write(record)
+                    except PcapError as e:
+                        warn('[{}] Cannot summarize the capture of {}: {}\n'
+                             .format(self.nodeName, intf, e))
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+        finally:
+            writer.close()
+            debug('[{}] {} NDN packets summarized to {}\n'
+                  .format(self.nodeName, writer.count, self.summaryFile))
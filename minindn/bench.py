@@ -0,0 +1,307 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Benchmark of the Mini-NDN startup and teardown phases (minindn-bench).
+
+Each phase records its wall time, the number of processes forked on the machine
+(from /proc/stat, this includes the processes started inside the nodes), the number
+of subprocess.Popen objects created by Mini-NDN and the peak memory of the process.
+
+Offline phases (topology parsing, and route computation when Mininet is importable)
+need neither root nor a running emulation:
+
+    minindn-bench --generate hyperbolic:100 hyperbolic:1000 -o before.json
+
+Emulation phases (Minindn.__init__, start, NFD, routing, stop) need root and run with
+--emulate. Two result files are compared with:
+
+    minindn-bench --compare before.json after.json
+'''
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from threading import Lock
+
+from minindn import __version__
+from minindn.topology import Topology
+
+DEFAULT_GENERATED = ['hyperbolic:100', 'hyperbolic:1000']
+
+def _forkCount():
+    """Number of processes forked on the machine since boot"""
+    try:
+        with open('/proc/stat') as f:
+            for line in f:
+                if line.startswith('processes '):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    return 0
+
+class _PopenCounter(object):
+    """Count subprocess.Popen objects created while active"""
+    def __init__(self):
+        self.count = 0
+        self.lock = Lock()
+        self.originalInit = None
+
+    def __enter__(self):
+        self.originalInit = subprocess.Popen.__init__
+        counter = self
+        def countingInit(popen, *args, **kwargs):
+            with counter.lock:
+                counter.count += 1
+            counter.originalInit(popen, *args, **kwargs)
+        subprocess.Popen.__init__ = countingInit
+        return self
+
+    def __exit__(self, *exc):
+        subprocess.Popen.__init__ = self.originalInit
+
+class PhaseRecorder(object):
+    """Measure a sequence of named phases"""
+    def __init__(self):
+        self.phases = []
+
+    def run(self, name, function, *args, **kwargs):
+        """Run function as the phase name and return its result"""
+        forks = _forkCount()
+        with _PopenCounter() as popens:
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            seconds = time.perf_counter() - start
+        self.phases.append({
+            'name': name,
+            'seconds': round(seconds, 6),
+            'forks': _forkCount() - forks,
+            'popens': popens.count,
+            # Peak resident set size in KiB, of this process and of its waited-for children
+            'maxrssKb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'childrenMaxrssKb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        })
+        print('  {:<28} {:>10.3f}s {:>8} forks {:>6} popens'
+              .format(name, seconds, self.phases[-1]['forks'], popens.count))
+        return result
+
+class _OfflineHost(object):
+    def __init__(self, name, params):
+        self.name = name
+        self.params = params
+
+class _OfflineNet(object):
+    """The parts of a Mininet object read by the route computation, built from a Topo"""
+    def __init__(self, topo):
+        self.topo = topo
+        self.hosts = [_OfflineHost(name, topo.nodeInfo(name)) for name in topo.hosts()]
+
+def benchOffline(recorder, topoFile, routingTypes, faces):
+    """Topology parsing and, if Mininet can be imported, route computation"""
+    cacheDir = tempfile.mkdtemp(prefix='minindn-bench-')
+    try:
+        topology = recorder.run('topology-parse', Topology.load, topoFile)
+        recorder.run('topology-cache-write', Topology.load, topoFile, cacheDir=cacheDir)
+        recorder.run('topology-cache-read', Topology.load, topoFile, cacheDir=cacheDir)
+    finally:
+        shutil.rmtree(cacheDir, ignore_errors=True)
+
+    try:
+        from minindn.minindn import Minindn
+        from minindn.helpers.ndn_routing_helper import _CalculateRoutes
+    except ImportError as e:
+        print('  Skipping route computation: {}'.format(e))
+        return topology
+
+    topo, _ = recorder.run('build-topo', Minindn.buildTopo, topology)
+    net = _OfflineNet(topo)
+    for routingType in routingTypes:
+        # Hyperbolic routing needs a radius and angles for every node, e.g. not for grids
+        if routingType == 'hr' and not _CalculateRoutes(net, routingType).isHrConfigValid:
+            print('  Skipping hr route computation: the nodes have no hyperbolic coordinates')
+            continue
+        for nFaces in faces:
+            routes = _CalculateRoutes(net, routingType)
+            recorder.run('routes-{}-{}'.format(routingType, nFaces), routes.getRoutes, nFaces)
+    return topology
+
+def benchEmulation(recorder, topoFile, routing, faces, workDir):
+    """Startup and teardown of an emulation, needs root"""
+    from minindn.minindn import Minindn
+    from minindn.apps.app_manager import AppManager
+    from minindn.apps.nfd import Nfd
+    from minindn.apps.nlsr import Nlsr
+    from minindn.helpers.ndn_routing_helper import NdnRoutingHelper
+
+    Minindn.cleanUp()
+    # Minindn parses the command line, hide the benchmark arguments from it
+    argv, sys.argv = sys.argv, sys.argv[:1]
+    try:
+        ndn = recorder.run('minindn-init', Minindn, topoFile=topoFile, workDir=workDir)
+    finally:
+        sys.argv = argv
+
+    try:
+        recorder.run('net-start', ndn.start)
+        recorder.run('nfd-start', AppManager, ndn, ndn.net.hosts, Nfd)
+        if routing == 'nlsr':
+            recorder.run('nlsr-start', AppManager, ndn, ndn.net.hosts, Nlsr)
+        else:
+            helper = NdnRoutingHelper(ndn.net)
+            recorder.run('static-routes', helper.calculateNPossibleRoutes, faces)
+    finally:
+        recorder.run('stop', ndn.stop)
+        Minindn.cleanUp()
+
+def _gitCommit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))
+                                       ).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _fatTreeK(size):
+    """Smallest even port count k of a fat-tree with at least size nodes"""
+    k = 2
+    # (k/2)^2 core, k^2 aggregation and edge, k^3/4 host nodes
+    while (k // 2) ** 2 + k * k + k ** 3 // 4 < size:
+        k += 2
+    return k
+
+def _generate(spec, seed, workDir):
+    """Write the topology described by model:size and return its file name"""
+    from minindn import topology_generator
+
+    model, _, size = spec.partition(':')
+    size = int(size or 100)
+    generators = {
+        'waxman': lambda: topology_generator.waxman(size, beta=min(1.0, 12.0 / size), seed=seed),
+        'ba': lambda: topology_generator.barabasiAlbert(size, seed=seed),
+        'grid': lambda: topology_generator.grid(int(size ** 0.5), int(size ** 0.5), seed=seed),
+        'torus': lambda: topology_generator.grid(int(size ** 0.5), int(size ** 0.5), True,
+                                                 seed=seed),
+        'fattree': lambda: topology_generator.fatTree(_fatTreeK(size), seed=seed),
+        'hyperbolic': lambda: topology_generator.hyperbolic(size, seed=seed)
+    }
+    if model not in generators:
+        raise ValueError('Unknown model {}, expected one of {}'
+                         .format(model, ', '.join(sorted(generators))))
+    fileName = os.path.join(workDir, '{}-{}-{}.conf'.format(model, size, seed))
+    generators[model]().writeConf(fileName)
+    return fileName
+
+def compare(baseFile, newFile):
+    """Print the phase times of two result files side by side"""
+    with open(baseFile) as f:
+        base = json.load(f)
+    with open(newFile) as f:
+        new = json.load(f)
+
+    baseTimes = {(run['topology'], phase['name']): phase
+                 for run in base['runs'] for phase in run['phases']}
+    print('{:<32} {:<28} {:>10} {:>10} {:>8} {:>8}'
+          .format('topology', 'phase', 'base (s)', 'new (s)', 'speedup', 'forks'))
+    for run in new['runs']:
+        for phase in run['phases']:
+            old = baseTimes.get((run['topology'], phase['name']))
+            if old is None:
+                print('{:<32} {:<28} {:>10} {:>10.3f}'
+                      .format(run['topology'], phase['name'], '-', phase['seconds']))
+                continue
+            speedup = old['seconds'] / phase['seconds'] if phase['seconds'] else float('inf')
+            print('{:<32} {:<28} {:>10.3f} {:>10.3f} {:>7.2f}x {:>8}'
+                  .format(run['topology'], phase['name'], old['seconds'], phase['seconds'],
+                          speedup, '{}/{}'.format(old['forks'], phase['forks'])))
+
+def main():
+    parser = argparse.ArgumentParser(prog='minindn-bench',
+                                     description='Benchmark Mini-NDN startup and teardown')
+    parser.add_argument('--topology', nargs='*', default=[],
+                        help='Topology files to benchmark')
+    parser.add_argument('--generate', nargs='*', default=None,
+                        help='Synthetic topologies as model:size, e.g. waxman:1000, fattree uses '
+                             'the smallest fat-tree with at least size nodes '
+                             '(default: {})'.format(' '.join(DEFAULT_GENERATED)))
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the generated topologies')
+    parser.add_argument('--routing-type', nargs='*', default=['link-state', 'hr'],
+                        dest='routingTypes', help='Route computations to benchmark offline')
+    parser.add_argument('--faces', type=int, nargs='*', default=[1],
+                        help='Number of faces per destination of the route computations')
+    parser.add_argument('--emulate', action='store_true',
+                        help='Also benchmark an emulation of each topology (needs root)')
+    parser.add_argument('--routing', choices=['static', 'nlsr'], default='static',
+                        help='Routing used in emulations')
+    parser.add_argument('--work-dir', dest='workDir', default='/tmp/minindn-bench',
+                        help='Working directory of the emulations and generated topologies')
+    parser.add_argument('-o', '--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'),
+                        help='Compare two result files and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    os.makedirs(args.workDir, exist_ok=True)
+    generated = DEFAULT_GENERATED if args.generate is None and not args.topology \
+                else (args.generate or [])
+    topologies = [(topoFile, topoFile) for topoFile in args.topology]
+    topologies += [(spec, _generate(spec, args.seed, args.workDir)) for spec in generated]
+
+    results = {
+        'version': __version__,
+        'commit': _gitCommit(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'runs': []
+    }
+    for name, topoFile in topologies:
+        print('{}:'.format(name))
+        recorder = PhaseRecorder()
+        topology = benchOffline(recorder, topoFile, args.routingTypes, args.faces)
+        if args.emulate:
+            benchEmulation(recorder, topoFile, args.routing, args.faces[0],
+                           os.path.join(args.workDir, 'emulation'))
+        results['runs'].append({
+            'topology': name,
+            'nodes': sum(len(nodes) for nodes in topology.nodes.values()),
+            'links': len(topology.links),
+            'phases': recorder.phases
+        })
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print('Results written to {}'.format(args.output))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Per application resource accounting with cgroup v2.
+
+Every application started with Application.start is moved to its own leaf cgroup,
+<base>/<node>/<application>, right after it is started. The node cgroups can limit
+the CPU time of all the applications of a node (cpu.max). When the experiment
+stops, the CPU time, peak memory and I/O of every application are read from the
+leaves and written to <work-dir>/resource-usage.csv.
+
+Enabled with --cgroups, or --node-cpu-quota CPUS to also limit each node.
+'''
+
+import csv
+import errno
+import os
+import threading
+import time
+
+from mininet.log import debug, info, warn
+
+CGROUP2_TYPE = 'cgroup2'
+CONTROLLERS = ['cpu', 'memory', 'io', 'pids']
+# Period of the CPU quota of the nodes, in microseconds
+CPU_PERIOD = 100000
+USAGE_FIELDS = ['node', 'app', 'pid', 'cpuSeconds', 'userSeconds', 'systemSeconds',
+                'memoryPeakBytes', 'readBytes', 'writeBytes', 'throttledSeconds']
+
+class CgroupError(OSError):
+    pass
+
+def findCgroup2Mount():
+    """Return the mount point of the cgroup v2 hierarchy, or None"""
+    try:
+        with open('/proc/mounts') as mounts:
+            for line in mounts:
+                fields = line.split()
+                if len(fields) > 2 and fields[2] == CGROUP2_TYPE:
+                    return fields[1]
+    except IOError:
+        pass
+    return None
+
+def _readKeyValues(fileName):
+    """Parse a cgroup file of 'key value' lines"""
+    values = {}
+    try:
+        with open(fileName) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) == 2:
+                    values[fields[0]] = fields[1]
+    except IOError:
+        pass
+    return values
+
+def _readInt(fileName):
+    try:
+        with open(fileName) as f:
+            return int(f.read().strip())
+    except (IOError, ValueError):
+        return None
+
+def _write(fileName, value):
+    with open(fileName, 'w') as f:
+        f.write(value)
+
+class CgroupManager(object):
+    def __init__(self, nodeCpuQuota=None, mountPoint=None, name=None):
+        """
+        Create the cgroup of the experiment
+
+        :param nodeCpuQuota: (optional) Number of CPUs the applications of each node may use
+        :param mountPoint: (optional) cgroup v2 mount point, found in /proc/mounts by default
+        :param name: (optional) Name of the cgroup of the experiment
+        """
+        self.mountPoint = mountPoint or findCgroup2Mount()
+        if self.mountPoint is None:
+            raise CgroupError(errno.ENOENT, 'No cgroup v2 hierarchy is mounted')
+        self.base = os.path.join(self.mountPoint, name or 'minindn-{}'.format(os.getpid()))
+        self.nodeCpuQuota = nodeCpuQuota
+        self.lock = threading.Lock()
+        # Leaf path to (node name, application name, pid)
+        self.leaves = {}
+        self.usage = []
+
+        os.makedirs(self.base, exist_ok=True)
+        self.controllers = self._enableControllers(self.mountPoint, self.base)
+        if nodeCpuQuota is not None and 'cpu' not in self.controllers:
+            warn('cpu controller is not available, node CPU quotas are not enforced\n')
+        debug('Application cgroups in {} with controllers {}\n'
+              .format(self.base, ' '.join(self.controllers)))
+
+    @staticmethod
+    def _enableControllers(mountPoint, group):
+        """Enable the controllers in the subtree of every ancestor of group and in group"""
+        available = set(CONTROLLERS)
+        ancestors = []
+        path = os.path.dirname(group)
+        while True:
+            ancestors.insert(0, path)
+            if os.path.samefile(path, mountPoint) or path == os.path.dirname(path):
+                break
+            path = os.path.dirname(path)
+        for path in ancestors + [group]:
+            try:
+                with open(os.path.join(path, 'cgroup.controllers')) as f:
+                    available &= set(f.read().split())
+            except IOError:
+                return []
+            for controller in sorted(available):
+                try:
+                    _write(os.path.join(path, 'cgroup.subtree_control'), '+' + controller)
+                except (IOError, OSError):
+                    # e.g. the parent holds processes, or the controller is not delegated
+                    available.discard(controller)
+        return sorted(available)
+
+    def _nodeGroup(self, nodeName):
+        path = os.path.join(self.base, nodeName)
+        if not os.path.isdir(path):
+            os.makedirs(path, exist_ok=True)
+            if self.nodeCpuQuota is not None and 'cpu' in self.controllers:
+                _write(os.path.join(path, 'cpu.max'), '{} {}'.format(
+                    max(1000, int(self.nodeCpuQuota * CPU_PERIOD)), CPU_PERIOD))
+            for controller in self.controllers:
+                try:
+                    _write(os.path.join(path, 'cgroup.subtree_control'), '+' + controller)
+                except (IOError, OSError):
+                    pass
+        return path
+
+    def addProcess(self, nodeName, appName, pid):
+        """Move the process pid of application appName of a node to its own leaf cgroup"""
+        with self.lock:
+            nodeGroup = self._nodeGroup(nodeName)
+            leaf = os.path.join(nodeGroup, appName)
+            index = 1
+            while leaf in self.leaves:
+                index += 1
+                leaf = os.path.join(nodeGroup, '{}-{}'.format(appName, index))
+            os.makedirs(leaf, exist_ok=True)
+            self.leaves[leaf] = (nodeName, appName, pid)
+        _write(os.path.join(leaf, 'cgroup.procs'), str(pid))
+        return leaf
+
+    @staticmethod
+    def readUsage(leaf):
+        """Return the CPU, memory and I/O counters of a cgroup"""
+        cpu = _readKeyValues(os.path.join(leaf, 'cpu.stat'))
+        readBytes = writeBytes = 0
+        try:
+            with open(os.path.join(leaf, 'io.stat')) as f:
+                for line in f:
+                    for field in line.split()[1:]:
+                        key, _, value = field.partition('=')
+                        if key == 'rbytes':
+                            readBytes += int(value)
+                        elif key == 'wbytes':
+                            writeBytes += int(value)
+        except IOError:
+            pass
+        return {
+            'cpuSeconds': int(cpu.get('usage_usec', 0)) / 1e6,
+            'userSeconds': int(cpu.get('user_usec', 0)) / 1e6,
+            'systemSeconds': int(cpu.get('system_usec', 0)) / 1e6,
+            'throttledSeconds': int(cpu.get('throttled_usec', 0)) / 1e6,
+            # memory.peak needs Linux 5.19, memory.current is the best effort before
+            'memoryPeakBytes': _readInt(os.path.join(leaf, 'memory.peak')) or
+                               _readInt(os.path.join(leaf, 'memory.current')) or 0,
+            'readBytes': readBytes,
+            'writeBytes': writeBytes
+        }
+
+    def collect(self):
+        """Read the counters of every application, returns a list of USAGE_FIELDS dicts"""
+        with self.lock:
+            leaves = sorted(self.leaves.items(), key=lambda item: item[1][:2])
+        self.usage = []
+        for leaf, (nodeName, appName, pid) in leaves:
+            row = {'node': nodeName, 'app': os.path.basename(leaf), 'pid': pid}
+            row.update(self.readUsage(leaf))
+            self.usage.append(row)
+        return self.usage
+
+    def writeUsage(self, fileName):
+        with open(fileName, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=USAGE_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.usage)
+
+    def summary(self):
+        """Return a text report of the usage per application type and of the busiest nodes"""
+        if not self.usage:
+            return 'No application resource usage recorded\n'
+        byApp = {}
+        byNode = {}
+        for row in self.usage:
+            app = byApp.setdefault(row['app'].split('-')[0], [0, 0.0, 0, 0])
+            app[0] += 1
+            app[1] += row['cpuSeconds']
+            app[2] = max(app[2], row['memoryPeakBytes'])
+            app[3] += row['readBytes'] + row['writeBytes']
+            byNode[row['node']] = byNode.get(row['node'], 0.0) + row['cpuSeconds']
+
+        lines = ['{:<16} {:>6} {:>12} {:>16} {:>14}'
+                 .format('application', 'count', 'cpu (s)', 'max peak (MiB)', 'I/O (MiB)')]
+        for name, (count, cpu, peak, io) in sorted(byApp.items()):
+            lines.append('{:<16} {:>6} {:>12.2f} {:>16.1f} {:>14.1f}'
+                         .format(name, count, cpu, peak / 2.0 ** 20, io / 2.0 ** 20))
+        busiest = sorted(byNode.items(), key=lambda item: item[1], reverse=True)[:5]
+        lines.append('Busiest nodes: ' + ', '.join('{} ({:.2f}s)'.format(node, cpu)
+                                                   for node, cpu in busiest))
+        return '\n'.join(lines) + '\n'
+
+    def cleanup(self, timeout=2):
+        """Remove the cgroups once their processes have exited"""
+        with self.lock:
+            leaves = list(self.leaves)
+            self.leaves = {}
+        groups = leaves + sorted({os.path.dirname(leaf) for leaf in leaves}) + [self.base]
+        deadline = time.time() + timeout
+        for group in groups:
+            while True:
+                try:
+                    os.rmdir(group)
+                    break
+                except OSError as e:
+                    if e.errno == errno.ENOENT:
+                        break
+                    if e.errno != errno.EBUSY or time.time() > deadline:
+                        warn('Cannot remove cgroup {}: {}\n'.format(group, e))
+                        break
+                    time.sleep(0.05)
+
+    def finish(self, workDir):
+        """Collect the usage, write it to workDir, log the summary and remove the cgroups"""
+        self.collect()
+        fileName = os.path.join(workDir, 'resource-usage.csv')
+        self.writeUsage(fileName)
+        info('Application resource usage written to {}\n'.format(fileName))
+        info(self.summary())
+        self.cleanup()
@@ -23,50 +23,96 @@
 
 import time
 import sys
+from collections import OrderedDict
 from itertools import cycle
 
-from mininet.log import info
+from joblib import Parallel, delayed
 
-from minindn.helpers.nfdc import Nfdc
-from minindn.helpers.ndnping import NDNPing
-from minindn.util import getSafeName
+from mininet.log import info, debug, warn
+
+from minindn.apps.app_manager import AppManager, DEFAULT_MAX_WORKERS
+from minindn.apps.ndnping import NDNPingClient, NDNPingServer
+from minindn.helpers.nfdc import NfdcSession
+from minindn.helpers.nfd_status import NfdStatus
 
 class Experiment(object):
+    # NDNPingClient applications started by startPings
+    pingClients = []
+
+    @staticmethod
+    def getExpectedPrefixes(host, hosts):
+        """
+        Return {node name: [prefixes]} that must be in the FIB of host once NLSR has converged.
+        A node has its own router name in the FIB, but not its name prefix.
+        """
+        expected = {}
+        for node in hosts:
+            expected[node.name] = ['/ndn/{}-site/%C1.Router/cs/{}'.format(node.name, node.name)]
+            if host.name != node.name:
+                expected[node.name].append('/ndn/{}-site/{}'.format(node.name, node.name))
+        return expected
+
+    @staticmethod
+    def waitForConvergence(hosts, timeout, pollInterval=1):
+        """
+        Poll the FIB of all hosts concurrently until every host has a route to every
+        other host or the timeout expires. Each FIB is read once per poll.
+
+        :param hosts: list of nodes
+        :param timeout: maximum number of seconds to wait
+        :param pollInterval: seconds between two polls of the hosts which did not converge yet
+        :return: (convergence time in seconds of each host name, or None if the host did not
+          converge; {host name: {node name: [missing prefixes]}} for the hosts which did not converge)
+        """
+        expected = {host.name: Experiment.getExpectedPrefixes(host, hosts) for host in hosts}
+        convergenceTimes = {host.name: None for host in hosts}
+        missing = {}
+        pending = list(hosts)
+        status = NfdStatus(hosts)
+        start = time.time()
+
+        while True:
+            snapshots = status.collect(pending, maxAge=0)
+            elapsed = time.time() - start
+
+            stillPending = []
+            for host in pending:
+                fib = snapshots[host.name].fibPrefixes()
+                missing[host.name] = {}
+                for nodeName, prefixes in expected[host.name].items():
+                    absent = [prefix for prefix in prefixes if prefix not in fib]
+                    if absent:
+                        missing[host.name][nodeName] = absent
+                if missing[host.name]:
+                    stillPending.append(host)
+                else:
+                    del missing[host.name]
+                    convergenceTimes[host.name] = elapsed
+                    debug('{} converged after {:.1f} seconds\n'.format(host.name, elapsed))
+            pending = stillPending
+
+            if not pending or time.time() - start + pollInterval > timeout:
+                return convergenceTimes, missing
+            time.sleep(pollInterval)
+
     @staticmethod
     def checkConvergence(ndn, hosts, convergenceTime, quit=False, returnConvergenceInfo=False):
-        # Wait for convergence time period
-        info('Waiting {} seconds for convergence...\n'.format(convergenceTime))
-        time.sleep(convergenceTime)
+        # Wait at most convergence time period
+        info('Waiting up to {} seconds for convergence...\n'.format(convergenceTime))
+        convergenceTimes, missing = Experiment.waitForConvergence(hosts, convergenceTime)
         info('...done\n')
 
-        didNlsrConverge = True
+        didNlsrConverge = not missing
         convergeInfo = {}
 
         for host in hosts:
-            convergeInfo[host.name] = {}
-            statusRouter = host.cmd('nfdc fib list | grep site/%C1.Router/cs/')
-            statusPrefix = host.cmd('nfdc fib list | grep ndn | grep site | grep -v Router')
-            for node in hosts:
-                # Node has its own router name in the fib list, but not name prefix
-                routerPrefix = ('/ndn/{}-site/%C1.Router/cs/{}'.format(node.name, node.name))
-                namePrefix = ('/ndn/{}-site/{}'.format(node.name, node.name))
-
-                statusRouterCheck = routerPrefix not in statusRouter
-                statusPrefixCheck = host.name != node.name and namePrefix not in statusPrefix
-
-                if statusRouterCheck or statusPrefixCheck:
-                    didNlsrConverge = False
-                    host.cmd('echo {} > convergence-result &'.format(False))
-
-                    if returnConvergenceInfo:
-                        convergeInfo[host.name][node.name] = []
-                        if statusRouterCheck:
-                            convergeInfo[host.name][node.name].append(routerPrefix)
-
-                        if statusPrefixCheck:
-                            convergeInfo[host.name][node.name].append(namePrefix)
-                else:
-                    host.cmd('echo {} > convergence-result &'.format(True))
+            convergeInfo[host.name] = missing.get(host.name, {})
+            host.cmd('echo {} > convergence-result &'.format(host.name not in missing))
+            if convergenceTimes[host.name] is not None:
+                info('{} converged in {:.1f} seconds\n'.format(host.name, convergenceTimes[host.name]))
+            else:
+                info('{} did not converge, missing routes to {}\n'
+                     .format(host.name, ', '.join(sorted(missing[host.name]))))
 
         if didNlsrConverge:
             if quit:
@@ -89,20 +135,80 @@ class Experiment(object):
             return didNlsrConverge
 
     @staticmethod
-    def setupPing(hosts, strategy):
-        for host in hosts:
-            host.cmd('mkdir -p ping-data')
-            Nfdc.setStrategy(host, '/ndn/', strategy)
-            prefix = getSafeName('/ndn/{}-site/{}'.format(host.name, host.name))
-            NDNPing.startPingServer(host, prefix)
+    def setupPing(hosts, strategy, ndn=None, maxWorkers=DEFAULT_MAX_WORKERS):
+        """
+        Set the strategy of /ndn/ and start an NDNPingServer on every host concurrently.
+        Returns the AppManager of the servers.
+
+        :param ndn: (optional) Minindn object, stops the servers on ndn.stop()
+        """
+        def _setStrategy(host):
+            with NfdcSession(host) as session:
+                result = session.setStrategy('/ndn/', strategy)
+            if not result.success:
+                warn('[{}] Strategy set failed: {} {}\n'
+                     .format(host.name, result.command, ' '.join(result.output)))
+
+        if hosts:
+            Parallel(n_jobs=max(1, min(maxWorkers, len(hosts))), require='sharedmem',
+                     prefer='threads')(delayed(_setStrategy)(host) for host in hosts)
+        return AppManager(ndn, hosts, NDNPingServer, parallel=True, maxWorkers=maxWorkers)
+
+    @staticmethod
+    def startPings(pairs, nPings, ndn=None, maxWorkers=DEFAULT_MAX_WORKERS, **clientParams):
+        """
+        Start an NDNPingClient from each source to the default prefix of its destination.
+        Sources are processed concurrently, the pings of a source are written to
+        ping-data/<destination name>.txt on the source. Returns the started clients,
+        also kept in Experiment.pingClients until stopPings.
+
+        :param pairs: list of (source node, destination node)
+        :param nPings: number of pings of each client
+        :param ndn: (optional) Minindn object, stops the clients on ndn.stop()
+        :param clientParams: (optional) other NDNPingClient parameters, e.g. interval
+        """
+        bySource = OrderedDict()
+        for source, destination in pairs:
+            bySource.setdefault(source.name, (source, []))[1].append(destination)
+
+        def _start(source, destinations):
+            clients = []
+            for destination in destinations:
+                client = NDNPingClient(source, NDNPingServer.defaultPrefix(destination),
+                                       destination.name, nPings, **clientParams)
+                client.start()
+                clients.append(client)
+            return clients
+
+        if ndn is not None and Experiment.stopPings not in ndn.cleanups:
+            ndn.cleanups.append(Experiment.stopPings)
+        if not bySource:
+            return []
+        started = Parallel(n_jobs=max(1, min(maxWorkers, len(bySource))), require='sharedmem',
+                           prefer='threads')(delayed(_start)(source, destinations)
+                                             for source, destinations in bySource.values())
+        clients = [client for sourceClients in started for client in sourceClients]
+        Experiment.pingClients.extend(clients)
+        debug('Started {} ping clients on {} nodes\n'.format(len(clients), len(bySource)))
+        return clients
+
+    @staticmethod
+    def stopPings():
+        """Stop the clients started by startPings which are still running"""
+        clients, Experiment.pingClients = Experiment.pingClients, []
+        for client in clients:
+            client.stop()
 
     @staticmethod
-    def startPctPings(net, nPings, pctTraffic=1.0):
+    def startPctPings(net, nPings, pctTraffic=1.0, ndn=None, maxWorkers=DEFAULT_MAX_WORKERS):
+        """
+        Make each host ping the pctTraffic fraction of the hosts which follow it.
+        Returns {host: [pinged nodes]}, see startPings for the other parameters.
+        """
         nNodesToPing = int(round(len(net.hosts) * pctTraffic))
         info('Each node will ping {} node(s)\n'.format(nNodesToPing))
-        # Temporarily store all the nodes being pinged by a particular node
-        nodesPingedList = []
         pingedDict = {}
+        pairs = []
 
         for host in net.hosts:
             # Create a circular list
@@ -111,22 +217,13 @@ class Experiment(object):
             # Move iterator to current node
             next(x for x in pool if host.name == x.name)
 
-            # Track number of nodes to ping scheduled for this node
-            nNodesScheduled = 0
-
-            while nNodesScheduled < nNodesToPing:
+            pingedDict[host] = []
+            for _ in range(nNodesToPing):
                 other = next(pool)
-
-                # Do not ping self
+                # Do not ping self, in 100% case a node is counted but not pinged
                 if host.name != other.name:
-                    destPrefix = getSafeName('/ndn/{}-site/{}'.format(other.name, other.name))
-                    NDNPing.ping(host, destPrefix, other.name, nPings)
-                    nodesPingedList.append(other)
-
-                # Always increment because in 100% case a node should not ping itself
-                nNodesScheduled = nNodesScheduled + 1
-
-            pingedDict[host] = nodesPingedList
-            nodesPingedList = []
+                    pairs.append((host, other))
+                    pingedDict[host].append(other)
 
+        Experiment.startPings(pairs, nPings, ndn, maxWorkers)
         return pingedDict
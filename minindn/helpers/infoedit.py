@@ -0,0 +1,267 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+This module reads and writes INFO files (the boost property tree format used by
+nfd.conf and nlsr.conf) in-process, so that configuration files can be edited
+without running one infoedit command per setting.
+'''
+
+import os
+from threading import Lock
+
+_ESCAPES = {'0': '\0', 'a': '\a', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r',
+            't': '\t', 'v': '\v', '"': '"', "'": "'", '\\': '\\'}
+_REVERSE_ESCAPES = {'\0': '\\0', '\a': '\\a', '\b': '\\b', '\f': '\\f', '\n': '\\n',
+                    '\r': '\\r', '\t': '\\t', '\v': '\\v', '"': '\\"', '\\': '\\\\'}
+_SPECIAL_CHARACTERS = ' \t\n{};"'
+
+# Parsed template files, keyed by path: (modification time, InfoTree)
+_templateCache = {}
+_templateCacheLock = Lock()
+
+class InfoParseError(ValueError):
+    def __init__(self, message, source, lineNumber):
+        ValueError.__init__(self, '{}:{}: {}'.format(source, lineNumber, message))
+        self.source = source
+        self.lineNumber = lineNumber
+
+def _tokenizeLine(line, source, lineNumber):
+    """Split one line of an INFO file into string and brace tokens"""
+    tokens = []
+    i = 0
+    length = len(line)
+    while i < length:
+        char = line[i]
+        if char in ' \t\r':
+            i += 1
+        elif char == ';':
+            break
+        elif char in '{}':
+            tokens.append((char, None))
+            i += 1
+        elif char == '"':
+            i += 1
+            text = []
+            while True:
+                if i >= length:
+                    raise InfoParseError('unterminated string', source, lineNumber)
+                char = line[i]
+                if char == '"':
+                    i += 1
+                    break
+                if char == '\\':
+                    if i + 1 >= length or line[i + 1] not in _ESCAPES:
+                        raise InfoParseError('invalid escape sequence', source, lineNumber)
+                    text.append(_ESCAPES[line[i + 1]])
+                    i += 2
+                else:
+                    text.append(char)
+                    i += 1
+            tokens.append(('"', ''.join(text)))
+        elif char == '\\':
+            # Continuation of a quoted value on the next line
+            tokens.append(('\\', None))
+            i += 1
+        else:
+            start = i
+            while i < length and line[i] not in ' \t\r;{}"':
+                i += 1
+            tokens.append(('w', line[start:i]))
+    return tokens
+
+class InfoTree(object):
+    """
+    In-memory INFO document. Each node has a value and an ordered list of
+    (key, InfoTree) children; keys may repeat (e.g. neighbors.neighbor in nlsr.conf).
+
+    Paths are dot separated, and the editing methods mirror infoedit:
+    set (-s), put (-p), add (-a) and delete (-d).
+    """
+    def __init__(self, value=''):
+        self.value = value
+        self.children = []
+
+    @staticmethod
+    def parse(text, source='<string>'):
+        """Parse the given INFO text and return the root InfoTree"""
+        root = InfoTree()
+        stack = [root]
+        last = None
+        expectingValue = False
+        continuation = False
+        for lineNumber, line in enumerate(text.split('\n'), 1):
+            stripped = line.strip()
+            if stripped.startswith('#include'):
+                fileName = stripped[len('#include'):].strip().strip('"')
+                if source != '<string>' and not os.path.isabs(fileName):
+                    fileName = os.path.join(os.path.dirname(source), fileName)
+                with open(fileName) as f:
+                    included = InfoTree.parse(f.read(), fileName)
+                stack[-1].children.extend(included.children)
+                last = None
+                continue
+
+            for kind, token in _tokenizeLine(line, source, lineNumber):
+                if continuation:
+                    if kind != '"':
+                        raise InfoParseError('expected quoted string after \\', source, lineNumber)
+                    last.value += token
+                    continuation = False
+                elif kind == '\\':
+                    if last is None or expectingValue:
+                        raise InfoParseError('unexpected \\', source, lineNumber)
+                    continuation = True
+                elif kind == '{':
+                    if last is None:
+                        raise InfoParseError('unexpected {', source, lineNumber)
+                    stack.append(last)
+                    last = None
+                    expectingValue = False
+                elif kind == '}':
+                    if len(stack) == 1:
+                        raise InfoParseError('unmatched }', source, lineNumber)
+                    last = stack.pop()
+                    expectingValue = False
+                elif expectingValue:
+                    last.value = token
+                    expectingValue = False
+                else:
+                    last = InfoTree()
+                    stack[-1].children.append([token, last])
+                    expectingValue = True
+            # A value can only follow its key on the same line
+            expectingValue = False
+
+        if continuation:
+            raise InfoParseError('unexpected end of file after \\', source, lineNumber)
+        if len(stack) != 1:
+            raise InfoParseError('missing }', source, lineNumber)
+        return root
+
+    @staticmethod
+    def load(fileName):
+        """
+        Return a copy of the parsed INFO file. Parsed files are cached for the
+        lifetime of the process and re-read only if they are modified.
+        """
+        modificationTime = os.path.getmtime(fileName)
+        with _templateCacheLock:
+            cached = _templateCache.get(fileName)
+            if cached is None or cached[0] != modificationTime:
+                with open(fileName) as f:
+                    cached = (modificationTime, InfoTree.parse(f.read(), fileName))
+                _templateCache[fileName] = cached
+        return cached[1].copy()
+
+    def copy(self):
+        tree = InfoTree(self.value)
+        tree.children = [[key, child.copy()] for key, child in self.children]
+        return tree
+
+    def find(self, path):
+        """Return the first subtree at the given path, or None"""
+        tree = self
+        for key in path.split('.'):
+            tree = next((child for k, child in tree.children if k == key), None)
+            if tree is None:
+                return None
+        return tree
+
+    def findAll(self, path):
+        """Return every subtree whose key is the last component of the path"""
+        parentPath, _, key = path.rpartition('.')
+        parent = self.find(parentPath) if parentPath else self
+        if parent is None:
+            return []
+        return [child for k, child in parent.children if k == key]
+
+    def get(self, path, default=None):
+        tree = self.find(path)
+        return default if tree is None else tree.value
+
+    def _getOrCreate(self, path):
+        tree = self
+        for key in path.split('.'):
+            child = next((child for k, child in tree.children if k == key), None)
+            if child is None:
+                child = InfoTree()
+                tree.children.append([key, child])
+            tree = child
+        return tree
+
+    def set(self, path, value):
+        """Set the value at path, creating the path if needed (infoedit -s)"""
+        self._getOrCreate(path).value = str(value)
+
+    def put(self, path, value):
+        """Append a new key with the given value, even if the key already exists (infoedit -p)"""
+        parentPath, _, key = path.rpartition('.')
+        parent = self._getOrCreate(parentPath) if parentPath else self
+        parent.children.append([key, InfoTree(str(value))])
+
+    def add(self, path, subtree):
+        """
+        Append a subtree at path, even if the key already exists (infoedit -a)
+
+        :param subtree: InfoTree or INFO formatted text
+        """
+        if not isinstance(subtree, InfoTree):
+            subtree = InfoTree.parse(subtree)
+        parentPath, _, key = path.rpartition('.')
+        parent = self._getOrCreate(parentPath) if parentPath else self
+        parent.children.append([key, subtree])
+
+    def delete(self, path):
+        """Delete every key matching the last component of path (infoedit -d)"""
+        parentPath, _, key = path.rpartition('.')
+        parent = self.find(parentPath) if parentPath else self
+        if parent is not None:
+            parent.children = [[k, child] for k, child in parent.children if k != key]
+
+    @staticmethod
+    def _quote(text):
+        if text != '' and not any(char in _SPECIAL_CHARACTERS for char in text):
+            return text
+        return '"{}"'.format(''.join(_REVERSE_ESCAPES.get(char, char) for char in text))
+
+    def _dumpChildren(self, lines, indent):
+        for key, child in self.children:
+            line = '{}{}'.format(indent, self._quote(key))
+            if child.value != '':
+                line = '{} {}'.format(line, self._quote(child.value))
+            lines.append(line)
+            if child.children:
+                lines.append('{}{{'.format(indent))
+                child._dumpChildren(lines, indent + '    ')
+                lines.append('{}}}'.format(indent))
+
+    def dumps(self):
+        lines = []
+        self._dumpChildren(lines, '')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, fileName):
+        """Write the tree to fileName in a single write"""
+        with open(fileName, 'w') as f:
+            f.write(self.dumps())
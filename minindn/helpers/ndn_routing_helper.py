@@ -34,6 +34,7 @@ import json
 import operator
 from collections import defaultdict
 from joblib import Parallel, delayed
+import numpy as np
 
 from mininet.log import info, debug, error, warn
 from minindn.helpers.nfdc import Nfdc as nfdc
@@ -69,6 +70,34 @@ def dijkstra(graph, start, end, ignoredNode=None):
             debug("Distance from {} to {} is {}".format(start, end, cost))
             return cost, None
 
+def shortestPaths(graph, start, ignoredNode=None):
+    """
+    Compute the shortest path cost and first hop from a given source to every reachable node
+    with a single run of Dijkstra algorithm. Only the first hop is carried through the heap;
+    equal cost paths are broken the same way as in dijkstra(), where a direct link wins
+    and the lowest first hop is selected otherwise.
+
+    :param Graph graph: given network topology/graph
+    :param Start start: source node in a given network graph/topology
+    :param Node ignoredNode: node to ignore computing shortest paths from
+    :return: dict of destination to (cost, first hop), the first hop of start is None
+    """
+    distances = {}
+    # (cost, node, tie breaker, first hop); the tie breaker is empty for the source's neighbors
+    queue = [(0, start, '', None)]
+    while queue:
+        (cost, v, _, firstHop) = heapq.heappop(queue)
+        if v in distances:
+            continue
+        distances[v] = (cost, firstHop)
+        for (_next, c) in graph[v].items():
+            if _next != ignoredNode and _next not in distances:
+                if firstHop is None:
+                    heapq.heappush(queue, (cost + c, _next, '', _next))
+                else:
+                    heapq.heappush(queue, (cost + c, _next, firstHop, firstHop))
+    return distances
+
 def calculateAngularDistance(angleVectorI, angleVectorJ):
     """
     For hyperbolic/geohyperbolic routing algorithm, this function computes angular distance between
@@ -134,6 +163,37 @@ def getHyperbolicDistance(sourceNode, destNode):
     debug("Distance from {} to {} is {}".format(sourceNode, destNode, hyperbolicDistance))
     return hyperbolicDistance
 
+def getHyperbolicDistanceMatrix(radii, angleVectors):
+    """
+    Return the matrix of hyperbolic or geohyperbolic distances between every pair of nodes,
+    computed in one batched operation. Angular coordinates are converted to cartesian
+    coordinates once per node, in the same way as calculateAngularDistance.
+
+    :param list radii: radius of each node
+    :param list angleVectors: list of angular coordinates of each node, all of the same size
+    :return: N x N numpy array, element [i][j] is the distance from node i to node j
+    """
+    radii = np.asarray(radii, dtype=float)
+    angles = np.asarray(angleVectors, dtype=float)
+    sines = np.sin(angles)
+    cosines = np.cos(angles)
+    # Products of the sines of the first k + 1 angles
+    sineProducts = np.cumprod(sines, axis=1)
+
+    coordinates = [cosines[:, 0], sineProducts[:, -1]]
+    if angles.shape[1] > 1:
+        coordinates.append(cosines[:, -1] * sineProducts[:, -2])
+    coordinates = np.stack(coordinates, axis=1)
+
+    innerProduct = np.clip(coordinates @ coordinates.T, -1.0, 1.0)
+    dtheta = np.arccos(innerProduct)
+
+    zeta = 1.0
+    coshR = np.cosh(zeta * radii)
+    sinhR = np.sinh(zeta * radii)
+    argument = np.outer(coshR, coshR) - np.outer(sinhR, sinhR) * np.cos(dtheta)
+    return (1./zeta) * np.arccosh(np.maximum(argument, 1.0))
+
 class _CalculateRoutes(object):
     """
     Creates a route calculation object, which is used to compute routes from a node to
@@ -145,6 +205,12 @@ class _CalculateRoutes(object):
     """
     def __init__(self, netObj, routingType):
         self.adjacenctMatrix = defaultdict(dict)
+        # Every link of the topology, including the ones currently down
+        self.linkCosts = defaultdict(dict)
+        self.downLinks = set()
+        self.downNodes = set()
+        # Source to [(root, distances)] of the shortest path searches of the last computation
+        self.trees = {}
         self.nodeDict = defaultdict(dict)
         self.routingType = routingType
         self.isHrConfigValid = True
@@ -160,28 +226,118 @@ class _CalculateRoutes(object):
                 self.isHrConfigValid = False
                 angles = [0.0]
             self.nodeDict[host.name][radius] = angles
+        if len(set(len(angles) for node in self.nodeDict.values()
+                   for angles in node.values())) > 1:
+            error('Angle vector sizes do not match\n')
+            self.isHrConfigValid = False
         for link in netObj.topo.links(withInfo=True):
             linkDelay = int(link[2]['delay'].replace("ms", ""))
             self.adjacenctMatrix[link[0]][link[1]] = linkDelay
             self.adjacenctMatrix[link[1]][link[0]] = linkDelay
+        for node in self.adjacenctMatrix:
+            self.linkCosts[node] = dict(self.adjacenctMatrix[node])
 
     def getNestedDictionary(self):
         return defaultdict(self.getNestedDictionary)
 
-    def getRoutes(self, nFaces):
+    def _updateLink(self, a, b):
+        """Apply the current state of a link to the adjacency matrix, return True if it changed"""
+        isUp = frozenset((a, b)) not in self.downLinks and \
+               a not in self.downNodes and b not in self.downNodes
+        if isUp == (b in self.adjacenctMatrix[a]):
+            return False
+        if isUp:
+            self.adjacenctMatrix[a][b] = self.linkCosts[a][b]
+            self.adjacenctMatrix[b][a] = self.linkCosts[b][a]
+        else:
+            del self.adjacenctMatrix[a][b]
+            del self.adjacenctMatrix[b][a]
+        return True
+
+    def setLinkState(self, a, b, isUp):
+        """
+        Mark a link up or down. Returns the list of links whose state changed.
+        """
+        if b not in self.linkCosts[a]:
+            raise ValueError('No link between {} and {}'.format(a, b))
+        if isUp:
+            self.downLinks.discard(frozenset((a, b)))
+        else:
+            self.downLinks.add(frozenset((a, b)))
+        return [(a, b)] if self._updateLink(a, b) else []
+
+    def setNodeState(self, node, isUp):
+        """
+        Mark a node up or down, along with all of its links. Returns the list of links
+        whose state changed.
+        """
+        if isUp:
+            self.downNodes.discard(node)
+        else:
+            self.downNodes.add(node)
+            self.trees.pop(node, None)
+        return [(node, other) for other in list(self.linkCosts[node])
+                if self._updateLink(node, other)]
+
+    def getAffectedSources(self, changedLinks, nodesChanged=False):
+        """
+        Return the nodes whose routes may change after the given links changed state.
+
+        For link-state routing, a source is affected if it is an endpoint of a changed link
+        or if a changed link is tight in one of its shortest path trees, i.e. it lies on a
+        shortest path (link down) or it would shorten or tie a path (link up).
+        For hyperbolic routing, only the endpoints are affected, unless nodes changed state
+        and thus every node's set of destinations.
+
+        :param changedLinks: list of (node name, node name)
+        :param bool nodesChanged: True if nodes went down or up
+        """
+        upNodes = self.getNodeNames()
+        sources = set(node for link in changedLinks for node in link if node in upNodes)
+        if self.routingType == "hr":
+            return set(upNodes) if nodesChanged else sources
+
+        infinity = float('inf')
+        for source in upNodes:
+            if source in sources:
+                continue
+            if source not in self.trees:
+                sources.add(source)
+                continue
+            for root, distances in self.trees[source]:
+                for a, b in changedLinks:
+                    cost = self.linkCosts[a][b]
+                    da = distances.get(a, (infinity,))[0]
+                    db = distances.get(b, (infinity,))[0]
+                    if da != db and (da + cost <= db or db + cost <= da):
+                        sources.add(source)
+                        break
+                if source in sources:
+                    break
+        return sources
+
+    def getRoutes(self, nFaces, sources=None):
+        """
+        Compute routes of the given source nodes, default is all nodes
+
+        :param int nFaces: number of faces per destination, 0 for all possible routes
+        :param sources: (optional) names of the nodes to compute routes for
+        """
         resultMatrix = self.getNestedDictionary()
         routes = defaultdict(list)
+        if sources is None:
+            sources = self.getNodeNames()
 
         if self.routingType == "link-state":
             if nFaces == 1:
-                resultMatrix = self.computeDijkastra() # only best routes.
+                resultMatrix = self.computeDijkastra(sources) # only best routes.
             else:
-                resultMatrix = self.computeDijkastraAll() # all possible routes
+                resultMatrix = self.computeDijkastraAll(sources) # all possible routes
         elif self.routingType == "hr":
             if self.isHrConfigValid == True:
                 # Note: For hyperbolic, only way to find the best routes is by
                 # computing all possible routes and getting the best one.
-                resultMatrix = self.computeHyperbolic()
+                resultMatrix = self.computeHyperbolic(sources)
             else:
                 warn('Hyperbolic coordinates in topology file are either missing or misconfigured.\n')
                 warn('Check that each node has one radius value and one or two angle value(s).\n')
@@ -189,9 +345,10 @@ class _CalculateRoutes(object):
 
         for node in resultMatrix:
             for destinationNode in resultMatrix[node]:
-                # Sort node - destination via neighbor based on their cost
+                # Sort node - destination via neighbor based on their cost, equal costs by
+                # neighbor name so that the n-best faces do not depend on the link order
                 tempDict = resultMatrix[node][destinationNode]
-                shortedTempDict = sorted(tempDict.items(), key=operator.itemgetter(1))
+                shortedTempDict = sorted(tempDict.items(), key=operator.itemgetter(1, 0))
                 # nFaces option gets n-best faces based on shortest distance, default is all
                 if nFaces == 0:
                     for item in shortedTempDict:
@@ -210,66 +367,78 @@ class _CalculateRoutes(object):
         return routes
 
     def getNodeNames(self):
-        return [k for k in self.nodeDict]
+        return [k for k in self.nodeDict if k not in self.downNodes]
 
-    def computeHyperbolic(self):
+    def computeHyperbolic(self, sources=None):
         paths = self.getNestedDictionary()
         nodeNames = self.getNodeNames()
-        for node in self.nodeDict:
-            neighbors = [k for k in self.adjacenctMatrix[node]]
+        nodeIndex = {name: index for index, name in enumerate(nodeNames)}
+        radii = [next(iter(self.nodeDict[name])) for name in nodeNames]
+        angleVectors = [self.nodeDict[name][radius] for name, radius in zip(nodeNames, radii)]
+        distances = getHyperbolicDistanceMatrix(radii, angleVectors)
+
+        for node in nodeNames if sources is None else sources:
+            neighbors = sorted(k for k in self.adjacenctMatrix[node] if k in nodeIndex)
             for viaNeighbor in neighbors:
                 others = [x for x in nodeNames if x not in [viaNeighbor, node]]
                 paths[node][viaNeighbor][viaNeighbor] = 0
                 # Compute distance from neighbors to no-neighbors
+                neighborDistances = distances[nodeIndex[viaNeighbor]]
                 for destinationNode in others:
-                    hyperbolicDistance = getHyperbolicDistance(self.nodeDict[viaNeighbor],
-                                                               self.nodeDict[destinationNode])
+                    hyperbolicDistance = float(neighborDistances[nodeIndex[destinationNode]])
                     hyperbolicCost = int(HYPERBOLIC_COST_ADJUSTMENT_FACTOR \
                                          * round(hyperbolicDistance, 6))
                     paths[node][destinationNode][viaNeighbor] = hyperbolicCost
         debug("Shortest Distance Matrix: {}".format(json.dumps(paths)))
         return paths
 
-    def computeDijkastra(self):
+    def computeDijkastra(self, sources=None):
         """
         Dijkstra computation: Compute all the shortest paths from nodes to the destinations.
-        And fills the distance matrix with the corresponding source to destination cost
+        And fills the distance matrix with the corresponding source to destination cost.
+        One single-source search is run per node.
         """
         distanceMatrix = self.getNestedDictionary()
         nodeNames = self.getNodeNames()
-        for node in nodeNames:
-            others = [x for x in nodeNames if x not in [node]]
-            for destinationNode in others:
-                cost, path = dijkstra(self.adjacenctMatrix, node, destinationNode)
-                viaNeighbor = path[1]
+        for node in nodeNames if sources is None else sources:
+            distances = shortestPaths(self.adjacenctMatrix, node)
+            self.trees[node] = [(node, distances)]
+            for destinationNode in nodeNames:
+                if destinationNode == node or destinationNode not in distances:
+                    continue
+                cost, viaNeighbor = distances[destinationNode]
                 distanceMatrix[node][destinationNode][viaNeighbor] = cost
 
         debug("Shortest Distance Matrix: {}".format(json.dumps(distanceMatrix)))
         return distanceMatrix
 
-    def computeDijkastraAll(self):
+    def computeDijkastraAll(self, sources=None):
         """
         Multi-path Dijkastra computation: Compute all the shortest paths from nodes to the
         destinations via all of its neighbors individually. And fills the distanceMatrixViaNeighbor
         with a corresponding source to its destination cost
 
         Important: distanceMatrixViaNeighbor represents the shortest distance from a source to a
-        destination via specific neighbors
+        destination via specific neighbors. One single-source search, ignoring the source, is
+        run per (node, neighbor) pair.
         """
         distanceMatrixViaNeighbor = self.getNestedDictionary()
         nodeNames = self.getNodeNames()
-        for node in nodeNames:
-            neighbors = [k for k in self.adjacenctMatrix[node]]
+        for node in nodeNames if sources is None else sources:
+            # Sorted, a link which went down and up again is last in the adjacency dict
+            neighbors = sorted(self.adjacenctMatrix[node])
+            self.trees[node] = []
             for viaNeighbor in neighbors:
                 directCost = self.adjacenctMatrix[node][viaNeighbor]
                 distanceMatrixViaNeighbor[node][viaNeighbor][viaNeighbor] = directCost
-                others = [x for x in nodeNames if x not in [viaNeighbor, node]]
-                for destinationNode in others:
-                    nodeNeighborCost = self.adjacenctMatrix[node][viaNeighbor]
-                    # path variable is not used for now
-                    cost, path = dijkstra(self.adjacenctMatrix, viaNeighbor, destinationNode, node)
-                    if cost != 0 and path != None:
-                        totalCost = cost + nodeNeighborCost
+                distances = shortestPaths(self.adjacenctMatrix, viaNeighbor, node)
+                self.trees[node].append((viaNeighbor, distances))
+                for destinationNode in nodeNames:
+                    if destinationNode in [viaNeighbor, node] or destinationNode not in distances:
+                        continue
+                    cost = distances[destinationNode][0]
+                    if cost != 0:
+                        totalCost = cost + directCost
                         distanceMatrixViaNeighbor[node][destinationNode][viaNeighbor] = totalCost
 
         debug("Shortest Distance Matrix: {}".format(json.dumps(distanceMatrixViaNeighbor)))
@@ -290,8 +459,17 @@ class NdnRoutingHelper(object):
         self.faceType = faceType
         self.routingType = routingType
         self.routes = []
+        self.nFaces = 0
         self.namePrefixes = {host_name.name: [] for host_name in self.net.hosts}
         self.routeObject = _CalculateRoutes(self.net, self.routingType)
+        # Node name to {neighbor name: FaceId}
+        self.faces = {}
+        # Node name to {neighbor name: IP}
+        self.neighborIPs = {}
+        # Node name to {(prefix, next hop name): cost} of the routes installed in NFD
+        self.installedRoutes = {}
+        # Node name to the NfdcResult of every route registration which failed
+        self.failedRoutes = {}
 
     def globalRoutingHelperHandler(self):
         info('Creating faces and adding routes to FIB\n')
@@ -303,13 +481,136 @@ class NdnRoutingHelper(object):
 
     def addNodeRoutes(self, node):
         """
-        Create faces to neighbors and add all routes for one node
+        Create faces to neighbors and add all routes for one node. Face creations and
+        route registrations are applied together in a single nfdc batch.
 
         :param Node node: Node from net object
         """
         neighborIPs = self.getNeighbor(node)
-        neighborFaces = self.createFaces(node, neighborIPs)
-        self.routeAdd(node, neighborFaces)
+        neighbors = list(neighborIPs.keys())
+        commands = [nfdc.faceCreateCommand(neighborIPs[k], self.faceType) for k in neighbors]
+        commands += [nfdc.routeAddCommand(prefix, neighborIPs[nextHop], self.faceType, cost=cost)
+                     for prefix, nextHop, cost in self.getNodeRoutes(node)]
+
+        results = nfdc.executeBatch(node, commands)
+
+        faceResults, routeResults = results[:len(neighbors)], results[len(neighbors):]
+        self.neighborIPs[node.name] = neighborIPs
+        self.faces[node.name] = {}
+        for neighbor, result in zip(neighbors, faceResults):
+            if not result.success:
+                raise ValueError('[{}] Face creation to {} failed: {}'
+                                 .format(node.name, neighbor, result.output))
+            self.faces[node.name][neighbor] = result.attributes['id']
+
+        self.installedRoutes[node.name] = {}
+        self.failedRoutes[node.name] = []
+        for (prefix, nextHop, cost), result in zip(self.getNodeRoutes(node), routeResults):
+            if result.success:
+                self.installedRoutes[node.name][(prefix, nextHop)] = cost
+            else:
+                self.failedRoutes[node.name].append(result)
+                warn('[{}] Route registration failed: {} {}\n'
+                     .format(node.name, result.command, result.output))
+
+    def updateNodeRoutes(self, node):
+        """
+        Apply the difference between the computed and the installed routes of one node
+        in a single nfdc batch: stale routes are removed, new routes are added and routes
+        whose cost changed are added again to update their cost.
+
+        :param Node node: Node from net object
+        """
+        installed = self.installedRoutes.setdefault(node.name, {})
+        wanted = {(prefix, nextHop): cost for prefix, nextHop, cost in self.getNodeRoutes(node)}
+        removals = [key for key in installed if key not in wanted]
+        additions = [(key, cost) for key, cost in wanted.items() if installed.get(key) != cost]
+        if not removals and not additions:
+            return
+
+        neighborIPs = self.neighborIPs[node.name]
+        faces = self.faces[node.name]
+        commands = [nfdc.routeRemoveCommand(prefix, faces.get(nextHop, neighborIPs[nextHop]))
+                    for prefix, nextHop in removals]
+        commands += [nfdc.routeAddCommand(prefix, neighborIPs[nextHop], self.faceType, cost=cost)
+                     for (prefix, nextHop), cost in additions]
+        results = nfdc.executeBatch(node, commands)
+
+        for key, result in zip(removals, results[:len(removals)]):
+            if result.success:
+                del installed[key]
+            else:
+                warn('[{}] Route removal failed: {} {}\n'
+                     .format(node.name, result.command, result.output))
+        failedRoutes = self.failedRoutes.setdefault(node.name, [])
+        for (key, cost), result in zip(additions, results[len(removals):]):
+            if result.success:
+                installed[key] = cost
+            else:
+                failedRoutes.append(result)
+                warn('[{}] Route registration failed: {} {}\n'
+                     .format(node.name, result.command, result.output))
+
+    def updateRoutes(self, downLinks=(), upLinks=(), downNodes=(), upNodes=()):
+        """
+        Update the installed routes after links or nodes failed or recovered. Call it once
+        the links have been brought down or up (e.g. with net.configLinkStatus) or the
+        nodes stopped or restarted. Only the nodes whose routes may change are recomputed
+        and only the difference with the installed routes is applied to NFD.
+
+        The NFD of a recovered node is expected to be restarted, its faces and all its
+        routes are installed again.
+
+        :param downLinks: list of (node name, node name) links which went down
+        :param upLinks: list of (node name, node name) links which came back up
+        :param downNodes: names of the nodes which failed
+        :param upNodes: names of the nodes which recovered
+        """
+        changedLinks = []
+        for a, b in downLinks:
+            changedLinks += self.routeObject.setLinkState(a, b, False)
+        for a, b in upLinks:
+            changedLinks += self.routeObject.setLinkState(a, b, True)
+        for name in downNodes:
+            changedLinks += self.routeObject.setNodeState(name, False)
+        for name in upNodes:
+            changedLinks += self.routeObject.setNodeState(name, True)
+
+        sources = self.routeObject.getAffectedSources(changedLinks,
+                                                      nodesChanged=bool(downNodes or upNodes))
+        sources.update(upNodes)
+        routes = self.routeObject.getRoutes(self.nFaces, sources)
+        if routes is None:
+            warn('Route computation failed\n')
+            return
+
+        for name in downNodes:
+            self.routes[name] = []
+            self.installedRoutes[name] = {}
+        for name in sources:
+            self.routes[name] = routes.get(name, [])
+        info('Updating routes of {} node(s)\n'.format(len(sources)))
+
+        Parallel(n_jobs=-1, require='sharedmem', prefer="threads")(
+            delayed(self.addNodeRoutes if name in upNodes else self.updateNodeRoutes)(self.net[name])
+            for name in sources)
+
+    def getNodeRoutes(self, node):
+        """
+        Return the routes to install on a node as (prefix, next hop name, cost), including
+        the prefix/s advertised by each destination
+
+        :param Node node: source node (Mininet net.host)
+        """
+        nodeRoutes = []
+        for route in self.routes[node.name]:
+            destination = route[0]
+            cost = int(route[1])
+            nextHop = route[2]
+            defaultPrefix = "/ndn/{}-site/{}".format(destination, destination)
+            for prefix in [defaultPrefix] + self.namePrefixes[destination]:
+                nodeRoutes.append((prefix, nextHop, cost))
+        return nodeRoutes
 
     def addOrigin(self, nodes, prefix):
         """
@@ -333,6 +634,7 @@ class NdnRoutingHelper(object):
           i.e. nFaces = 0 will compute all possible routes
 
         """
+        self.nFaces = nFaces
         self.routes = self.routeObject.getRoutes(nFaces)
         if self.routes is not None:
             info('Route computation completed\n')
@@ -347,31 +649,33 @@ class NdnRoutingHelper(object):
         self.calculateNPossibleRoutes(nFaces=1)
 
     def createFaces(self, node, neighborIPs):
+        neighbors = list(neighborIPs.keys())
+        results = nfdc.executeBatch(node, [nfdc.faceCreateCommand(neighborIPs[k], self.faceType)
+                                           for k in neighbors])
         neighborFaces = {}
-        for k, ip in neighborIPs.items():
-            faceID = nfdc.createFace(node, ip, self.faceType)
-            if not isinstance(faceID, str): raise ValueError(faceID)
-            neighborFaces[k] = faceID
+        for neighbor, result in zip(neighbors, results):
+            if not result.success:
+                raise ValueError('[{}] Face creation to {} failed: {}'
+                                 .format(node.name, neighbor, result.output))
+            neighborFaces[neighbor] = result.attributes['id']
         return neighborFaces
 
-
     def routeAdd(self, node, neighborFaces):
         """
-        Add route from a node to its neighbors for each prefix/s  advertised by destination node
+        Add route from a node to its neighbors for each prefix/s  advertised by destination node,
+        in a single nfdc batch
 
         :param Node node: source node (Mininet net.host)
         :param IP neighborIPs: IP addresses of neighbors
         """
-        neighbors = self.routes[node.name]
-        for route in neighbors:
-            destination = route[0]
-            cost = int(route[1])
-            nextHop = route[2]
-            defaultPrefix = "/ndn/{}-site/{}".format(destination, destination)
-            prefixes = [defaultPrefix] + self.namePrefixes[destination]
-            for prefix in prefixes:
-                # Register routes to all the available destination name prefix/s
-                nfdc.registerRoute(node, prefix, neighborFaces[nextHop], cost=cost)
+        # Register routes to all the available destination name prefix/s
+        commands = [nfdc.routeAddCommand(prefix, neighborFaces[nextHop], cost=cost)
+                    for prefix, nextHop, cost in self.getNodeRoutes(node)]
+        for result in nfdc.executeBatch(node, commands):
+            if not result.success:
+                warn('[{}] Route registration failed: {} {}\n'
+                     .format(node.name, result.command, result.output))
+
     @staticmethod
     def getNeighbor(node):
         # Nodes to IP mapping
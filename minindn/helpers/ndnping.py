@@ -21,53 +21,41 @@
 # along with Mini-NDN, e.g., in COPYING.md file.
 # If not, see <http://www.gnu.org/licenses/>.
 
-import time
+from mininet.log import info
 
-# Todo: convert to app
+from minindn.apps.ndnping import NDNPingClient, NDNPingServer
 
 class NDNPing(object):
+    """Wrappers starting NDNPingClient and NDNPingServer applications"""
     @staticmethod
     def ping(source, prefix, pingDataFile="output-client", nPings=1, interval=None, timeout=None,
              starting_seq_num=None, identifier=None, allow_stale_data=False, print_timestamp=True,
-             sleepTime=0.2):
-        print('Scheduling ping(s) from {} for {}'.format(source.name, prefix))
-        # Use '&' to run in background and perform parallel pings
-        source.cmd("mkdir -p ping-data")
-        source.cmd('ndnping{1}{2}{3}{4}{5}{6}{7} {0} >> ping-data/{8}.txt &'
-        .format(
-            prefix,
-            ' -c {}'.format(nPings),
-            ' -i {}'.format(interval) if interval else '',
-            ' -o {}'.format(timeout) if timeout  else '',
-            ' -n {}'.format(starting_seq_num) if starting_seq_num else '',
-            ' -p {}'.format(identifier) if identifier else '',
-            ' -a' if allow_stale_data else '',
-            ' -t' if print_timestamp else '',
-            pingDataFile
-        ))
-        time.sleep(sleepTime)
+             sleepTime=None):
+        """
+        Start pinging prefix from source in the background, the results are appended to
+        ping-data/<pingDataFile>.txt. Returns the NDNPingClient, stopped by the caller.
+        sleepTime is kept for compatibility, the ping no longer waits after starting.
+        """
+        info('Scheduling ping(s) from {} for {}\n'.format(source.name, prefix))
+        client = NDNPingClient(source, prefix, pingDataFile, nPings, interval, timeout,
+                               starting_seq_num, identifier, allow_stale_data, print_timestamp)
+        client.start()
+        return client
 
     @staticmethod
     def startPingServer(source, prefix, pingDataFile="output-server", freshness=None, satisfy=None,
                         size=None, timestamp=False, quiet=False):
         """
-        Start a pingserver
-         :param string preifx: prefix to start pingserver on
+        Start a pingserver, its log is appended to ping-data/output-server.txt
+        (pingDataFile is kept for compatibility). Returns the NDNPingServer, stopped by the caller.
+         :param string prefix: prefix to start pingserver on
          :param int freshness: FreshnessPeriod of the ping response, in milliseconds
          :param int satisfy: maximum number of pings to satisfy
          :param int size: size of response payload
          :param boolean timestamp: prepend a timestamp to each log message
-         :param boolean quite: do not print a log message each time a ping packet is received
+         :param boolean quiet: do not print a log message each time a ping packet is received
         """
-        print('Staring ping server on prefix {}'.format(prefix))
-        source.cmd("mkdir -p ping-data")
-        cmd = 'ndnpingserver {1}{2}{3}{4}{5} {0}>> ping-data/{6}.txt &'.format(
-            prefix,
-            '-f {}'.format(freshness) if freshness else '',
-            '-p {}'.format(satisfy) if satisfy else '',
-            '-s {}'.format(size) if size else '',
-            '{}'.format('-t') if timestamp else '',
-            '{}'.format('-q') if quiet else '',
-            pingDataFile
-        )
-        source.cmd(cmd)
\ No newline at end of file
+        info('Starting ping server on prefix {}\n'.format(prefix))
+        server = NDNPingServer(source, prefix, freshness, satisfy, size, timestamp, quiet)
+        server.start()
+        return server
@@ -0,0 +1,251 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+This module collects the FIB, RIB, face and strategy tables of NFD on a set of
+nodes into typed entries. Each node is queried with a single `nfdc status report xml`,
+nodes are queried concurrently and the snapshots are cached for a short time so
+that repeated checks within the same experiment step do not run nfdc again.
+
+    status = NfdStatus(ndn.net.hosts)
+    if '/abc' not in status.getNode(ndn.net['b']).fibPrefixes():
+        ...
+    columns = NfdStatus.toColumns(status.fib())  # e.g. pandas.DataFrame(columns)
+'''
+
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import namedtuple
+from threading import Lock
+from joblib import Parallel, delayed
+
+from mininet.log import debug, warn
+
+DEFAULT_TTL = 2
+DEFAULT_MAX_WORKERS = 32
+STATUS_COMMAND = 'nfdc status report xml 2>/dev/null'
+
+FibEntry = namedtuple('FibEntry', ['node', 'prefix', 'faceId', 'cost'])
+RibEntry = namedtuple('RibEntry', ['node', 'prefix', 'faceId', 'origin', 'cost',
+                                   'childInherit', 'capture', 'expires'])
+FaceEntry = namedtuple('FaceEntry', ['node', 'faceId', 'remoteUri', 'localUri', 'scope',
+                                     'persistency', 'linkType', 'nInInterests', 'nInData',
+                                     'nInNacks', 'nOutInterests', 'nOutData', 'nOutNacks',
+                                     'nInBytes', 'nOutBytes'])
+StrategyEntry = namedtuple('StrategyEntry', ['node', 'prefix', 'strategy'])
+
+def _text(element, path, default=None):
+    child = element.find(path)
+    return default if child is None or child.text is None else child.text.strip()
+
+def _int(element, path, default=None):
+    text = _text(element, path)
+    return default if text is None else int(text)
+
+def _seconds(duration):
+    """Convert an XML duration such as PT3598.5S to seconds, None means never"""
+    if duration is None:
+        return None
+    seconds = 0.0
+    number = ''
+    for char in duration.lstrip('P').replace('T', ''):
+        if char.isdigit() or char == '.':
+            number += char
+        else:
+            seconds += float(number) * {'D': 86400, 'H': 3600, 'M': 60, 'S': 1}[char]
+            number = ''
+    return seconds
+
+class NodeStatus(object):
+    """
+    Tables of one node at the time they were collected. On failure (e.g. NFD not running)
+    the tables are empty and error holds the reason.
+    """
+    def __init__(self, node, collectedAt, faces=None, fib=None, rib=None, strategies=None,
+                 error=None):
+        self.node = node
+        self.collectedAt = collectedAt
+        self.faces = faces or []
+        self.fib = fib or []
+        self.rib = rib or []
+        self.strategies = strategies or []
+        self.error = error
+
+    def fibPrefixes(self):
+        """Return the set of name prefixes in the FIB"""
+        return set(entry.prefix for entry in self.fib)
+
+    def ribPrefixes(self):
+        """Return the set of name prefixes in the RIB"""
+        return set(entry.prefix for entry in self.rib)
+
+    def nextHops(self, prefix):
+        """Return {FaceId: cost} of the FIB entry for prefix"""
+        return {entry.faceId: entry.cost for entry in self.fib if entry.prefix == prefix}
+
+    @staticmethod
+    def parse(nodeName, output, collectedAt=None):
+        """
+        Parse the output of nfdc status report xml
+
+        :param str nodeName: name recorded in every entry
+        :param str output: XML status report
+        """
+        collectedAt = time.time() if collectedAt is None else collectedAt
+        start = output.find('<')
+        try:
+            root = ElementTree.fromstring(output[start:] if start >= 0 else output)
+        except ElementTree.ParseError as e:
+            return NodeStatus(nodeName, collectedAt, error='Invalid status report: {}'.format(e))
+        # Drop the namespace of the status report schema
+        for element in root.iter():
+            element.tag = element.tag.rpartition('}')[2]
+
+        faces = []
+        for face in root.iterfind('faces/face'):
+            counters = face.find('packetCounters')
+            faces.append(FaceEntry(
+                nodeName, _int(face, 'faceId'), _text(face, 'remoteUri'),
+                _text(face, 'localUri'), _text(face, 'faceScope'),
+                _text(face, 'facePersistency'), _text(face, 'linkType'),
+                _int(counters, 'incomingPackets/nInterests', 0),
+                _int(counters, 'incomingPackets/nData', 0),
+                _int(counters, 'incomingPackets/nNacks', 0),
+                _int(counters, 'outgoingPackets/nInterests', 0),
+                _int(counters, 'outgoingPackets/nData', 0),
+                _int(counters, 'outgoingPackets/nNacks', 0),
+                _int(face, 'byteCounters/incomingBytes', 0),
+                _int(face, 'byteCounters/outgoingBytes', 0)))
+
+        fib = [FibEntry(nodeName, _text(entry, 'prefix'), _int(nextHop, 'faceId'),
+                        _int(nextHop, 'cost'))
+               for entry in root.iterfind('fib/fibEntry')
+               for nextHop in entry.iterfind('nextHops/nextHop')]
+
+        rib = [RibEntry(nodeName, _text(entry, 'prefix'), _int(route, 'faceId'),
+                        _int(route, 'origin'), _int(route, 'cost'),
+                        route.find('flags/childInherit') is not None,
+                        route.find('flags/ribCapture') is not None,
+                        _seconds(_text(route, 'expirationPeriod')))
+               for entry in root.iterfind('rib/ribEntry')
+               for route in entry.iterfind('routes/route')]
+
+        strategies = [StrategyEntry(nodeName, _text(choice, 'namespace'),
+                                    _text(choice, 'strategy/name'))
+                      for choice in root.iterfind('strategyChoices/strategyChoice')]
+
+        return NodeStatus(nodeName, collectedAt, faces, fib, rib, strategies)
+
+class NfdStatus(object):
+    """
+    Snapshots of the NFD tables of a set of nodes
+
+    :param nodes: list of nodes (Mininet net.hosts)
+    :param ttl: seconds a snapshot is reused before nfdc is run again
+    :param maxWorkers: maximum number of nodes queried at the same time
+    """
+    def __init__(self, nodes, ttl=DEFAULT_TTL, maxWorkers=DEFAULT_MAX_WORKERS):
+        self.nodes = list(nodes)
+        self.ttl = ttl
+        self.maxWorkers = maxWorkers
+        self.cache = {}
+        self.lock = Lock()
+
+    def _query(self, node):
+        collectedAt = time.time()
+        status = NodeStatus.parse(node.name, node.cmd(STATUS_COMMAND), collectedAt)
+        if status.error is not None:
+            warn('[{}] Cannot collect NFD status: {}\n'.format(node.name, status.error))
+        with self.lock:
+            self.cache[node.name] = status
+        return status
+
+    def _isFresh(self, status, maxAge):
+        maxAge = self.ttl if maxAge is None else maxAge
+        return status is not None and time.time() - status.collectedAt <= maxAge
+
+    def collect(self, nodes=None, maxAge=None):
+        """
+        Return {node name: NodeStatus}, querying concurrently only the nodes without a
+        snapshot younger than maxAge
+
+        :param nodes: (optional) subset of the nodes, default is all nodes
+        :param maxAge: (optional) maximum snapshot age in seconds, default is the ttl,
+          0 forces a new query
+        """
+        nodes = self.nodes if nodes is None else nodes
+        with self.lock:
+            snapshots = {node.name: self.cache.get(node.name) for node in nodes}
+        stale = [node for node in nodes if not self._isFresh(snapshots[node.name], maxAge)]
+        if stale:
+            debug('Collecting NFD status of {} node(s)\n'.format(len(stale)))
+            results = Parallel(n_jobs=min(len(stale), self.maxWorkers), require='sharedmem',
+                               prefer='threads')(delayed(self._query)(node) for node in stale)
+            for node, status in zip(stale, results):
+                snapshots[node.name] = status
+        return snapshots
+
+    def getNode(self, node, maxAge=None):
+        """Return the NodeStatus of one node"""
+        return self.collect([node], maxAge)[node.name]
+
+    def invalidate(self, nodes=None):
+        """Drop the cached snapshots of the given nodes, default is all nodes"""
+        with self.lock:
+            if nodes is None:
+                self.cache.clear()
+            for node in nodes or []:
+                self.cache.pop(node.name, None)
+
+    def _entries(self, table, nodes, maxAge):
+        snapshots = self.collect(nodes, maxAge)
+        return [entry for status in snapshots.values() for entry in getattr(status, table)]
+
+    def fib(self, nodes=None, maxAge=None):
+        """Return the FibEntry of every next hop of every node"""
+        return self._entries('fib', nodes, maxAge)
+
+    def rib(self, nodes=None, maxAge=None):
+        """Return the RibEntry of every route of every node"""
+        return self._entries('rib', nodes, maxAge)
+
+    def faces(self, nodes=None, maxAge=None):
+        """Return the FaceEntry of every face of every node"""
+        return self._entries('faces', nodes, maxAge)
+
+    def strategies(self, nodes=None, maxAge=None):
+        """Return the StrategyEntry of every strategy choice of every node"""
+        return self._entries('strategies', nodes, maxAge)
+
+    @staticmethod
+    def toColumns(entries, fields=None):
+        """
+        Convert a list of entries of the same type into {field: [values]},
+        which can be given directly to pandas.DataFrame
+
+        :param entries: list of FibEntry, RibEntry, FaceEntry or StrategyEntry
+        :param fields: (optional) field names, needed only if entries may be empty
+        """
+        if fields is None:
+            fields = entries[0]._fields if entries else []
+        return {field: [getattr(entry, field) for entry in entries] for field in fields}
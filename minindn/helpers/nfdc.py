@@ -21,13 +21,51 @@
 # along with Mini-NDN, e.g., in COPYING.md file.
 # If not, see <http://www.gnu.org/licenses/>.
 
+import re
+from subprocess import PIPE, STDOUT
+from threading import Lock
+
 from mininet.log import debug, warn
 from minindn.minindn import Minindn
+from minindn.util import getPopen
 
 # If needed (e.g. to speed up the process), use a smaller (or larger value) 
 # based on your machines resource (CPU, memory)
 SLEEP_TIME = 0.0015
 
+# nfdc in batch mode reading commands from standard input, line buffered so that each
+# command's result can be read as soon as it is printed
+NFDC_BATCH_COMMAND = 'stdbuf -oL -eL nfdc -f -'
+
+# Successful nfdc commands print a single line starting with a status such as
+# face-created, route-add-accepted or strategy-set followed by key=value pairs
+_STATUS_LINE = re.compile(r'^([a-z]+(?:-[a-z]+)+)(?:\s|$)')
+# Printed by nfdc in batch mode when a command fails, nfdc exits right after
+_BATCH_FAILURE = 'nfdc: failed to execute command'
+_BATCH_FAILURE_LINE = re.compile(r'nfdc: failed to execute command on line (\d+)')
+
+class NfdcResult(object):
+    """
+    Structured result of one nfdc command
+
+    :param command: nfdc arguments of the command, e.g. 'route add /ndn 262'
+    :param output: lines printed by nfdc for this command
+    """
+    def __init__(self, command, output):
+        self.command = command
+        self.output = output
+        self.status = None
+        self.attributes = {}
+        if output:
+            match = _STATUS_LINE.match(output[-1])
+            if match:
+                self.status = match.group(1)
+                self.attributes = Nfdc.parseAttributes(output[-1][match.end():])
+        self.success = self.status is not None
+
+    def __repr__(self):
+        return 'NfdcResult({!r}, {})'.format(self.command, self.status or self.output)
+
 class Nfdc(object):
     STRATEGY_ASF = 'asf'
     STRATEGY_BEST_ROUTE = 'best-route'
@@ -38,51 +76,76 @@ class Nfdc(object):
     PROTOCOL_ETHER = 'ether'
 
     @staticmethod
-    def registerRoute(node, namePrefix, remoteNode, protocol=PROTOCOL_UDP, origin=255,
-                      cost=0, inheritFlag=True, captureFlag=False, expirationInMillis=None):
-        cmd = ""
+    def parseAttributes(text):
+        """Parse space separated key=value pairs as printed by nfdc"""
+        attributes = {}
+        for item in text.split():
+            key, sep, value = item.partition('=')
+            if sep:
+                attributes[key] = value
+        return attributes
+
+    @staticmethod
+    def routeAddCommand(namePrefix, remoteNode, protocol=PROTOCOL_UDP, origin=255,
+                        cost=0, inheritFlag=True, captureFlag=False, expirationInMillis=None):
         if remoteNode.isdigit() and not protocol == "fd":
-            cmd = ('nfdc route add {} {} origin {} cost {} {}{}{}').format(
-                namePrefix,
-                remoteNode,
-                origin,
-                cost,
-                'no-inherit ' if not inheritFlag else '',
-                'capture ' if captureFlag else '',
-                'expires {}'.format(expirationInMillis) if expirationInMillis else ''
-            )
+            nexthop = remoteNode
         else:
-            cmd = ('nfdc route add {} {}://{} origin {} cost {} {}{}{}').format(
-                namePrefix,
-                protocol,
-                remoteNode,
-                origin,
-                cost,
-                'no-inherit ' if not inheritFlag else '',
-                'capture ' if captureFlag else '',
-                'expires {}'.format(expirationInMillis) if expirationInMillis else ''
-            )
+            nexthop = '{}://{}'.format(protocol, remoteNode)
+        return ('route add {} {} origin {} cost {} {}{}{}').format(
+            namePrefix,
+            nexthop,
+            origin,
+            cost,
+            'no-inherit ' if not inheritFlag else '',
+            'capture ' if captureFlag else '',
+            'expires {}'.format(expirationInMillis) if expirationInMillis else ''
+        )
+
+    @staticmethod
+    def routeRemoveCommand(namePrefix, remoteNode, origin=255):
+        return 'route remove {} {} origin {}'.format(namePrefix, remoteNode, origin)
+
+    @staticmethod
+    def faceCreateCommand(remoteNodeAddress, protocol='udp', isPermanent=False):
+        return 'face create {}://{} {}'.format(
+            protocol,
+            remoteNodeAddress,
+            'permanent' if isPermanent else 'persistent'
+        )
+
+    @staticmethod
+    def faceDestroyCommand(remoteNode, protocol='udp'):
+        if remoteNode.isdigit() and not protocol == "fd":
+            return 'face destroy {}'.format(remoteNode)
+        return 'face destroy {}://{}'.format(protocol, remoteNode)
+
+    @staticmethod
+    def strategySetCommand(namePrefix, strategy):
+        return 'strategy set {} ndn:/localhost/nfd/strategy/{}'.format(namePrefix, strategy)
+
+    @staticmethod
+    def strategyUnsetCommand(namePrefix):
+        return 'strategy unset {}'.format(namePrefix)
+
+    @staticmethod
+    def registerRoute(node, namePrefix, remoteNode, protocol=PROTOCOL_UDP, origin=255,
+                      cost=0, inheritFlag=True, captureFlag=False, expirationInMillis=None):
+        cmd = 'nfdc ' + Nfdc.routeAddCommand(namePrefix, remoteNode, protocol, origin, cost,
+                                             inheritFlag, captureFlag, expirationInMillis)
         debug(node.cmd(cmd))
         Minindn.sleep(SLEEP_TIME)
 
     @staticmethod
     def unregisterRoute(node, namePrefix, remoteNode, origin=255):
-        cmd = ""
-        if remoteNode.isdigit() and not protocol == "fd":
-            cmd = 'nfdc route remove {} {} {}'.format(namePrefix, remoteNode, origin)
-        else:
-            cmd = 'nfdc route remove {} {} {}'.format(namePrefix, remoteNode, origin)
+        cmd = 'nfdc ' + Nfdc.routeRemoveCommand(namePrefix, remoteNode, origin)
         debug(node.cmd(cmd))
         Minindn.sleep(SLEEP_TIME)
 
     @staticmethod
     def createFace(node, remoteNodeAddress, protocol='udp', isPermanent=False, allowExisting=True):
         '''Create face in node's NFD instance. Returns FaceID of created face or -1 if failed.'''
-        cmd = ('nfdc face create {}://{} {}'.format(
-            protocol,
-            remoteNodeAddress,
-            'permanent' if isPermanent else 'persistent'
-        ))
+        cmd = 'nfdc ' + Nfdc.faceCreateCommand(remoteNodeAddress, protocol, isPermanent)
         output = node.cmd(cmd)
         debug(output)
         Minindn.sleep(SLEEP_TIME)
@@ -94,15 +157,12 @@ class Nfdc(object):
 
     @staticmethod
     def destroyFace(node, remoteNode, protocol='udp'):
-        if remoteNode.isdigit() and not protocol == "fd":
-            debug(node.cmd('nfdc face destroy {}'.format(protocol, remoteNode)))
-        else:
-            debug(node.cmd('nfdc face destroy {}://{}'.format(protocol, remoteNode)))
+        debug(node.cmd('nfdc ' + Nfdc.faceDestroyCommand(remoteNode, protocol)))
         Minindn.sleep(SLEEP_TIME)
 
     @staticmethod
     def setStrategy(node, namePrefix, strategy):
-        cmd = 'nfdc strategy set {} ndn:/localhost/nfd/strategy/{}'.format(namePrefix, strategy)
+        cmd = 'nfdc ' + Nfdc.strategySetCommand(namePrefix, strategy)
         out = node.cmd(cmd)
         if out.find('error') != -1:
             warn("[" + node.name + "] Error on strategy set out: " + out)
@@ -110,9 +170,64 @@ class Nfdc(object):
 
     @staticmethod
     def unsetStrategy(node, namePrefix):
-        debug(node.cmd("nfdc strategy unset {}".format(namePrefix)))
+        debug(node.cmd('nfdc ' + Nfdc.strategyUnsetCommand(namePrefix)))
         Minindn.sleep(SLEEP_TIME)
 
+    @staticmethod
+    def executeBatch(node, commands, batchFile=None):
+        """
+        Run nfdc commands (without the leading nfdc) in a single nfdc -f batch on the node and
+        return the list of their NfdcResult in the same order. nfdc stops at the first failing
+        command, the commands after it are then applied in a new batch.
+
+        :param Node node: Mininet node
+        :param commands: list of nfdc commands, e.g. ['face create udp://10.0.0.2', ...]
+        :param string batchFile: (optional) path of the batch file, default is
+          nfdc.batch in the node's home directory
+        """
+        if batchFile is None:
+            batchFile = '{}/nfdc.batch'.format(node.params['params']['homeDir'])
+        results = []
+        while len(results) < len(commands):
+            remaining = commands[len(results):]
+            with open(batchFile, 'w') as f:
+                f.write('\n'.join(remaining) + '\n')
+            output = node.cmd('nfdc -f {}'.format(batchFile))
+            debug(output)
+            results.extend(Nfdc.parseBatchOutput(remaining, output))
+        return results
+
+    @staticmethod
+    def parseBatchOutput(commands, output):
+        """
+        Match the output of nfdc -f with the commands of the batch. Returns the results of
+        the commands that were executed; the last one is a failure if nfdc stopped early.
+        """
+        statusLines = []
+        errorLines = []
+        failedLine = None
+        for line in output.splitlines():
+            match = _BATCH_FAILURE_LINE.search(line)
+            if match:
+                failedLine = int(match.group(1))
+            elif _STATUS_LINE.match(line):
+                statusLines.append(line)
+            elif line.strip():
+                errorLines.append(line.strip())
+
+        # Successful commands print their status on stdout and errors go to stderr,
+        # so only the relative order of the status lines is meaningful
+        results = [NfdcResult(command, [line]) for command, line in zip(commands, statusLines)]
+        if failedLine is not None and failedLine <= len(commands):
+            results = results[:failedLine - 1]
+            while len(results) < failedLine - 1:
+                results.append(NfdcResult(commands[len(results)], []))
+            results.append(NfdcResult(commands[failedLine - 1], errorLines))
+        elif len(results) < len(commands):
+            # nfdc stopped without reporting which command failed
+            results.append(NfdcResult(commands[len(results)], errorLines))
+        return results
+
     @staticmethod
     def getFaceId(node, remoteNodeAddress, localEndpoint=None, protocol="udp", portNum="6363"):
         '''Returns the faceId for a remote node based on FaceURI, or -1 if a face is not found'''
@@ -128,3 +243,126 @@ class Nfdc(object):
             return -1
         faceId = output.split(" ")[0][7:]
         return faceId
+
+class NfdcSession(object):
+    """
+    Long-lived nfdc process on a node, kept in batch mode reading from its standard input.
+
+    Commands are pipelined to the process and their results are read back in order as
+    NfdcResult objects, so a sequence of management commands costs a single process
+    instead of one process (and one SLEEP_TIME) per command. nfdc exits when a command
+    fails in batch mode; the session then restarts it and resends the commands that
+    were already written after the failed one.
+
+    Use python3 -m minindn.helpers.nfdc_mock as the command to run without NFD.
+
+    :param Node node: Mininet node
+    :param string command: (optional) command starting nfdc in batch mode
+    :param int window: (optional) maximum number of commands written but not yet answered
+    """
+    def __init__(self, node, command=NFDC_BATCH_COMMAND, window=64):
+        self.node = node
+        self.command = command
+        self.window = window
+        self.process = None
+        self.lock = Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _spawn(self):
+        self.process = getPopen(self.node, self.command.split(), stdin=PIPE, stdout=PIPE,
+                                stderr=STDOUT, universal_newlines=True, bufsize=1)
+
+    def _isAlive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _readResult(self, command):
+        """
+        Read the output of one command. Returns (result, alive) where alive is False if
+        nfdc exited, and result is None if nfdc exited before executing the command.
+        """
+        output = []
+        for line in self.process.stdout:
+            line = line.rstrip('\n')
+            if line.startswith(_BATCH_FAILURE):
+                return NfdcResult(command, output), False
+            output.append(line)
+            if _STATUS_LINE.match(line):
+                return NfdcResult(command, output), True
+        # End of output, nfdc has exited
+        self.process.wait()
+        if output:
+            return NfdcResult(command, output), False
+        return None, False
+
+    def execute(self, commands):
+        """
+        Run nfdc commands (without the leading nfdc, e.g. 'route add /ndn 262')
+        and return the list of their NfdcResult in the same order
+        """
+        results = []
+        with self.lock:
+            sent = 0
+            retried = False
+            while len(results) < len(commands):
+                if not self._isAlive():
+                    self._spawn()
+                    sent = len(results)
+                try:
+                    while sent < len(commands) and sent - len(results) < self.window:
+                        self.process.stdin.write(commands[sent] + '\n')
+                        sent += 1
+                    self.process.stdin.flush()
+                except (BrokenPipeError, ValueError):
+                    # nfdc exited, the restart resends everything not answered yet
+                    pass
+
+                command = commands[len(results)]
+                result, alive = self._readResult(command)
+                if result is None:
+                    if retried:
+                        # nfdc keeps exiting without executing this command
+                        result = NfdcResult(command, [])
+                    retried = not retried
+                if result is not None:
+                    debug('[{}] nfdc {}: {}\n'.format(self.node.name, command, result.output))
+                    results.append(result)
+                    retried = False
+                if not alive:
+                    self.process = None
+        return results
+
+    def createFace(self, remoteNodeAddress, protocol='udp', isPermanent=False):
+        return self.execute([Nfdc.faceCreateCommand(remoteNodeAddress, protocol, isPermanent)])[0]
+
+    def destroyFace(self, remoteNode, protocol='udp'):
+        return self.execute([Nfdc.faceDestroyCommand(remoteNode, protocol)])[0]
+
+    def registerRoute(self, namePrefix, remoteNode, protocol=Nfdc.PROTOCOL_UDP, origin=255,
+                      cost=0, inheritFlag=True, captureFlag=False, expirationInMillis=None):
+        return self.execute([Nfdc.routeAddCommand(namePrefix, remoteNode, protocol, origin, cost,
+                                                  inheritFlag, captureFlag,
+                                                  expirationInMillis)])[0]
+
+    def unregisterRoute(self, namePrefix, remoteNode, origin=255):
+        return self.execute([Nfdc.routeRemoveCommand(namePrefix, remoteNode, origin)])[0]
+
+    def setStrategy(self, namePrefix, strategy):
+        return self.execute([Nfdc.strategySetCommand(namePrefix, strategy)])[0]
+
+    def unsetStrategy(self, namePrefix):
+        return self.execute([Nfdc.strategyUnsetCommand(namePrefix)])[0]
+
+    def close(self):
+        with self.lock:
+            if self.process is not None:
+                try:
+                    self.process.stdin.close()
+                    self.process.wait(timeout=5)
+                except Exception:
+                    self.process.kill()
+                self.process = None
@@ -0,0 +1,217 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Stand-in for `nfdc -f -` that keeps faces, routes and strategies in memory and
+answers face, route and strategy commands the way nfdc does, without a running NFD.
+It allows NfdcSession and batch processing to be exercised outside of an emulation:
+
+    NfdcSession(node, command='python3 -m minindn.helpers.nfdc_mock')
+
+Like NFD, the forwarder state outlives the nfdc process: it is kept in a JSON
+file (--state, relative to the working directory, i.e. the node's home directory).
+'''
+
+import argparse
+import json
+import os
+import sys
+
+FIRST_FACE_ID = 256
+DEFAULT_PORT = 6363
+KEYS = ['prefix', 'nexthop', 'remote', 'face', 'origin', 'cost', 'expires', 'persistency',
+        'strategy']
+FLAGS = ['no-inherit', 'capture']
+PERSISTENCIES = ['persistent', 'permanent', 'on-demand']
+
+class MockNfd(object):
+    def __init__(self):
+        self.faces = {} # FaceId to remote FaceUri
+        self.routes = {} # (prefix, FaceId) to (origin, cost)
+        self.strategies = {'/': '/localhost/nfd/strategy/best-route'}
+        self.nextFaceId = FIRST_FACE_ID
+
+    def load(self, stateFile):
+        if not os.path.isfile(stateFile):
+            return
+        with open(stateFile) as f:
+            state = json.load(f)
+        self.faces = {int(faceId): uri for faceId, uri in state['faces'].items()}
+        self.routes = {(prefix, int(faceId)): (origin, cost)
+                       for prefix, faceId, origin, cost in state['routes']}
+        self.strategies = state['strategies']
+        self.nextFaceId = state['nextFaceId']
+
+    def save(self, stateFile):
+        state = {
+            'faces': self.faces,
+            'routes': [[prefix, faceId, origin, cost]
+                       for (prefix, faceId), (origin, cost) in self.routes.items()],
+            'strategies': self.strategies,
+            'nextFaceId': self.nextFaceId
+        }
+        with open(stateFile, 'w') as f:
+            json.dump(state, f)
+
+    @staticmethod
+    def canonizeFaceUri(uri):
+        scheme, sep, address = uri.partition('://')
+        if not sep or scheme not in ['udp', 'udp4', 'tcp', 'tcp4']:
+            raise ValueError('Error during canonization: {}'.format(uri))
+        if ':' not in address:
+            address = '{}:{}'.format(address, DEFAULT_PORT)
+        return '{}4://{}'.format(scheme.rstrip('4'), address)
+
+    def findFace(self, nexthop):
+        if nexthop.isdigit():
+            return int(nexthop) if int(nexthop) in self.faces else None
+        remote = self.canonizeFaceUri(nexthop)
+        for faceId, uri in self.faces.items():
+            if uri == remote:
+                return faceId
+        return None
+
+    @staticmethod
+    def parseOptions(args, positional, defaults):
+        """Map nfdc arguments to option names; positional names may be given without a key"""
+        options = dict(defaults)
+        positional = list(positional)
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if arg in FLAGS:
+                options[arg] = True
+                i += 1
+            elif arg in KEYS and i + 1 < len(args):
+                options[arg] = args[i + 1]
+                if arg in positional:
+                    positional.remove(arg)
+                i += 2
+            elif arg in PERSISTENCIES:
+                options['persistency'] = arg
+                i += 1
+            elif positional:
+                options[positional.pop(0)] = arg
+                i += 1
+            else:
+                raise ValueError('Unexpected argument: {}'.format(arg))
+        return options
+
+    def faceCreate(self, args):
+        options = self.parseOptions(args, ['remote'], {'persistency': 'persistent'})
+        remote = self.canonizeFaceUri(options['remote'])
+        status = 'face-exists'
+        faceId = self.findFace(remote)
+        if faceId is None:
+            faceId = self.nextFaceId
+            self.nextFaceId += 1
+            self.faces[faceId] = remote
+            status = 'face-created'
+        return '{} id={} local={}://0.0.0.0:{} remote={} persistency={}'.format(
+            status, faceId, remote.split(':')[0], DEFAULT_PORT, remote, options['persistency'])
+
+    def faceDestroy(self, args):
+        options = self.parseOptions(args, ['face'], {})
+        faceId = self.findFace(options['face'])
+        if faceId is None:
+            raise ValueError('Face not found')
+        remote = self.faces.pop(faceId)
+        self.routes = {key: value for key, value in self.routes.items() if key[1] != faceId}
+        return 'face-destroyed id={} remote={}'.format(faceId, remote)
+
+    def routeAdd(self, args):
+        options = self.parseOptions(args, ['prefix', 'nexthop'],
+                                    {'origin': '255', 'cost': '0', 'expires': 'never'})
+        faceId = self.findFace(options['nexthop'])
+        if faceId is None:
+            raise ValueError('Face not found')
+        self.routes[(options['prefix'], faceId)] = (options['origin'], options['cost'])
+        return 'route-add-accepted prefix={} nexthop={} origin={} cost={} flags={} expires={}'.format(
+            options['prefix'], faceId, options['origin'], options['cost'],
+            'capture' if 'capture' in options else
+            ('none' if 'no-inherit' in options else 'child-inherit'), options['expires'])
+
+    def routeRemove(self, args):
+        options = self.parseOptions(args, ['prefix', 'nexthop'], {'origin': '255'})
+        faceId = self.findFace(options['nexthop'])
+        if faceId is None:
+            raise ValueError('Face not found')
+        self.routes.pop((options['prefix'], faceId), None)
+        return 'route-removed prefix={} nexthop={} origin={}'.format(
+            options['prefix'], faceId, options['origin'])
+
+    def strategySet(self, args):
+        options = self.parseOptions(args, ['prefix', 'strategy'], {})
+        strategy = options['strategy']
+        if strategy.startswith('ndn:'):
+            strategy = strategy[len('ndn:'):]
+        self.strategies[options['prefix']] = strategy
+        return 'strategy-set prefix={} strategy={}'.format(options['prefix'], strategy)
+
+    def strategyUnset(self, args):
+        options = self.parseOptions(args, ['prefix'], {})
+        if options['prefix'] == '/':
+            raise ValueError('Unsetting default strategy is prohibited')
+        self.strategies.pop(options['prefix'], None)
+        return 'strategy-unset prefix={}'.format(options['prefix'])
+
+    def execute(self, line):
+        args = line.split()
+        handlers = {
+            ('face', 'create'): self.faceCreate,
+            ('face', 'destroy'): self.faceDestroy,
+            ('route', 'add'): self.routeAdd,
+            ('route', 'remove'): self.routeRemove,
+            ('strategy', 'set'): self.strategySet,
+            ('strategy', 'unset'): self.strategyUnset,
+        }
+        handler = handlers.get(tuple(args[:2]))
+        if handler is None:
+            raise ValueError('Unknown command: {}'.format(line))
+        return handler(args[2:])
+
+def main():
+    parser = argparse.ArgumentParser(description='Stand-in for nfdc -f - without NFD')
+    parser.add_argument('--state', default='nfd-mock-state.json',
+                        help='File keeping the forwarder state between runs')
+    args = parser.parse_args()
+
+    nfd = MockNfd()
+    nfd.load(args.state)
+    for lineNumber, line in enumerate(sys.stdin, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            result = nfd.execute(line)
+            nfd.save(args.state)
+            print(result, flush=True)
+        except (ValueError, KeyError) as e:
+            print(e, file=sys.stderr, flush=True)
+            print('nfdc: failed to execute command on line {} in standard input'
+                  .format(lineNumber), file=sys.stderr, flush=True)
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
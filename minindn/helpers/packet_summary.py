@@ -0,0 +1,389 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Summaries of the NDN packets of a capture: frames (Ethernet, Linux cooked capture,
+with NDN directly over Ethernet or over UDP/TCP) are decoded down to the NDN TLV
+packet, whose type, name and size are kept. PcapStream decodes a libpcap stream
+incrementally, e.g. the output of tshark -w -, so that packets are summarized while
+they are captured instead of being stored.
+'''
+
+import csv
+import gzip
+import os
+import struct
+from collections import namedtuple
+
+# Columns of the packet summaries
+PacketRecord = namedtuple('PacketRecord', 'time node face direction type name size')
+FIELDS = list(PacketRecord._fields)
+
+NDN_ETHERTYPE = 0x8624
+NDN_PORTS = frozenset([6363, 56363])
+
+# libpcap link types
+LINKTYPE_ETHERNET = 1
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_LINUX_SLL2 = 276
+
+# NDN TLV types
+TLV_INTEREST = 0x05
+TLV_DATA = 0x06
+TLV_NAME = 0x07
+TLV_LP_PACKET = 0x64
+TLV_LP_FRAGMENT = 0x50
+TLV_LP_NACK = 0x0320
+
+_PACKET_TYPES = {TLV_INTEREST: 'Interest', TLV_DATA: 'Data'}
+# Name component type to its URI prefix, and whether its value is a number
+_COMPONENT_TYPES = {
+    0x01: ('sha256digest=', None), 0x02: ('params-sha256=', None),
+    0x32: ('32=', False), 0x33: ('seg=', True), 0x34: ('off=', True),
+    0x36: ('v=', True), 0x38: ('t=', True), 0x3a: ('seq=', True)
+}
+_UNRESERVED = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+
+def readVarNumber(buf, offset, end):
+    """Return (number, offset after it), raise IndexError if it is not complete"""
+    if offset >= end:
+        raise IndexError('truncated TLV')
+    first = buf[offset]
+    if first < 253:
+        return first, offset + 1
+    size = 1 << (first - 252)
+    if offset + 1 + size > end:
+        raise IndexError('truncated TLV')
+    return int.from_bytes(buf[offset + 1:offset + 1 + size], 'big'), offset + 1 + size
+
+def readTlv(buf, offset, end):
+    """Return (type, value offset, value end) of the TLV at offset; value end may exceed end"""
+    tlvType, offset = readVarNumber(buf, offset, end)
+    length, offset = readVarNumber(buf, offset, end)
+    return tlvType, offset, offset + length
+
+def _escape(value):
+    escaped = ''.join(chr(c) if c in _UNRESERVED else '%{:02X}'.format(c) for c in value)
+    # A component of periods only is written with three more periods
+    return escaped + '...' if escaped.strip('.') == '' else escaped
+
+def decodeName(buf, offset, end):
+    """Return the URI of the Name TLV value buf[offset:end]"""
+    components = []
+    while offset < end:
+        tlvType, valueStart, valueEnd = readTlv(buf, offset, end)
+        if valueEnd > end:
+            raise IndexError('truncated name')
+        value = bytes(buf[valueStart:valueEnd])
+        prefix, isNumber = _COMPONENT_TYPES.get(tlvType, (None, False))
+        if tlvType == 0x08:
+            components.append(_escape(value))
+        elif prefix is None:
+            components.append('{}={}'.format(tlvType, _escape(value)))
+        elif isNumber is None:
+            components.append(prefix + value.hex())
+        elif isNumber:
+            components.append('{}{}'.format(prefix, int.from_bytes(value, 'big')))
+        else:
+            components.append(prefix + _escape(value))
+        offset = valueEnd
+    return '/' + '/'.join(components)
+
+def locateNdnPacket(buf, offset, end):
+    """
+    Locate the NDN packet at offset, possibly inside an NDNLPv2 packet, in the captured
+    bytes ending at end. Returns (type, name start, name end, size) where the name
+    offsets delimit the value of the Name TLV, or are None when the name was not
+    captured. type is None for an LpPacket without fragment (e.g. an acknowledgement).
+    """
+    tlvType, valueStart, valueEnd = readTlv(buf, offset, end)
+    size = valueEnd - offset
+    if tlvType == TLV_LP_PACKET:
+        isNack = False
+        position = valueStart
+        while position < min(valueEnd, end):
+            fieldType, fieldStart, fieldEnd = readTlv(buf, position, end)
+            if fieldType == TLV_LP_NACK:
+                isNack = True
+            elif fieldType == TLV_LP_FRAGMENT:
+                try:
+                    innerType, nameStart, nameEnd, _ = locateNdnPacket(buf, fieldStart,
+                                                                       min(fieldEnd, end))
+                except IndexError:
+                    # Not captured, or not the first fragment of the packet
+                    innerType, nameStart, nameEnd = None, None, None
+                return ('Nack' if isNack else innerType or 'Fragment'), nameStart, nameEnd, size
+            position = fieldEnd
+        return None, None, None, size
+    packetType = _PACKET_TYPES.get(tlvType)
+    if packetType is None:
+        return 'TLV-{}'.format(tlvType), None, None, size
+    try:
+        nameType, nameStart, nameEnd = readTlv(buf, valueStart, end)
+        if nameType == TLV_NAME and nameEnd <= end:
+            return packetType, nameStart, nameEnd, size
+    except IndexError:
+        pass
+    return packetType, None, None, size
+
+def decodeNdnPacket(buf, offset, end):
+    """
+    Decode the NDN packet at offset, see locateNdnPacket. Returns (type, name, size),
+    name is None when it was not captured.
+    """
+    packetType, nameStart, nameEnd, size = locateNdnPacket(buf, offset, end)
+    try:
+        name = decodeName(buf, nameStart, nameEnd) if nameStart is not None else None
+    except IndexError:
+        name = None
+    return packetType, name, size
+
+def _decodeTransport(buf, offset, end, etherType):
+    """Return (offset, end, isStream) of the NDN payload of an IP packet or Ethernet frame"""
+    if etherType == NDN_ETHERTYPE:
+        return offset, end, False
+    if etherType == 0x0800:
+        if offset + 20 > end or buf[offset + 6] & 0x1f or buf[offset + 7]:
+            # Truncated header or non-first fragment
+            return None
+        protocol = buf[offset + 9]
+        offset += (buf[offset] & 0x0f) * 4
+    elif etherType == 0x86DD:
+        if offset + 40 > end:
+            return None
+        protocol = buf[offset + 6]
+        offset += 40
+    else:
+        return None
+
+    if protocol == 17 and offset + 8 <= end:
+        ports = struct.unpack_from('!HH', buf, offset)
+        offset += 8
+        isStream = False
+    elif protocol == 6 and offset + 20 <= end:
+        ports = struct.unpack_from('!HH', buf, offset)
+        offset += (buf[offset + 12] >> 4) * 4
+        isStream = True
+    else:
+        return None
+    if ports[0] not in NDN_PORTS and ports[1] not in NDN_PORTS:
+        return None
+    return offset, end, isStream
+
+def locateFramePackets(buf, offset, end, linkType, localMacs=None):
+    """
+    Locate the NDN packets of a captured frame. Returns (direction, ifindex, packets) with
+    packets a list of locateNdnPacket results, or None when the frame is not NDN traffic.
+    direction is 'in', 'out' or '' when the link type does not tell.
+
+    :param localMacs: (optional) MAC addresses (6 bytes) of the node, which tell the
+      direction of Ethernet frames: sent when their source is one of them
+    """
+    direction = ''
+    ifindex = None
+    if linkType == LINKTYPE_ETHERNET:
+        if offset + 14 > end:
+            return None
+        if localMacs:
+            direction = 'out' if bytes(buf[offset + 6:offset + 12]) in localMacs else 'in'
+        etherType = struct.unpack_from('!H', buf, offset + 12)[0]
+        offset += 14
+        if etherType == 0x8100 and offset + 4 <= end:
+            etherType = struct.unpack_from('!H', buf, offset + 2)[0]
+            offset += 4
+    elif linkType == LINKTYPE_LINUX_SLL:
+        if offset + 16 > end:
+            return None
+        packetType = struct.unpack_from('!H', buf, offset)[0]
+        etherType = struct.unpack_from('!H', buf, offset + 14)[0]
+        direction = 'out' if packetType == 4 else 'in'
+        offset += 16
+    elif linkType == LINKTYPE_LINUX_SLL2:
+        if offset + 20 > end:
+            return None
+        etherType, _, ifindex = struct.unpack_from('!HHI', buf, offset)
+        direction = 'out' if buf[offset + 10] == 4 else 'in'
+        offset += 20
+    else:
+        return None
+
+    payload = _decodeTransport(buf, offset, end, etherType)
+    if payload is None:
+        return None
+    offset, end, isStream = payload
+
+    packets = []
+    # A TCP segment may hold several packets; one starting in an earlier segment
+    # is not found
+    while offset < end:
+        try:
+            packet = locateNdnPacket(buf, offset, end)
+        except IndexError:
+            break
+        if packet[0] is not None:
+            packets.append(packet)
+        if not isStream:
+            break
+        offset += packet[3]
+    return direction, ifindex, packets
+
+def decodeFrame(buf, offset, end, linkType, localMacs=None):
+    """
+    Decode a captured frame. Returns (direction, ifindex, packets) with packets a list
+    of (type, name, size), or None when the frame is not NDN traffic.
+    """
+    located = locateFramePackets(buf, offset, end, linkType, localMacs)
+    if located is None:
+        return None
+    direction, ifindex, packets = located
+    decoded = []
+    for packetType, nameStart, nameEnd, size in packets:
+        try:
+            name = decodeName(buf, nameStart, nameEnd) if nameStart is not None else None
+        except IndexError:
+            name = None
+        decoded.append((packetType, name, size))
+    return direction, ifindex, decoded
+
+class PcapError(ValueError):
+    pass
+
+PCAP_MAGICS = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e-6), b'\xa1\xb2\xc3\xd4': ('>', 1e-6),
+    b'\x4d\x3c\xb2\xa1': ('<', 1e-9), b'\xa1\xb2\x3c\x4d': ('>', 1e-9)
+}
+
+class PcapStream(object):
+    """Incremental reader of a libpcap stream"""
+    def __init__(self):
+        self.buffer = bytearray()
+        self.linkType = None
+        self.recordHeader = None
+        self.resolution = None
+
+    def feed(self, data):
+        """Add data read from the stream, yield (timestamp, original length, frame) tuples"""
+        self.buffer += data
+        offset = 0
+        if self.linkType is None:
+            if len(self.buffer) < 24:
+                return
+            magic = bytes(self.buffer[:4])
+            if magic not in PCAP_MAGICS:
+                raise PcapError('Not a libpcap stream (pcapng is not supported here, '
+                                'use tshark -F pcap)')
+            byteOrder, self.resolution = PCAP_MAGICS[magic]
+            self.recordHeader = struct.Struct(byteOrder + 'IIII')
+            self.linkType = struct.unpack_from(byteOrder + 'I', self.buffer, 20)[0] & 0x0fffffff
+            offset = 24
+
+        size = len(self.buffer)
+        while offset + 16 <= size:
+            seconds, fraction, capturedLength, originalLength = \
+                self.recordHeader.unpack_from(self.buffer, offset)
+            if offset + 16 + capturedLength > size:
+                break
+            start = offset + 16
+            yield (seconds + fraction * self.resolution, originalLength,
+                   bytes(self.buffer[start:start + capturedLength]))
+            offset = start + capturedLength
+        del self.buffer[:offset]
+
+class PacketSummaryWriter(object):
+    """Write PacketRecords to a gzip compressed CSV file"""
+    def __init__(self, fileName, compressLevel=6):
+        self.fileName = fileName
+        self.file = gzip.open(fileName, 'wt', compresslevel=compressLevel, newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(FIELDS)
+        self.count = 0
+
+    def write(self, record):
+        self.writer.writerow(['{:.6f}'.format(record.time)] + list(record[1:]))
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+def summarizeFrame(node, face, linkType, timestamp, frame, faces=None, localMacs=None):
+    """
+    Return the PacketRecords of a captured frame
+
+    :param faces: (optional) ifindex to interface name, for captures on the any interface
+    :param localMacs: (optional) MAC addresses of the node, see locateFramePackets
+    """
+    decoded = decodeFrame(frame, 0, len(frame), linkType, localMacs)
+    if decoded is None:
+        return []
+    direction, ifindex, packets = decoded
+    if ifindex is not None and faces:
+        face = faces.get(ifindex, face)
+    return [PacketRecord(timestamp, node, face, direction, packetType, name or '', size)
+            for packetType, name, size in packets]
+
+def readSummary(fileName):
+    """Read a packet summary file written by PacketSummaryWriter"""
+    with gzip.open(fileName, 'rt', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return [PacketRecord(float(row[0]), row[1], row[2], row[3], row[4], row[5], int(row[6]))
+                for row in reader]
+
+def parseInterfaces(ipLinkOutput):
+    """
+    Parse the output of ip -o link show into {ifindex: (name, MAC address)}, the address
+    is 6 bytes or None for interfaces without an Ethernet address
+    """
+    interfaces = {}
+    for line in ipLinkOutput.splitlines():
+        fields = line.split(':')
+        if len(fields) > 2 and fields[0].strip().isdigit():
+            name = fields[1].strip().split('@')[0]
+            words = line.split()
+            mac = None
+            if 'link/ether' in words and words.index('link/ether') + 1 < len(words):
+                mac = bytes.fromhex(words[words.index('link/ether') + 1].replace(':', ''))
+            interfaces[int(fields[0])] = (name, mac)
+    return interfaces
+
+def interfacesFileName(folder, node):
+    return os.path.join(folder, '{}-interfaces.txt'.format(node))
+
+def writeInterfaces(fileName, interfaces):
+    """Write the interfaces of a node next to its captures, read by readInterfaces"""
+    with open(fileName, 'w') as f:
+        for ifindex, (name, mac) in sorted(interfaces.items()):
+            f.write('{} {} {}\n'.format(ifindex, name, mac.hex() if mac else '-'))
+
+def readInterfaces(fileName):
+    """Read a file written by writeInterfaces, {} if it does not exist"""
+    interfaces = {}
+    if not os.path.isfile(fileName):
+        return interfaces
+    with open(fileName) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) == 3:
+                interfaces[int(fields[0])] = (fields[1], None if fields[2] == '-'
+                                                         else bytes.fromhex(fields[2]))
+    return interfaces
@@ -21,32 +21,292 @@
 # along with Mini-NDN, e.g., in COPYING.md file.
 # If not, see <http://www.gnu.org/licenses/>.
 
+"""
+Sampling of the resource usage of processes, e.g. NFD on every node.
+
+A single ProcessSampler thread samples any number of processes. The /proc files of
+each process stay open and are re-read in place. The CPU time, memory, I/O and
+context switches of each process are parsed into fixed-width numeric records in a
+preallocated numpy buffer, and the buffer is written to a CSV or binary file in bulk:
+
+    sampler = ProcessSampler('{}/process-stats.csv'.format(ndn.workDir), interval=1)
+    for nfd in nfds:
+        sampler.add(nfd.process.pid, '{}-nfd'.format(nfd.node.name))
+    sampler.start()
+    ...
+    sampler.stop()
+    samples = readSamples('{}/process-stats.csv'.format(ndn.workDir))
+"""
+
+import atexit
+import os
+import threading
 import time
 
-from threading import Timer
+import numpy as np
+from mininet.log import debug, warn
+
+# Fields of a sample, utime and stime are in seconds, rss in bytes
+RECORD_DTYPE = np.dtype([
+    ('time', '<f8'), ('pid', '<i4'), ('threads', '<i4'),
+    ('utime', '<f8'), ('stime', '<f8'), ('rss', '<u8'),
+    ('readBytes', '<u8'), ('writeBytes', '<u8'),
+    ('voluntaryCtxSwitches', '<u8'), ('involuntaryCtxSwitches', '<u8')
+])
+_CSV_FORMATS = ['%.6f', '%d', '%d', '%.2f', '%.2f', '%d', '%d', '%d', '%d', '%d']
+_CLOCK_TICKS = float(os.sysconf('SC_CLK_TCK'))
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+_READ_SIZE = 4096
+
+class _MonitoredProcess(object):
+    """Open /proc files of a sampled process"""
+    def __init__(self, pid, name, rawLog=None):
+        self.pid = pid
+        self.name = name
+        self.rawLog = rawLog
+        self.stat = os.open('/proc/{}/stat'.format(pid), os.O_RDONLY)
+        self.status = self._openOptional('/proc/{}/status'.format(pid))
+        # Only readable by the owner of the process or root
+        self.io = self._openOptional('/proc/{}/io'.format(pid))
+
+    @staticmethod
+    def _openOptional(fileName):
+        try:
+            return os.open(fileName, os.O_RDONLY)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _fields(fd, names):
+        """Values of the 'name: value' lines of an open /proc file"""
+        values = dict.fromkeys(names, 0)
+        if fd is None:
+            return values
+        try:
+            for line in os.pread(fd, _READ_SIZE, 0).split(b'\n'):
+                key, _, value = line.partition(b':')
+                if key in values:
+                    values[key] = int(value)
+        except OSError:
+            pass
+        return values
+
+    def sample(self, now, record):
+        """Fill record with a sample, return False once the process has exited"""
+        try:
+            stat = os.pread(self.stat, _READ_SIZE, 0)
+        except OSError:
+            return False
+        if not stat:
+            return False
+        if self.rawLog is not None:
+            self.rawLog.write('{} {}'.format(int(now), stat.decode('utf-8', 'replace')))
+        # The command name may hold spaces, the other fields follow its closing parenthesis
+        fields = stat[stat.rindex(b')') + 2:].split()
+        io = self._fields(self.io, (b'read_bytes', b'write_bytes'))
+        status = self._fields(self.status, (b'voluntary_ctxt_switches',
+                                            b'nonvoluntary_ctxt_switches'))
+        record['time'] = now
+        record['pid'] = self.pid
+        record['threads'] = int(fields[17])
+        record['utime'] = int(fields[11]) / _CLOCK_TICKS
+        record['stime'] = int(fields[12]) / _CLOCK_TICKS
+        record['rss'] = int(fields[21]) * _PAGE_SIZE
+        record['readBytes'] = io[b'read_bytes']
+        record['writeBytes'] = io[b'write_bytes']
+        record['voluntaryCtxSwitches'] = status[b'voluntary_ctxt_switches']
+        record['involuntaryCtxSwitches'] = status[b'nonvoluntary_ctxt_switches']
+        return True
+
+    def close(self):
+        for fd in (self.stat, self.status, self.io):
+            if fd is not None:
+                os.close(fd)
+        if self.rawLog is not None:
+            self.rawLog.close()
+
+class ProcessSampler(object):
+    def __init__(self, outputFile, interval=1, bufferRecords=4096, binary=None):
+        """
+        Sample processes every interval seconds from a single thread
+
+        :param outputFile: CSV file of the samples, or binary file of RECORD_DTYPE records
+          if it ends with .bin. The names of the processes are written to outputFile.names
+        :param interval: (optional) Seconds between two samples
+        :param bufferRecords: (optional) Samples buffered before they are written
+        :param binary: (optional) Force the binary format, default from the file extension
+        """
+        self.outputFile = outputFile
+        self.interval = interval
+        self.binary = outputFile.endswith('.bin') if binary is None else binary
+        self.buffer = np.zeros(bufferRecords, dtype=RECORD_DTYPE)
+        self.count = 0
+        self.processes = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.output = open(outputFile, 'ab' if self.binary else 'a')
+        if not self.binary and self.output.tell() == 0:
+            self.output.write(','.join(RECORD_DTYPE.names) + '\n')
+        self.names = open('{}.names'.format(outputFile), 'a')
+
+    def add(self, pid, name=None, rawLog=None):
+        """
+        Sample the process pid from now on
+
+        :param name: (optional) Name of the process in outputFile.names
+        :param rawLog: (optional) File object the raw /proc/pid/stat lines are appended to
+        """
+        pid = int(pid)
+        process = _MonitoredProcess(pid, name or str(pid), rawLog)
+        with self.lock:
+            if pid in self.processes:
+                self.processes.pop(pid).close()
+            self.processes[pid] = process
+            self.names.write('{} {}\n'.format(pid, process.name))
+            self.names.flush()
+
+    def remove(self, pid):
+        with self.lock:
+            process = self.processes.pop(int(pid), None)
+        if process is not None:
+            process.close()
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='process-sampler', daemon=True)
+            self.thread.start()
+        return self
+
+    def _run(self):
+        nextSample = time.monotonic()
+        while not self.stopped.is_set():
+            self.sample()
+            nextSample += self.interval
+            # Keep the sampling times aligned even if a sample is slow
+            self.stopped.wait(max(0, nextSample - time.monotonic()))
+
+    def sample(self):
+        """Take one sample of every process"""
+        now = time.time()
+        with self.lock:
+            exited = []
+            for pid, process in self.processes.items():
+                if self.count == len(self.buffer):
+                    self._flush()
+                if process.sample(now, self.buffer[self.count]):
+                    self.count += 1
+                else:
+                    exited.append(pid)
+            for pid in exited:
+                debug('Process {} ({}) exited, no longer sampled\n'
+                      .format(pid, self.processes[pid].name))
+                self.processes.pop(pid).close()
+
+    def _flush(self):
+        if self.count == 0:
+            return
+        records = self.buffer[:self.count]
+        try:
+            if self.binary:
+                records.tofile(self.output)
+            else:
+                np.savetxt(self.output, records, fmt=_CSV_FORMATS, delimiter=',')
+            self.output.flush()
+        except (IOError, OSError) as e:
+            warn('Cannot write process samples to {}: {}\n'.format(self.outputFile, e))
+        self.count = 0
+
+    def flush(self):
+        """Write the buffered samples"""
+        with self.lock:
+            self._flush()
+
+    def stop(self):
+        """Stop sampling, write the buffered samples and close the files"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        with self.lock:
+            self._flush()
+            for process in self.processes.values():
+                process.close()
+            self.processes = {}
+        self.output.close()
+        self.names.close()
+
+def readSamples(fileName):
+    """Read the samples written by a ProcessSampler as a numpy structured array"""
+    if fileName.endswith('.bin'):
+        return np.fromfile(fileName, dtype=RECORD_DTYPE)
+    return np.atleast_1d(np.genfromtxt(fileName, delimiter=',', names=True, dtype=RECORD_DTYPE))
+
+# Samplers shared by the ProcessMonitors with the same output directory and interval
+_samplers = {}
+_samplersLock = threading.Lock()
+
+@atexit.register
+def _stopSamplers():
+    """Write the samples still buffered by the ProcessMonitor samplers"""
+    with _samplersLock:
+        samplers = list(_samplers.values())
+        _samplers.clear()
+    for sampler in samplers:
+        sampler.stop()
 
 class ProcessMonitor(object):
+    """
+    Append the /proc/PID/stat line of a process to <outputDir>/<name>-<PID>-stat.txt
+    every interval seconds. The processes of all the monitors of an output directory and
+    interval are sampled by one ProcessSampler thread, which also writes their numeric
+    samples to <outputDir>/process-stats.csv.
+    """
     def __init__(self, processId, processName, outputDir, interval=1):
         self._processId = processId.strip()
         self._processName = processName
-        self._statFile = '/proc/{}/stat'.format(self._processId)
         self._logFile = '{}/{}-{}-stat.txt'.format(outputDir, self._processName, self._processId)
+        self._outputDir = outputDir
         self._interval = interval
 
-    def _recordStats(self):
-        try:
-            with open(self._statFile, 'r') as stat:
-                currentTime = int(time.time())
-                with open(self._logFile, 'a') as log:
-                    for line in stat:
-                        log.write('{} {}'.format(currentTime, line))
-        except IOError as e:
-            print('I/O error({0}): {1}'.format(e.errno, e.strerror))
-            print('No process with PID={}'.format(self._processId))
-            return
-
-        self.start() # Reschedule event
-
     def start(self):
-        self._timer = Timer(self._interval, self._recordStats)
-        self._timer.start()
+        key = (os.path.abspath(self._outputDir), self._interval)
+        rawLog = None
+        # Held while adding, so that stop does not close a sampler a process is being added to
+        with _samplersLock:
+            if key not in _samplers:
+                _samplers[key] = ProcessSampler('{}/process-stats.csv'.format(self._outputDir),
+                                                self._interval).start()
+            sampler = _samplers[key]
+            try:
+                rawLog = open(self._logFile, 'a', buffering=1)
+                sampler.add(self._processId, self._processName, rawLog=rawLog)
+            except (IOError, OSError) as e:
+                if rawLog is not None:
+                    rawLog.close()
+                if not sampler.processes:
+                    del _samplers[key]
+                    sampler.stop()
+                print('I/O error({0}): {1}'.format(e.errno, e.strerror))
+                print('No process with PID={}'.format(self._processId))
+
+    def stop(self):
+        """
+        Stop sampling the process and write the buffered samples, so that process-stats.csv
+        is complete before the results are collected. The sampler is stopped and its files
+        closed once it samples no process.
+        """
+        key = (os.path.abspath(self._outputDir), self._interval)
+        with _samplersLock:
+            sampler = _samplers.get(key)
+            if sampler is None:
+                return
+            sampler.remove(self._processId)
+            with sampler.lock:
+                idle = not sampler.processes
+            if idle:
+                del _samplers[key]
+        if idle:
+            sampler.stop()
+        else:
+            sampler.flush()
@@ -25,18 +25,24 @@ import argparse
 import sys
 import time
 import os
-import configparser
 from subprocess import call, Popen, PIPE
-import shutil
-import glob
 from traceback import format_exc
+from collections import OrderedDict
+from joblib import Parallel, delayed
 
 from mininet.topo import Topo
 from mininet.net import Mininet
 from mininet.link import TCLink
 from mininet.node import Switch
 from mininet.util import ipStr, ipParse
-from mininet.log import info, debug, error
+from mininet.log import info, debug, error, warn
+
+from minindn.util import captureEnv, waitUntil
+from minindn.topology import Topology, TopologyError, WIRED_SECTIONS, CACHE_DIR_NAME
+from minindn.results import collectResults, writeArchive, MODES as RESULT_MODES
+
+# Maximum number of seconds Minindn.start waits for the links of the hosts to be up
+INTERFACE_TIMEOUT = 10
 
 class Minindn(object):
     """
@@ -52,6 +58,8 @@ class Minindn(object):
     ndnSecurityDisabled = False
     workDir = '/tmp/minindn'
     resultDir = None
+    tracer = None
+    cgroups = None
 
     def __init__(self, parser=argparse.ArgumentParser(), topo=None, topoFile=None, noTopo=False,
                  link=TCLink, workDir=None, **mininetParams):
@@ -75,6 +83,8 @@ class Minindn(object):
             Minindn.workDir = os.path.abspath(workDir)
 
         Minindn.resultDir = self.args.resultDir
+        Minindn.enableTracing(self.args.traceFile)
+        Minindn.enableCgroups(self.args.cgroups, self.args.nodeCpuQuota)
 
         if not topoFile:
             # Args has default topology if none specified
@@ -86,9 +96,10 @@ class Minindn(object):
         if topo is None and not noTopo:
             try:
                 info('Using topology file {}\n'.format(self.topoFile))
-                self.topo, self.faces_to_create = self.processTopo(self.topoFile)
-            except configparser.NoSectionError as e:
-                info('Error reading config file: {}\n'.format(e))
+                cacheDir = '{}/{}'.format(Minindn.workDir, CACHE_DIR_NAME)
+                self.topo, self.faces_to_create = self.processTopo(self.topoFile, cacheDir)
+            except (TopologyError, IOError) as e:
+                info('Error reading topology file: {}\n'.format(e))
                 sys.exit(1)
         else:
             self.topo = topo
@@ -132,115 +143,212 @@ class Minindn(object):
                             help='Specify the full path destination folder where experiment \
                             results will be moved')
 
+        parser.add_argument('--result-mode', action='store', dest='resultMode', default='move',
+                            choices=RESULT_MODES,
+                            help='Move, hardlink or copy the results to the result directory; \
+                            default is move')
+
+        parser.add_argument('--result-archive', action='store', dest='resultArchive', default=None,
+                            help='Also write the results to this .tar, .tar.gz, .tar.xz or \
+                            .tar.zst archive, with a manifest of the archived files')
+
+        parser.add_argument('--trace', action='store', dest='traceFile', default=None,
+                            help='Record the node commands, processes and sleeps of the \
+                            experiment and write them as a Chrome trace to this file')
+
+        parser.add_argument('--cgroups', action='store_true', dest='cgroups', default=False,
+                            help='Run each application in its own cgroup (v2) and report \
+                            its CPU, memory and I/O usage at the end of the experiment')
+
+        parser.add_argument('--node-cpu-quota', action='store', dest='nodeCpuQuota', type=float,
+                            default=None, help='Limit the applications of each node to this \
+                            number of CPUs (implies --cgroups)')
+
         return parser
 
+    @staticmethod
+    def enableCgroups(enabled, nodeCpuQuota=None):
+        """Start the per application cgroups if enabled or if a node CPU quota is given"""
+        if not (enabled or nodeCpuQuota is not None) or Minindn.cgroups is not None:
+            return
+        from minindn.cgroups import CgroupManager
+        try:
+            Minindn.cgroups = CgroupManager(nodeCpuQuota)
+        except (IOError, OSError) as e:
+            warn('Application cgroups are disabled: {}\n'.format(e))
+
+    @staticmethod
+    def finishCgroups():
+        """Write the resource usage of the applications and remove their cgroups"""
+        cgroups, Minindn.cgroups = Minindn.cgroups, None
+        if cgroups is not None:
+            cgroups.finish(Minindn.workDir)
+
+    @staticmethod
+    def enableTracing(traceFile):
+        """Start recording a trace written to traceFile by stop, if traceFile is set"""
+        if traceFile is None or Minindn.tracer is not None:
+            return
+        from minindn.tracer import Tracer
+        Minindn.tracer = Tracer().enable()
+        Minindn.tracer.fileName = os.path.abspath(traceFile)
+
+    @staticmethod
+    def writeTrace():
+        """Stop recording and write the trace, if tracing was enabled"""
+        tracer, Minindn.tracer = Minindn.tracer, None
+        if tracer is None:
+            return
+        tracer.disable()
+        tracer.writeChromeTrace(tracer.fileName)
+        info('Trace written to {}\n'.format(tracer.fileName))
+        info(tracer.summary())
+
     def ethernetPairConnectivity(self):
-        ndnNetBase = '10.0.0.0'
-        interfaces = []
-        for host in self.net.hosts:
+        """
+        Give each link between two hosts its own /30 subnet. All addresses are planned
+        first, then each node applies its addresses with a single ip -batch command,
+        concurrently across nodes.
+        """
+        plan = Minindn.planPairAddresses(self.net.hosts)
+        Parallel(n_jobs=-1, require='sharedmem', prefer='threads')(
+            delayed(Minindn.applyAddresses)(node, addresses) for node, addresses in plan.items())
+
+    @staticmethod
+    def planPairAddresses(hosts, netBase='10.0.0.0'):
+        """
+        Assign consecutive /30 subnets of netBase to the host to host links, in the order
+        of the hosts and their interfaces. Returns {node: [(intf, 'ip/30')]}.
+        """
+        plan = OrderedDict()
+        assigned = set()
+        subnet = ipParse(netBase)
+        for host in hosts:
             for intf in host.intfList():
                 link = intf.link
+                if link is None or link.intf1 in assigned or link.intf2 in assigned:
+                    continue
                 node1, node2 = link.intf1.node, link.intf2.node
 
                 if isinstance(node1, Switch) or isinstance(node2, Switch):
                     continue
 
-                if link.intf1 not in interfaces and link.intf2 not in interfaces:
-                    interfaces.append(link.intf1)
-                    interfaces.append(link.intf2)
-                    node1.setIP(ipStr(ipParse(ndnNetBase) + 1) + '/30', intf=link.intf1)
-                    node2.setIP(ipStr(ipParse(ndnNetBase) + 2) + '/30', intf=link.intf2)
-                    ndnNetBase = ipStr(ipParse(ndnNetBase) + 4)
+                assigned.add(link.intf1)
+                assigned.add(link.intf2)
+                plan.setdefault(node1, []).append((link.intf1, ipStr(subnet + 1) + '/30'))
+                plan.setdefault(node2, []).append((link.intf2, ipStr(subnet + 2) + '/30'))
+                subnet += 4
+        return plan
 
     @staticmethod
-    def processTopo(topoFile):
-        config = configparser.ConfigParser(delimiters=' ', allow_no_value=True)
-        config.read(topoFile)
-        topo = Topo()
+    def applyAddresses(node, addresses):
+        """
+        Replace the addresses of the interfaces of node and bring them up with one
+        ip -batch command
 
-        items = config.items('nodes')
-        coordinates = []
+        :param addresses: list of (intf, 'ip/prefixLen')
+        """
+        batchFile = '{}/ip.batch'.format(node.params['params']['homeDir'])
+        with open(batchFile, 'w') as f:
+            for intf, address in addresses:
+                f.write('addr flush dev {}\n'.format(intf))
+                f.write('addr add {} dev {}\n'.format(address, intf))
+                f.write('link set {} up\n'.format(intf))
+        output = node.cmd('ip -batch {}'.format(batchFile))
+        if output.strip():
+            warn('[{}] ip -batch: {}\n'.format(node.name, output.strip()))
+        for intf, address in addresses:
+            intf.ip, intf.prefixLen = address.split('/')
 
-        for item in items:
-            name = item[0].split(':')[0]
-            params = {}
-            if item[1]:
-                if all (x in item[1] for x in ['radius', 'angle']) and item[1] in coordinates:
-                    error("FATAL: Duplicate Coordinate, \'{}\' used by multiple nodes\n" \
-                        .format(item[1]))
-                    sys.exit(1)
-                coordinates.append(item[1])
+    @staticmethod
+    def processTopo(topoFile, cacheDir=None):
+        """
+        Build the topology from an INI or JSON topology file
 
-                for param in item[1].split(' '):
-                    if param == '_':
-                        continue
-                    params[param.split('=')[0]] = param.split('=')[1]
+        :param cacheDir: (optional) directory where the validated topology is cached
+        """
+        return Minindn.buildTopo(Topology.load(topoFile, WIRED_SECTIONS, cacheDir))
 
-            topo.addHost(name, params=params)
+    @staticmethod
+    def buildTopo(topology):
+        """
+        Build the Mininet topology of a Topology, e.g. one from minindn.topology_generator.
+        Returns (topo, faces).
+        """
+        topo = Topo()
 
-        try:
-            items = config.items('switches')
-            for item in items:
-                name = item[0].split(':')[0]
-                topo.addSwitch(name)
-        except configparser.NoSectionError:
-            # Switches are optional
-            pass
+        for name, params in topology.nodes['nodes']:
+            topo.addHost(name, params=params)
 
-        items = config.items('links')
-        for item in items:
-            link = item[0].split(':')
+        # Switches are optional
+        for name, _ in topology.nodes.get('switches', []):
+            topo.addSwitch(name)
 
-            params = {}
-            for param in item[1].split(' '):
-                key = param.split('=')[0]
-                value = param.split('=')[1]
-                if key in ['bw', 'jitter', 'max_queue_size']:
-                    value = int(value)
-                if key == 'loss':
-                    value = float(value)
-                params[key] = value
+        for node1, node2, params in topology.links:
+            topo.addLink(node1, node2, **params)
 
-            topo.addLink(link[0], link[1], **params)
+        return (topo, topology.faces)
 
-        faces = {}
-        try:
-            items = config.items('faces')
-            debug("Faces")
-            for item in items:
-                face_a, face_b = item[0].split(':')
-                debug(item)
-                cost = -1
-                for param in item[1].split(' '):
-                    if param.split("=")[0] == 'cost':
-                        cost = param.split("=")[1]
-                face_info = (face_b, int(cost))
-                if face_a not in faces:
-                    faces[face_a] = [face_info]
-                else:
-                    faces[face_a].append(face_info)
-        except configparser.NoSectionError:
-            debug("Faces section is optional")
-            pass
+    def start(self, timeout=INTERFACE_TIMEOUT):
+        """
+        Start the network and wait until the links of all hosts are up
 
-        return (topo, faces)
+        :param timeout: (optional) maximum number of seconds to wait for the links
+        """
+        self.net.start()
+        self.waitForInterfaces(self.net.hosts, timeout)
 
-        return topo
+    @staticmethod
+    def areInterfacesUp(node):
+        """Return True if the link of every interface of node is up"""
+        upIntfs = set()
+        # Lines look like: 2: a-eth0@if3: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 ...
+        for line in node.cmd('ip -o link show').splitlines():
+            fields = line.split(': ', 2)
+            if len(fields) == 3 and 'LOWER_UP' in fields[2].partition('>')[0]:
+                upIntfs.add(fields[1].partition('@')[0])
+        return all(intf in upIntfs for intf in node.intfNames() if intf != 'lo')
 
-    def start(self):
-        self.net.start()
-        time.sleep(3)
+    @staticmethod
+    def waitForInterfaces(nodes, timeout=INTERFACE_TIMEOUT):
+        """
+        Probe the interfaces of the nodes concurrently until they are all up or the timeout
+        expires. Returns the nodes whose interfaces are not all up.
+        """
+        if not nodes:
+            return []
+        ready = Parallel(n_jobs=-1, require='sharedmem', prefer='threads')(
+            delayed(waitUntil)(lambda node=node: Minindn.areInterfacesUp(node), timeout, 0.1)
+            for node in nodes)
+        notReady = [node for node, isReady in zip(nodes, ready) if not isReady]
+        for node in notReady:
+            warn('[{}] Interfaces are not up after {} seconds\n'.format(node.name, timeout))
+        return notReady
 
     def stop(self):
         for cleanup in self.cleanups:
             cleanup()
         self.net.stop()
+        Minindn.writeTrace()
+        Minindn.finishCgroups()
+        self.collectResults()
+
+    def collectResults(self):
+        """
+        Write the result archive and move (or hardlink or copy) the content of the working
+        directory to the result directory, as requested on the command line
+        """
+        # The topology cache is reused by the next runs, leave it in the working directory
+        exclude = [CACHE_DIR_NAME]
+        archive = getattr(self.args, 'resultArchive', None)
+        if archive is not None:
+            info('Archiving results to \'{}\'\n'.format(archive))
+            writeArchive(Minindn.workDir, archive, exclude)
 
         if Minindn.resultDir is not None:
-            info("Moving results to \'{}\'\n".format(Minindn.resultDir))
-            os.system("mkdir -p {}".format(Minindn.resultDir))
-            for file in glob.glob('{}/*'.format(Minindn.workDir)):
-                shutil.move(file, Minindn.resultDir)
+            mode = getattr(self.args, 'resultMode', 'move')
+            info('Collecting results to \'{}\' ({})\n'.format(Minindn.resultDir, mode))
+            collectResults(Minindn.workDir, Minindn.resultDir, mode, exclude=exclude)
 
     @staticmethod
     def cleanUp():
@@ -251,7 +359,7 @@ class Minindn(object):
     @staticmethod
     def verifyDependencies():
         """Prevent MiniNDN from running without necessary dependencies"""
-        dependencies = ['nfd', 'nlsr', 'infoedit', 'ndnping', 'ndnpingserver']
+        dependencies = ['nfd', 'nlsr', 'ndnping', 'ndnpingserver']
         devnull = open(os.devnull, 'w')
         # Checks that each program is in the system path
         for program in dependencies:
@@ -293,6 +401,8 @@ class Minindn(object):
             host.params['params']['homeDir'] = homeDir
             host.cmd('mkdir -p {}'.format(homeDir))
             host.cmd('export HOME={} && cd ~'.format(homeDir))
+            # Cache the environment so that starting applications does not run printenv
+            captureEnv(host)
 
     def nfdcBatchProcessing(self, station, faces):
         # Input format: [IP, protocol, isPermanent]
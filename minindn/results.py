@@ -0,0 +1,207 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Collection of the experiment results left in the working directory once the
+network is stopped: the node directories (logs, pcaps, configurations) are moved,
+hardlinked or copied to the result directory concurrently, and can be streamed into
+a single tar archive with a manifest of every file, its size and its sha256.
+'''
+
+import errno
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import time
+
+from joblib import Parallel, delayed
+from mininet.log import info, debug
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MODES = ['move', 'link', 'copy']
+MANIFEST_NAME = 'MANIFEST.json'
+# Upper bound on the number of entries of the working directory collected at the same time
+DEFAULT_MAX_WORKERS = 16
+
+# Archive name suffix to tarfile compression
+_COMPRESSIONS = [('.tar.gz', 'gz'), ('.tgz', 'gz'), ('.tar.xz', 'xz'), ('.tar.bz2', 'bz2'),
+                 ('.tar.zst', 'zst'), ('.tar', '')]
+
+def archiveCompression(fileName):
+    """Return the compression of the archive fileName from its extension"""
+    for suffix, compression in _COMPRESSIONS:
+        if fileName.endswith(suffix):
+            return compression
+    raise ValueError('Unknown archive type {}, expected one of {}'
+                     .format(fileName, ', '.join(suffix for suffix, _ in _COMPRESSIONS)))
+
+def _linkTree(source, destination):
+    """Recreate the directory tree source in destination with hardlinks to its files"""
+    if not os.path.isdir(source):
+        try:
+            os.link(source, destination)
+        except OSError as e:
+            # Hardlinks do not cross filesystems
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.copy2(source, destination)
+        return
+    os.makedirs(destination, exist_ok=True)
+    for entry in os.listdir(source):
+        _linkTree(os.path.join(source, entry), os.path.join(destination, entry))
+
+def _collectEntry(path, resultDir, mode):
+    destination = os.path.join(resultDir, os.path.basename(path))
+    if mode == 'move':
+        shutil.move(path, resultDir)
+    elif mode == 'link':
+        _linkTree(path, destination)
+    elif os.path.isdir(path):
+        shutil.copytree(path, destination, symlinks=True)
+    else:
+        shutil.copy2(path, destination)
+
+def _listEntries(workDir, exclude):
+    if not os.path.isdir(workDir):
+        return []
+    return [os.path.join(workDir, entry) for entry in sorted(os.listdir(workDir))
+            if entry not in exclude]
+
+def collectResults(workDir, resultDir, mode='move', maxWorkers=DEFAULT_MAX_WORKERS, exclude=()):
+    """
+    Move, hardlink or copy every entry of workDir to resultDir, several entries at a time
+
+    :param workDir: Directory holding the node directories
+    :param resultDir: Destination directory, created if needed
+    :param mode: (optional) move, link (hardlinks, copies across filesystems) or copy
+    :param maxWorkers: (optional) Maximum number of entries collected at the same time
+    :param exclude: (optional) Names of the entries of workDir to leave in place
+    """
+    if mode not in MODES:
+        raise ValueError('Unknown result mode {}, expected one of {}'
+                         .format(mode, ', '.join(MODES)))
+    entries = _listEntries(workDir, exclude)
+    os.makedirs(resultDir, exist_ok=True)
+    start = time.time()
+    Parallel(n_jobs=max(1, min(maxWorkers, len(entries))), require='sharedmem', prefer='threads')(
+        delayed(_collectEntry)(path, resultDir, mode) for path in entries)
+    debug('Collected {} entries to {} in {:.2f}s\n'
+          .format(len(entries), resultDir, time.time() - start))
+
+class _HashingReader(object):
+    """File object computing the sha256 and size of what tarfile reads from it"""
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.sha256.update(data)
+        self.size += len(data)
+        return data
+
+def _openArchive(fileName, compression):
+    """Return (tarfile, raw output file, compressor stream or None)"""
+    output = open(fileName, 'wb')
+    try:
+        if compression != 'zst':
+            return tarfile.open(fileobj=output, mode='w|{}'.format(compression)), output, None
+        if zstandard is None:
+            raise ImportError('zstandard module is required to write {}'.format(fileName))
+        stream = zstandard.ZstdCompressor(threads=-1).stream_writer(output, closefd=False)
+        return tarfile.open(fileobj=stream, mode='w|'), output, stream
+    except Exception:
+        output.close()
+        raise
+
+def _walkFiles(workDir, exclude):
+    """Yield every non-directory path under workDir, in a stable order"""
+    for entry in _listEntries(workDir, exclude):
+        if not os.path.isdir(entry) or os.path.islink(entry):
+            yield entry
+            continue
+        for root, dirs, fileNames in os.walk(entry):
+            dirs.sort()
+            for name in sorted(fileNames):
+                yield os.path.join(root, name)
+
+def writeArchive(workDir, fileName, exclude=()):
+    """
+    Stream the content of workDir into the tar archive fileName, compressed according to
+    its extension (.tar, .tar.gz, .tar.xz, .tar.bz2 or .tar.zst), and append a manifest
+    listing the path, size and sha256 of every file. Files are read once. Returns the
+    manifest.
+
+    :param workDir: Directory to archive
+    :param fileName: Archive file name
+    :param exclude: (optional) Names of the entries of workDir to leave out
+    """
+    compression = archiveCompression(fileName)
+    archiveName = os.path.abspath(fileName)
+    os.makedirs(os.path.dirname(archiveName), exist_ok=True)
+
+    files = []
+    archive, output, stream = _openArchive(fileName, compression)
+    try:
+        for path in _walkFiles(workDir, exclude):
+            if os.path.abspath(path) == archiveName:
+                continue
+            arcname = os.path.relpath(path, workDir)
+            tarInfo = archive.gettarinfo(path, arcname)
+            if not tarInfo.isfile():
+                archive.addfile(tarInfo)
+                continue
+            with open(path, 'rb') as f:
+                reader = _HashingReader(f)
+                archive.addfile(tarInfo, reader)
+            files.append({'path': arcname, 'size': reader.size,
+                          'sha256': reader.sha256.hexdigest()})
+
+        manifest = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'workDir': workDir,
+            'totalSize': sum(f['size'] for f in files),
+            'files': files
+        }
+        data = json.dumps(manifest, indent=1).encode('utf-8')
+        tarInfo = tarfile.TarInfo(MANIFEST_NAME)
+        tarInfo.size = len(data)
+        tarInfo.mtime = time.time()
+        archive.addfile(tarInfo, io.BytesIO(data))
+    finally:
+        archive.close()
+        if stream is not None:
+            stream.close()
+        output.close()
+
+    info('Archived {} files ({} bytes) to {}\n'
+         .format(len(files), manifest['totalSize'], fileName))
+    return manifest
@@ -0,0 +1,440 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+This module reads Mini-NDN topology files, either in the INI format:
+
+    [nodes]
+    a: _ radius=0.5 angle=2.64159265359
+    [links]
+    a:b delay=10ms
+    [faces]
+    a:b cost=10
+
+or in the equivalent JSON format (detected by a .json extension or a leading '{'):
+
+    {"nodes": {"a": {"radius": "0.5", "angle": "2.64159265359"}},
+     "links": [["a", "b", {"delay": "10ms"}]],
+     "faces": [["a", "b", 10]]}
+
+INI files are read line by line in a single pass and every entry keeps its line
+number, so that errors point to the offending line. Like configparser, keys are
+lowercased, full line comments start with # or ; and indented lines continue the
+previous entry.
+
+A loaded Topology is validated once and can be cached in a directory, keyed by the
+hash of the file, so that later runs on the same file skip parsing and validation.
+The module does not depend on Mininet; Minindn.processTopo and
+MinindnWifi.processTopo build their Topo objects from it.
+'''
+
+import hashlib
+import json
+import os
+from collections import OrderedDict, namedtuple
+
+# Link parameters converted to numbers, everything else is kept as a string
+LINK_INT_PARAMS = ['bw', 'jitter', 'max_queue_size']
+LINK_FLOAT_PARAMS = ['loss']
+
+# Bump when the cached representation changes
+FORMAT_VERSION = 1
+CACHE_DIR_NAME = '.topo-cache'
+
+TopologyEntry = namedtuple('TopologyEntry', ['key', 'value', 'lineNumber'])
+
+# Node section of a topology: whether it must be present, which parameters are
+# converted to int and whether duplicate hyperbolic coordinates are rejected
+NodeSection = namedtuple('NodeSection', ['name', 'required', 'intParams', 'checkCoordinates'])
+WIRED_SECTIONS = [NodeSection('nodes', True, [], True),
+                  NodeSection('switches', False, [], False)]
+WIFI_SECTIONS = [NodeSection('stations', True, ['range'], False),
+                 NodeSection('switches', False, [], False),
+                 NodeSection('accessPoints', False, ['range'], False)]
+
+class TopologyError(ValueError):
+    """Invalid topology, lineNumber is a line number or a JSON location such as links[2]"""
+    def __init__(self, message, fileName=None, lineNumber=None):
+        location = fileName or '<topology>'
+        if lineNumber is not None:
+            location = '{}:{}'.format(location, lineNumber)
+        ValueError.__init__(self, '{}: {}'.format(location, message))
+        self.fileName = fileName
+        self.lineNumber = lineNumber
+
+class TopologyFile(object):
+    """
+    Sections of a topology file, each an ordered list of TopologyEntry
+
+    :param fileName: name used in error messages
+    """
+    def __init__(self, fileName=None):
+        self.fileName = fileName
+        self.sections = OrderedDict()
+        # Node names of every node section, for link validation
+        self.nodeNames = set()
+
+    @staticmethod
+    def read(fileName):
+        with open(fileName) as f:
+            return TopologyFile.parse(f, fileName)
+
+    @staticmethod
+    def parse(lines, fileName=None):
+        """
+        Parse an iterable of lines (e.g. an open file)
+
+        :param lines: lines of the topology file
+        :param fileName: (optional) name used in error messages
+        """
+        topoFile = TopologyFile(fileName)
+        section = None
+        keys = None
+        last = None
+        for lineNumber, line in enumerate(lines, 1):
+            stripped = line.strip()
+            if not stripped or stripped[0] in '#;':
+                continue
+            if line[0] in ' \t' and last is not None:
+                # Continuation of the previous entry
+                last = last._replace(value='{} {}'.format(last.value, stripped).strip())
+                section[-1] = last
+                continue
+            if stripped[0] == '[':
+                if stripped[-1] != ']':
+                    raise TopologyError('invalid section header', fileName, lineNumber)
+                name = stripped[1:-1].strip()
+                if name in topoFile.sections:
+                    raise TopologyError('duplicate section [{}]'.format(name), fileName, lineNumber)
+                section = topoFile.sections[name] = []
+                keys = set()
+                last = None
+                continue
+            if section is None:
+                raise TopologyError('entry outside of a section', fileName, lineNumber)
+
+            key, _, value = stripped.partition(' ')
+            key = key.lower()
+            if key in keys:
+                raise TopologyError('duplicate entry {}'.format(key), fileName, lineNumber)
+            keys.add(key)
+            last = TopologyEntry(key, value.strip(), lineNumber)
+            section.append(last)
+        return topoFile
+
+    def error(self, message, entry=None):
+        return TopologyError(message, self.fileName,
+                             entry.lineNumber if entry is not None else None)
+
+    def entries(self, section, required=True):
+        if section not in self.sections:
+            if required:
+                raise self.error('missing section [{}]'.format(section))
+            return []
+        return self.sections[section]
+
+    def parseParams(self, entry, intParams=(), floatParams=()):
+        """Split 'key=value key=value' into a dictionary, '_' is a placeholder"""
+        params = {}
+        for param in entry.value.split():
+            if param == '_':
+                continue
+            key, sep, value = param.partition('=')
+            if not sep or not key:
+                raise self.error('invalid parameter {}, expected key=value'.format(param), entry)
+            try:
+                if key in intParams:
+                    value = int(value)
+                elif key in floatParams:
+                    value = float(value)
+            except ValueError:
+                raise self.error('invalid value for {}: {}'.format(key, value), entry)
+            params[key] = value
+        return params
+
+    def nodes(self, section, required=True, intParams=(), checkCoordinates=False):
+        """
+        Return [(name, params)] of a node section
+
+        :param checkCoordinates: fail if two nodes have the same hyperbolic coordinates
+        """
+        nodes = []
+        coordinates = set()
+        for entry in self.entries(section, required):
+            name = entry.key.split(':')[0]
+            if not name:
+                raise self.error('missing node name', entry)
+            if name in self.nodeNames:
+                raise self.error('duplicate node {}'.format(name), entry)
+            if checkCoordinates and 'radius' in entry.value and 'angle' in entry.value:
+                if entry.value in coordinates:
+                    raise self.error('duplicate coordinate, \'{}\' used by multiple nodes'
+                                     .format(entry.value), entry)
+                coordinates.add(entry.value)
+            self.nodeNames.add(name)
+            nodes.append((name, self.parseParams(entry, intParams)))
+        return nodes
+
+    def links(self, section='links'):
+        """Return [(node name, node name, params)], nodes must be read first"""
+        links = []
+        for entry in self.entries(section):
+            endpoints = entry.key.split(':')
+            if len(endpoints) != 2:
+                raise self.error('invalid link {}, expected node:node'.format(entry.key), entry)
+            for name in endpoints:
+                if name not in self.nodeNames:
+                    raise self.error('link to unknown node {}'.format(name), entry)
+            params = self.parseParams(entry, LINK_INT_PARAMS, LINK_FLOAT_PARAMS)
+            links.append((endpoints[0], endpoints[1], params))
+        return links
+
+    def faces(self, section='faces'):
+        """Return {node name: [(node name, cost)]}, cost is -1 if not given"""
+        faces = {}
+        for entry in self.entries(section, required=False):
+            endpoints = entry.key.split(':')
+            if len(endpoints) != 2:
+                raise self.error('invalid face {}, expected node:node'.format(entry.key), entry)
+            params = self.parseParams(entry, intParams=['cost'])
+            faces.setdefault(endpoints[0], []).append((endpoints[1], params.get('cost', -1)))
+        return faces
+
+class Topology(object):
+    """
+    Validated topology: node sections, links and faces, with typed parameters
+
+    nodes: {section: [(name, params)]}, links: [(name, name, params)],
+    faces: {name: [(name, cost)]}
+    """
+    def __init__(self):
+        self.nodes = OrderedDict()
+        self.links = []
+        self.faces = {}
+
+    @staticmethod
+    def load(fileName, sections=WIRED_SECTIONS, cacheDir=None):
+        """
+        Read an INI or JSON topology file. With cacheDir, the validated topology is stored
+        in cacheDir/<sha256>.json and reused as long as the file content does not change.
+
+        :param sections: NodeSection list, WIRED_SECTIONS or WIFI_SECTIONS
+        :param cacheDir: (optional) directory of the cached topologies
+        """
+        with open(fileName, 'rb') as f:
+            content = f.read()
+
+        cacheFile = None
+        if cacheDir is not None:
+            key = hashlib.sha256(content)
+            key.update(repr((FORMAT_VERSION, sections)).encode('utf-8'))
+            cacheFile = os.path.join(cacheDir, '{}.json'.format(key.hexdigest()))
+            try:
+                with open(cacheFile) as f:
+                    return Topology.fromDict(json.load(f), sections)
+            except (IOError, ValueError, KeyError, TypeError):
+                pass
+
+        text = content.decode('utf-8')
+        if fileName.endswith('.json') or text.lstrip().startswith('{'):
+            try:
+                data = json.loads(text, object_pairs_hook=OrderedDict)
+            except ValueError as e:
+                raise TopologyError('invalid JSON: {}'.format(e), fileName)
+            topology = Topology.fromJson(data, sections, fileName)
+        else:
+            topology = Topology.fromTopologyFile(TopologyFile.parse(text.splitlines(), fileName),
+                                                 sections)
+
+        if cacheFile is not None:
+            try:
+                os.makedirs(cacheDir, exist_ok=True)
+                # Write then rename so that concurrent runs never read a partial file
+                tmpFile = '{}.{}.tmp'.format(cacheFile, os.getpid())
+                with open(tmpFile, 'w') as f:
+                    json.dump(topology.toDict(), f, separators=(',', ':'))
+                os.rename(tmpFile, cacheFile)
+            except (IOError, OSError):
+                # The cache is only an optimization
+                pass
+        return topology
+
+    @staticmethod
+    def fromTopologyFile(topoFile, sections=WIRED_SECTIONS):
+        """Validate the entries of an INI TopologyFile"""
+        topology = Topology()
+        for section in sections:
+            topology.nodes[section.name] = topoFile.nodes(section.name, section.required,
+                                                          section.intParams,
+                                                          section.checkCoordinates)
+        topology.links = topoFile.links()
+        topology.faces = topoFile.faces()
+        return topology
+
+    @staticmethod
+    def _convert(params, intParams, floatParams, error):
+        if not isinstance(params, dict):
+            raise error('parameters must be an object')
+        converted = {}
+        for key, value in params.items():
+            try:
+                if key in intParams:
+                    value = int(value)
+                elif key in floatParams:
+                    value = float(value)
+                else:
+                    value = str(value)
+            except (TypeError, ValueError):
+                raise error('invalid value for {}: {}'.format(key, value))
+            converted[key] = value
+        return converted
+
+    @staticmethod
+    def fromJson(data, sections=WIRED_SECTIONS, fileName=None):
+        """
+        Validate a JSON topology. Node parameters are converted to strings as in INI files,
+        except the int parameters of the section; link parameters follow LINK_INT_PARAMS
+        and LINK_FLOAT_PARAMS.
+        """
+        def errorAt(location):
+            return lambda message: TopologyError(message, fileName, location)
+
+        if not isinstance(data, dict):
+            raise TopologyError('a topology must be a JSON object', fileName)
+
+        topology = Topology()
+        nodeNames = set()
+        for section in sections:
+            if section.name not in data:
+                if section.required:
+                    raise TopologyError('missing section {}'.format(section.name), fileName)
+                topology.nodes[section.name] = []
+                continue
+            if not isinstance(data[section.name], dict):
+                raise TopologyError('{} must be an object'.format(section.name), fileName)
+            nodes = topology.nodes[section.name] = []
+            coordinates = set()
+            for name, params in data[section.name].items():
+                error = errorAt('{}.{}'.format(section.name, name))
+                name = name.lower()
+                if not name or ':' in name:
+                    raise error('invalid node name')
+                if name in nodeNames:
+                    raise error('duplicate node {}'.format(name))
+                params = Topology._convert(params or {}, section.intParams, (), error)
+                if section.checkCoordinates and 'radius' in params and 'angle' in params:
+                    if (params['radius'], params['angle']) in coordinates:
+                        raise error('duplicate coordinate, radius={} angle={} used by '
+                                    'multiple nodes'.format(params['radius'], params['angle']))
+                    coordinates.add((params['radius'], params['angle']))
+                nodeNames.add(name)
+                nodes.append((name, params))
+
+        if 'links' not in data:
+            raise TopologyError('missing section links', fileName)
+        for index, link in enumerate(data['links']):
+            error = errorAt('links[{}]'.format(index))
+            if not isinstance(link, list) or len(link) not in [2, 3]:
+                raise error('a link must be [node, node] or [node, node, parameters]')
+            endpoints = [str(name).lower() for name in link[:2]]
+            for name in endpoints:
+                if name not in nodeNames:
+                    raise error('link to unknown node {}'.format(name))
+            params = link[2] if len(link) == 3 else {}
+            params = Topology._convert(params, LINK_INT_PARAMS, LINK_FLOAT_PARAMS, error)
+            topology.links.append((endpoints[0], endpoints[1], params))
+
+        for index, face in enumerate(data.get('faces', [])):
+            error = errorAt('faces[{}]'.format(index))
+            if not isinstance(face, list) or len(face) not in [2, 3]:
+                raise error('a face must be [node, node] or [node, node, cost]')
+            try:
+                cost = int(face[2]) if len(face) == 3 else -1
+            except (TypeError, ValueError):
+                raise error('invalid cost: {}'.format(face[2]))
+            topology.faces.setdefault(str(face[0]).lower(), []).append((str(face[1]).lower(), cost))
+        return topology
+
+    @staticmethod
+    def fromDict(data, sections=WIRED_SECTIONS):
+        """Rebuild a topology from toDict, without validation"""
+        topology = Topology()
+        for section in sections:
+            topology.nodes[section.name] = [(name, params)
+                                            for name, params in data['nodes'][section.name]]
+        topology.links = [tuple(link) for link in data['links']]
+        topology.faces = {name: [tuple(face) for face in faces]
+                          for name, faces in data['faces'].items()}
+        return topology
+
+    def toDict(self):
+        """Compiled representation, as stored in the cache"""
+        return {'nodes': self.nodes, 'links': self.links, 'faces': self.faces}
+
+    def toJson(self):
+        """Return the topology in the JSON topology format"""
+        data = OrderedDict()
+        for section, nodes in self.nodes.items():
+            if nodes:
+                data[section] = OrderedDict(nodes)
+        data['links'] = [[node1, node2, params] for node1, node2, params in self.links]
+        if self.faces:
+            data['faces'] = [[name, other, cost] for name, faces in self.faces.items()
+                             for other, cost in faces]
+        return data
+
+    def writeJson(self, fileName):
+        """Write the topology in the JSON format, one node, link or face per line"""
+        sections = []
+        for key, value in self.toJson().items():
+            if isinstance(value, dict):
+                items = ['  {}: {}'.format(json.dumps(name), json.dumps(params))
+                         for name, params in value.items()]
+                sections.append(' {}: {{\n{}\n }}'.format(json.dumps(key), ',\n'.join(items)))
+            else:
+                items = ['  {}'.format(json.dumps(item)) for item in value]
+                sections.append(' {}: [\n{}\n ]'.format(json.dumps(key), ',\n'.join(items)))
+        with open(fileName, 'w') as f:
+            f.write('{{\n{}\n}}\n'.format(',\n'.join(sections)))
+
+    def writeConf(self, fileName):
+        """Write the topology in the INI format"""
+        def formatParams(params):
+            return ' '.join('{}={}'.format(key, value) for key, value in params.items()) or '_'
+
+        with open(fileName, 'w') as f:
+            for section, nodes in self.nodes.items():
+                if not nodes:
+                    continue
+                f.write('[{}]\n'.format(section))
+                for name, params in nodes:
+                    f.write('{}: {}\n'.format(name, formatParams(params)))
+            f.write('[links]\n')
+            for node1, node2, params in self.links:
+                f.write('{}:{} {}\n'.format(node1, node2, formatParams(params)))
+            if self.faces:
+                f.write('[faces]\n')
+                for name, faces in self.faces.items():
+                    for other, cost in faces:
+                        f.write('{}:{} {}\n'.format(name, other,
+                                                    'cost={}'.format(cost) if cost != -1 else '_'))
@@ -0,0 +1,289 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+This module generates synthetic topologies offline, e.g. to benchmark startup
+and routing on large networks. The same seed always produces the same topology.
+
+    topology = waxman(1000, seed=1, delay='uniform:1:20', bw='constant:100')
+    topology.writeConf('waxman-1000.conf')
+    topo, faces = Minindn.buildTopo(topology)
+
+Link parameters are drawn from distributions given as 'name:arg:arg' strings:
+constant:VALUE, uniform:LOW:HIGH, normal:MEAN:STDDEV and exponential:MEAN.
+Delays are in ms (at least 1), bandwidths in Mbps and losses in percent.
+
+It can also be run as a script:
+
+    python3 -m minindn.topology_generator waxman --nodes 1000 --seed 1 -o waxman.conf
+'''
+
+import argparse
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from minindn.topology import Topology
+
+DEFAULT_DELAY = 'uniform:1:20'
+
+def parseDistribution(spec):
+    """
+    Return a function drawing a value from the distribution described by spec,
+    given a numpy random generator
+
+    :param str spec: constant:VALUE, uniform:LOW:HIGH, normal:MEAN:STDDEV or exponential:MEAN
+    """
+    name, _, args = spec.partition(':')
+    try:
+        args = [float(arg) for arg in args.split(':')] if args else []
+    except ValueError:
+        raise ValueError('Invalid distribution: {}'.format(spec))
+    distributions = {
+        'constant': (1, lambda rand, value: value),
+        'uniform': (2, lambda rand, low, high: rand.uniform(low, high)),
+        'normal': (2, lambda rand, mean, stddev: rand.normal(mean, stddev)),
+        'exponential': (1, lambda rand, mean: rand.exponential(mean))
+    }
+    if name not in distributions or len(args) != distributions[name][0]:
+        raise ValueError('Invalid distribution: {}'.format(spec))
+    draw = distributions[name][1]
+    return lambda rand: draw(rand, *args)
+
+class LinkParams(object):
+    """
+    Draw the parameters of each generated link
+
+    :param delay: delay distribution in ms
+    :param bw: (optional) bandwidth distribution in Mbps
+    :param loss: (optional) loss distribution in percent
+    """
+    def __init__(self, delay=DEFAULT_DELAY, bw=None, loss=None):
+        self.delay = parseDistribution(delay)
+        self.bw = parseDistribution(bw) if bw else None
+        self.loss = parseDistribution(loss) if loss else None
+
+    def draw(self, rand):
+        params = OrderedDict()
+        params['delay'] = '{}ms'.format(max(1, int(round(self.delay(rand)))))
+        if self.bw is not None:
+            params['bw'] = max(1, int(round(self.bw(rand))))
+        if self.loss is not None:
+            params['loss'] = round(min(100.0, max(0.0, self.loss(rand))), 3)
+        return params
+
+def _connectComponents(nNodes, edges, rand):
+    """Link every connected component to the largest one, through random nodes"""
+    parent = list(range(nNodes))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for a, b in edges:
+        parent[find(a)] = find(b)
+
+    components = OrderedDict()
+    for i in range(nNodes):
+        components.setdefault(find(i), []).append(i)
+    if len(components) == 1:
+        return edges
+    members = sorted(components.values(), key=len, reverse=True)
+    for component in members[1:]:
+        a = members[0][rand.randint(len(members[0]))]
+        b = component[rand.randint(len(component))]
+        edges.append((a, b))
+    return edges
+
+def _buildTopology(names, edges, linkParams, rand, nodeParams=None):
+    topology = Topology()
+    topology.nodes['nodes'] = [(name, nodeParams[i] if nodeParams else {})
+                               for i, name in enumerate(names)]
+    topology.nodes['switches'] = []
+    linkParams = linkParams or LinkParams()
+    topology.links = [(names[a], names[b], linkParams.draw(rand)) for a, b in edges]
+    return topology
+
+def waxman(nNodes, alpha=0.4, beta=0.1, seed=0, linkParams=None, **params):
+    """
+    Waxman graph: nodes are placed uniformly in the unit square and linked with
+    probability beta * exp(-d / (alpha * L)), L being the largest distance.
+    Disconnected components are then linked to the largest one.
+    """
+    linkParams = linkParams or LinkParams(**params)
+    rand = np.random.RandomState(seed)
+    positions = rand.uniform(size=(nNodes, 2))
+    maxDistance = math.sqrt(2)
+    edges = []
+    for i in range(nNodes - 1):
+        distances = np.sqrt(((positions[i + 1:] - positions[i]) ** 2).sum(axis=1))
+        linked = rand.uniform(size=len(distances)) < beta * np.exp(-distances / (alpha * maxDistance))
+        edges.extend((i, i + 1 + j) for j in np.nonzero(linked)[0])
+    edges = _connectComponents(nNodes, edges, rand)
+    return _buildTopology(['n{}'.format(i) for i in range(nNodes)], edges, linkParams, rand)
+
+def barabasiAlbert(nNodes, m=2, seed=0, linkParams=None, **params):
+    """
+    Barabasi-Albert preferential attachment graph: each new node links to m existing
+    nodes chosen with a probability proportional to their degree
+    """
+    if m < 1 or m >= nNodes:
+        raise ValueError('m must be between 1 and the number of nodes - 1')
+    linkParams = linkParams or LinkParams(**params)
+    rand = np.random.RandomState(seed)
+    edges = []
+    # Each node appears in this list once per link end, drawing from it is preferential
+    endpoints = list(range(m))
+    for node in range(m, nNodes):
+        targets = set()
+        while len(targets) < m:
+            targets.add(endpoints[rand.randint(len(endpoints))])
+        for target in sorted(targets):
+            edges.append((target, node))
+            endpoints.extend([target, node])
+    return _buildTopology(['n{}'.format(i) for i in range(nNodes)], edges, linkParams, rand)
+
+def grid(rows, columns, torus=False, seed=0, linkParams=None, **params):
+    """Grid of rows x columns nodes, with wrap-around links if torus is True"""
+    linkParams = linkParams or LinkParams(**params)
+    rand = np.random.RandomState(seed)
+    edges = []
+    for row in range(rows):
+        for column in range(columns):
+            node = row * columns + column
+            if column + 1 < columns or (torus and columns > 2):
+                edges.append((node, row * columns + (column + 1) % columns))
+            if row + 1 < rows or (torus and rows > 2):
+                edges.append((node, ((row + 1) % rows) * columns + column))
+    names = ['r{}c{}'.format(row, column) for row in range(rows) for column in range(columns)]
+    return _buildTopology(names, edges, linkParams, rand)
+
+def fatTree(k, hostsPerEdge=None, seed=0, linkParams=None, **params):
+    """
+    k-ary fat-tree: (k/2)^2 core nodes and k pods of k/2 aggregation and k/2 edge
+    nodes, each edge node having hostsPerEdge hosts (k/2 by default). Every node is
+    an NDN node.
+    """
+    if k < 2 or k % 2:
+        raise ValueError('k must be even')
+    half = k // 2
+    hostsPerEdge = half if hostsPerEdge is None else hostsPerEdge
+    linkParams = linkParams or LinkParams(**params)
+    rand = np.random.RandomState(seed)
+
+    names = []
+    index = {}
+    def addNode(name):
+        index[name] = len(names)
+        names.append(name)
+        return index[name]
+
+    edges = []
+    cores = [addNode('core{}'.format(i)) for i in range(half * half)]
+    for pod in range(k):
+        aggs = [addNode('agg{}_{}'.format(pod, i)) for i in range(half)]
+        for i, agg in enumerate(aggs):
+            edges.extend((agg, core) for core in cores[i * half:(i + 1) * half])
+        for i in range(half):
+            edge = addNode('edge{}_{}'.format(pod, i))
+            edges.extend((agg, edge) for agg in aggs)
+            for h in range(hostsPerEdge):
+                edges.append((edge, addNode('h{}_{}_{}'.format(pod, i, h))))
+    return _buildTopology(names, edges, linkParams, rand)
+
+def hyperbolic(nNodes, avgDegree=4, gamma=2.5, seed=0, linkParams=None, **params):
+    """
+    Random hyperbolic graph: nodes get polar coordinates in a hyperbolic disk of
+    radius R with a power-law degree distribution of exponent gamma, and two nodes
+    are linked if their hyperbolic distance is at most R. R is chosen to obtain about
+    avgDegree links per node. The coordinates are set as the radius and angle
+    parameters of the nodes, for hyperbolic routing.
+    """
+    if gamma <= 2:
+        raise ValueError('gamma must be greater than 2')
+    linkParams = linkParams or LinkParams(**params)
+    rand = np.random.RandomState(seed)
+    alpha = (gamma - 1) / 2
+    xi = alpha / (alpha - 0.5)
+    radius = 2 * math.log(2 * nNodes * xi * xi / (math.pi * avgDegree))
+
+    radii = np.arccosh(1 + (np.cosh(alpha * radius) - 1) * rand.uniform(size=nNodes)) / alpha
+    angles = rand.uniform(0, 2 * math.pi, size=nNodes)
+    edges = []
+    for i in range(nNodes - 1):
+        deltas = np.pi - np.abs(np.pi - np.abs(angles[i + 1:] - angles[i]))
+        cosh = np.cosh(radii[i]) * np.cosh(radii[i + 1:]) - \
+               np.sinh(radii[i]) * np.sinh(radii[i + 1:]) * np.cos(deltas)
+        distances = np.arccosh(np.maximum(cosh, 1))
+        edges.extend((i, i + 1 + j) for j in np.nonzero(distances <= radius)[0])
+    edges = _connectComponents(nNodes, edges, rand)
+    nodeParams = [{'radius': '{:.6f}'.format(r), 'angle': '{:.6f}'.format(a)}
+                  for r, a in zip(radii, angles)]
+    return _buildTopology(['n{}'.format(i) for i in range(nNodes)], edges, linkParams, rand,
+                          nodeParams)
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Mini-NDN topology')
+    parser.add_argument('model', choices=['waxman', 'ba', 'grid', 'torus', 'fattree',
+                                          'hyperbolic'])
+    parser.add_argument('-n', '--nodes', type=int, default=100,
+                        help='Number of nodes (waxman, ba, hyperbolic) or of rows (grid, torus)')
+    parser.add_argument('--columns', type=int, default=None,
+                        help='Number of columns of grid and torus, default is the number of rows')
+    parser.add_argument('-k', type=int, default=4, help='Number of ports of fattree')
+    parser.add_argument('-m', type=int, default=2, help='Links per new node of ba')
+    parser.add_argument('--alpha', type=float, default=0.4, help='Waxman alpha')
+    parser.add_argument('--beta', type=float, default=0.1, help='Waxman beta')
+    parser.add_argument('--degree', type=float, default=4, help='Average degree of hyperbolic')
+    parser.add_argument('--gamma', type=float, default=2.5, help='Degree exponent of hyperbolic')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--delay', default=DEFAULT_DELAY, help='Delay distribution in ms')
+    parser.add_argument('--bw', default=None, help='Bandwidth distribution in Mbps')
+    parser.add_argument('--loss', default=None, help='Loss distribution in percent')
+    parser.add_argument('-f', '--format', choices=['conf', 'json'], default='conf')
+    parser.add_argument('-o', '--output', required=True, help='Topology file to write')
+    args = parser.parse_args()
+
+    linkParams = LinkParams(args.delay, args.bw, args.loss)
+    if args.model == 'waxman':
+        topology = waxman(args.nodes, args.alpha, args.beta, args.seed, linkParams)
+    elif args.model == 'ba':
+        topology = barabasiAlbert(args.nodes, args.m, args.seed, linkParams)
+    elif args.model in ['grid', 'torus']:
+        topology = grid(args.nodes, args.columns or args.nodes, args.model == 'torus',
+                        args.seed, linkParams)
+    elif args.model == 'fattree':
+        topology = fatTree(args.k, seed=args.seed, linkParams=linkParams)
+    else:
+        topology = hyperbolic(args.nodes, args.degree, args.gamma, args.seed, linkParams)
+
+    if args.format == 'json':
+        topology.writeJson(args.output)
+    else:
+        topology.writeConf(args.output)
+    print('{} nodes, {} links written to {}'.format(len(topology.nodes['nodes']),
+                                                    len(topology.links), args.output))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Opt-in instrumentation of an experiment: node.cmd, node.popen, getPopen and
+Minindn.sleep are wrapped to count calls and time per node, per caller (the
+Mini-NDN or experiment code line issuing the call) and per program, and to record
+a timeline in the Chrome trace format, which chrome://tracing and Perfetto open.
+
+Run an experiment with --trace trace.json, or in a script:
+
+    tracer = Tracer().enable()
+    with tracer.phase('start NFD'):
+        nfds = AppManager(ndn, ndn.net.hosts, Nfd)
+    tracer.disable()
+    tracer.writeChromeTrace('trace.json')
+    info(tracer.summary())
+
+In the timeline each node is a process, so its commands are grouped together,
+and phases and sleeps are on the minindn process.
+'''
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from mininet.node import Node
+
+import minindn.util
+from minindn.minindn import Minindn
+
+# Longest command kept in the trace events
+MAX_COMMAND_LENGTH = 200
+MAIN_PROCESS = 'minindn'
+
+_IGNORED_CALLER_FILES = [os.path.abspath(__file__).rstrip('c'),
+                         os.path.abspath(minindn.util.__file__).rstrip('c')]
+_IGNORED_CALLER_DIRS = [os.path.dirname(os.path.abspath(sys.modules[Node.__module__].__file__))]
+
+def _findCaller():
+    """Return file:line (function) of the first frame outside of Mininet and the tracer"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        fileName = frame.f_code.co_filename
+        if fileName not in _IGNORED_CALLER_FILES and \
+           not any(fileName.startswith(d) for d in _IGNORED_CALLER_DIRS):
+            return '{}:{} ({})'.format(os.path.relpath(fileName), frame.f_lineno,
+                                       frame.f_code.co_name)
+        frame = frame.f_back
+    return '<unknown>'
+
+def _describeCommand(args, kwargs):
+    command = args[0] if args else kwargs.get('cmd', kwargs.get('args', ''))
+    if isinstance(command, (list, tuple)):
+        command = ' '.join(str(arg) for arg in command)
+    return str(command)
+
+class Tracer(object):
+    """Records the calls of the wrapped functions between enable() and disable()"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []
+        # (kind, key) to [number of calls, seconds]
+        self.byNode = defaultdict(lambda: [0, 0.0])
+        self.byCaller = defaultdict(lambda: [0, 0.0])
+        self.byProgram = defaultdict(lambda: [0, 0.0])
+        self.processIds = {MAIN_PROCESS: 0}
+        self.threadNames = {}
+        self.restore = []
+        self.origin = time.perf_counter()
+
+    def _processId(self, name):
+        if name not in self.processIds:
+            self.processIds[name] = len(self.processIds)
+        return self.processIds[name]
+
+    def record(self, kind, nodeName, command, caller, start, end):
+        """Record one call of kind made on nodeName, between perf_counter start and end"""
+        duration = end - start
+        program = os.path.basename(command.split(None, 1)[0]) if command.strip() else ''
+        thread = threading.current_thread()
+        with self.lock:
+            for stats, key in [(self.byNode, (kind, nodeName)),
+                               (self.byCaller, (kind, caller)),
+                               (self.byProgram, (kind, program))]:
+                stats[key][0] += 1
+                stats[key][1] += duration
+            self.threadNames[thread.ident] = thread.name
+            self.events.append({
+                'name': '{} {}'.format(kind, program) if program else kind,
+                'cat': kind,
+                'ph': 'X',
+                'ts': (start - self.origin) * 1e6,
+                'dur': duration * 1e6,
+                'pid': self._processId(nodeName or MAIN_PROCESS),
+                'tid': thread.ident,
+                'args': {'command': command[:MAX_COMMAND_LENGTH], 'caller': caller}
+            })
+
+    def _wrap(self, function, kind, hasNode=True):
+        """Wrap function, whose first argument is the node when hasNode is set"""
+        tracer = self
+        @functools.wraps(function)
+        def traced(*args, **kwargs):
+            caller = _findCaller()
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                nodeName = args[0].name if hasNode and args else None
+                command = _describeCommand(args[1:] if hasNode else args, kwargs)
+                tracer.record(kind, nodeName, command, caller, start, end)
+        return traced
+
+    def _patch(self, owner, attribute, wrapped):
+        self.restore.append((owner, attribute, owner.__dict__[attribute]))
+        setattr(owner, attribute, wrapped)
+
+    def enable(self):
+        """Install the wrappers and return the tracer"""
+        self._patch(Node, 'cmd', self._wrap(Node.cmd, 'cmd'))
+        self._patch(Node, 'popen', self._wrap(Node.popen, 'popen'))
+
+        # getPopen is imported by name, rebind it in every module that did so
+        getPopen = minindn.util.getPopen
+        tracedGetPopen = self._wrap(getPopen, 'getPopen')
+        for module in list(sys.modules.values()):
+            if module is not None and getattr(module, 'getPopen', None) is getPopen:
+                self._patch(module, 'getPopen', tracedGetPopen)
+
+        self._patch(Minindn, 'sleep', staticmethod(self._wrap(Minindn.sleep, 'sleep', False)))
+        return self
+
+    def disable(self):
+        """Remove the wrappers"""
+        while self.restore:
+            owner, attribute, original = self.restore.pop()
+            setattr(owner, attribute, original)
+
+    class _Phase(object):
+        def __init__(self, tracer, name):
+            self.tracer = tracer
+            self.name = name
+
+        def __enter__(self):
+            self.start = time.perf_counter()
+            return self
+
+        def __exit__(self, *exc):
+            self.tracer.record('phase', None, self.name, _findCaller(), self.start,
+                               time.perf_counter())
+
+    def phase(self, name):
+        """Context manager recording a named phase of the experiment in the timeline"""
+        return Tracer._Phase(self, name)
+
+    def writeChromeTrace(self, fileName):
+        """Write the timeline in the Chrome trace event format"""
+        with self.lock:
+            metadata = [{'name': 'process_name', 'ph': 'M', 'pid': pid,
+                         'args': {'name': name}} for name, pid in self.processIds.items()]
+            metadata += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                          'args': {'name': threadName}}
+                         for tid, threadName in self.threadNames.items()
+                         for pid in self.processIds.values()]
+            trace = {'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms'}
+        with open(fileName, 'w') as f:
+            json.dump(trace, f)
+
+    @staticmethod
+    def _table(title, stats, limit):
+        lines = ['{:<60} {:>8} {:>10}'.format(title, 'calls', 'seconds')]
+        ranked = sorted(stats.items(), key=lambda item: item[1][1], reverse=True)
+        for (kind, key), (count, seconds) in ranked[:limit]:
+            lines.append('{:<60} {:>8} {:>10.3f}'
+                         .format('{} {}'.format(kind, key or MAIN_PROCESS)[:60], count, seconds))
+        return lines
+
+    def summary(self, limit=15):
+        """Return a text report of the slowest nodes, callers and programs"""
+        with self.lock:
+            lines = self._table('By node', self.byNode, limit) + ['']
+            lines += self._table('By caller', self.byCaller, limit) + ['']
+            lines += self._table('By program', self.byProgram, limit)
+        return '\n'.join(lines) + '\n'
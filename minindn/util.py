@@ -22,8 +22,10 @@
 # If not, see <http://www.gnu.org/licenses/>.
 
 import sys
+import time
 from os.path import isfile
 from subprocess import call
+from threading import Lock
 from six.moves.urllib.parse import quote
 
 from mininet.cli import CLI
@@ -32,6 +34,10 @@ sshbase = ['ssh', '-q', '-t', '-i/home/mininet/.ssh/id_rsa']
 scpbase = ['scp', '-i', '/home/mininet/.ssh/id_rsa']
 devnull = open('/dev/null', 'w')
 
+# Node name to the environment of processes started on the node, see popenGetEnv
+_envCache = {}
+_envCacheLock = Lock()
+
 def getSafeName(namePrefix):
     """
     Check if the prefix/string is safe to use with ndn commands or not.
@@ -63,16 +69,60 @@ def copyExistentFile(node, fileList, destination):
         fileName = destination.split('/')[-1]
         raise IOError('{} not found in expected directory.'.format(fileName))
 
-def popenGetEnv(node, envDict=None):
+def findExistentFile(fileList):
+    """Return the first file of fileList that exists"""
+    for f in fileList:
+        if isfile(f):
+            return f
+    fileName = fileList[0].split('/')[-1]
+    raise IOError('{} not found in expected directory.'.format(fileName))
+
+def parseEnv(output):
+    """Parse the NUL separated output of printenv -0 into a dictionary"""
     env = {}
+    for var in output.split('\0'):
+        key, sep, value = var.partition('=')
+        if sep:
+            env[key] = value
+    return env
+
+def captureEnv(node):
+    """Read the environment of processes started on node and cache it"""
     homeDir = node.params['params']['homeDir']
-    printenv = node.popen('printenv'.split(), cwd=homeDir).communicate()[0].decode('utf-8')
-    for var in printenv.split('\n'):
-        if var == '':
-            break
-        p = var.split('=')
-        env[p[0]] = p[1]
-    env['HOME'] = homeDir
+    printenv = node.popen('printenv -0'.split(), cwd=homeDir).communicate()[0].decode('utf-8')
+    env = parseEnv(printenv)
+    with _envCacheLock:
+        _envCache[node.name] = env
+    return env
+
+def invalidateEnv(node=None):
+    """
+    Drop the cached environment of node, or of all nodes, so that it is read
+    again by the next popenGetEnv
+    """
+    with _envCacheLock:
+        if node is None:
+            _envCache.clear()
+        else:
+            _envCache.pop(node.name, None)
+
+def waitUntil(condition, timeout, pollInterval=0.05):
+    """
+    Call condition until it returns True or timeout seconds have passed.
+    Returns the last result of condition.
+    """
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() >= deadline:
+            return False
+        time.sleep(pollInterval)
+    return True
+
+def popenGetEnv(node, envDict=None):
+    with _envCacheLock:
+        cached = _envCache.get(node.name)
+    env = dict(cached if cached is not None else captureEnv(node))
+    env['HOME'] = node.params['params']['homeDir']
 
     if envDict is not None:
         for key, value in envDict.items():
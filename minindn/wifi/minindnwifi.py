@@ -24,7 +24,6 @@
 import os
 import argparse
 import sys
-import configparser
 from subprocess import Popen, PIPE
 
 from mininet.log import info, debug
@@ -34,7 +33,9 @@ from mn_wifi.net import Mininet_wifi
 from mn_wifi.link import WirelessLink
 
 from minindn.minindn import Minindn
+from minindn.topology import Topology, TopologyError, WIFI_SECTIONS, CACHE_DIR_NAME
 from minindn.helpers.nfdc import Nfdc
+from minindn.results import MODES as RESULT_MODES
 
 class MinindnWifi(Minindn):
     """ Class for handling default args, Mininet-wifi object and home directories """
@@ -58,6 +59,8 @@ class MinindnWifi(Minindn):
             Minindn.workDir = os.path.abspath(workDir)
 
         Minindn.resultDir = self.args.resultDir
+        Minindn.enableTracing(self.args.traceFile)
+        Minindn.enableCgroups(self.args.cgroups, self.args.nodeCpuQuota)
 
         self.topoFile = None
         if not topoFile:
@@ -70,9 +73,10 @@ class MinindnWifi(Minindn):
         if topo is None and not noTopo:
             try:
                 info('Using topology file {}\n'.format(self.topoFile))
-                self.topo, self.faces_to_create = self.processTopo(self.topoFile)
-            except configparser.NoSectionError as e:
-                info('Error reading config file: {}\n'.format(e))
+                cacheDir = '{}/{}'.format(Minindn.workDir, CACHE_DIR_NAME)
+                self.topo, self.faces_to_create = self.processTopo(self.topoFile, cacheDir)
+            except (TopologyError, IOError) as e:
+                info('Error reading topology file: {}\n'.format(e))
                 sys.exit(1)
         else:
             self.topo = topo
@@ -113,6 +117,22 @@ class MinindnWifi(Minindn):
         parser.add_argument('--result-dir', action='store', dest='resultDir', default=None,
                             help='Specify the full path destination folder where experiment results will be moved')
 
+        parser.add_argument('--result-mode', action='store', dest='resultMode', default='move',
+                            choices=RESULT_MODES,
+                            help='Move, hardlink or copy the results to the result directory; default is move')
+
+        parser.add_argument('--result-archive', action='store', dest='resultArchive', default=None,
+                            help='Also write the results to this .tar, .tar.gz, .tar.xz or .tar.zst archive, with a manifest of the archived files')
+
+        parser.add_argument('--trace', action='store', dest='traceFile', default=None,
+                            help='Record the node commands, processes and sleeps of the experiment and write them as a Chrome trace to this file')
+
+        parser.add_argument('--cgroups', action='store_true', dest='cgroups', default=False,
+                            help='Run each application in its own cgroup (v2) and report its CPU, memory and I/O usage at the end of the experiment')
+
+        parser.add_argument('--node-cpu-quota', action='store', dest='nodeCpuQuota', type=float, default=None,
+                            help='Limit the applications of each node to this number of CPUs (implies --cgroups)')
+
         parser.add_argument('--mobility',action='store_true',dest='mobility',default=False,
                             help='Enable custom mobility for topology (defined in topology file)')
 
@@ -125,99 +145,25 @@ class MinindnWifi(Minindn):
         return parser
 
     @staticmethod
-    def processTopo(topoFile):
-        config = configparser.ConfigParser(delimiters=' ')
-        config.read(topoFile)
+    def processTopo(topoFile, cacheDir=None):
+        topology = Topology.load(topoFile, WIFI_SECTIONS, cacheDir)
         topo = Topo_WiFi()
 
-        items = config.items('stations')
-        debug("Stations")
-        for item in items:
-            debug(item[0].split(':'))
-            name = item[0].split(':')[0]
-            params = {}
-            for param in item[1].split(' '):
-                    if param == "_":
-                        continue
-                    key = param.split('=')[0]
-                    value = param.split('=')[1]
-                    if key in ['range']:
-                        value = int(value)
-                    params[key] = value
-
+        for name, params in topology.nodes['stations']:
             topo.addStation(name, **params)
 
-        try:
-            debug("Switches")
-            items = config.items('switches')
-            for item in items:
-                debug(item[0].split(':'))
-                name = item[0].split(':')[0]
-                topo.addSwitch(name)
-        except configparser.NoSectionError:
-            debug("Switches are optional")
-            pass
+        # Switches are optional
+        for name, _ in topology.nodes['switches']:
+            topo.addSwitch(name)
 
-        try:
-            debug("APs")
-            items = config.items('accessPoints')
-            for item in items:
-                debug(item[0].split(':'))
-                name = item[0].split(':')[0]
-                ap_params = {}
-                for param in item[1].split(' '):
-                    if param == "_":
-                        continue
-                    key = param.split('=')[0]
-                    value = param.split('=')[1]
-                    if key in ['range']:
-                        value = int(value)
-                    ap_params[key] = value
-                topo.addAccessPoint(name, **ap_params)
-        except configparser.NoSectionError:
-            debug("APs are optional")
-            pass
+        # APs are optional
+        for name, params in topology.nodes['accessPoints']:
+            topo.addAccessPoint(name, **params)
 
-        items = config.items('links')
-        debug("Links")
-        for item in items:
-            link = item[0].split(':')
-            debug(link)
-            params = {}
-            for param in item[1].split(' '):
-                if param == "_":
-                    continue
-                key = param.split('=')[0]
-                value = param.split('=')[1]
-                if key in ['bw', 'jitter', 'max_queue_size']:
-                    value = int(value)
-                if key == 'loss':
-                    value = float(value)
-                params[key] = value
-
-            topo.addLink(link[0], link[1], **params)
-
-        faces = {}
-        try:
-            items = config.items('faces')
-            debug("Faces")
-            for item in items:
-                face_a, face_b = item[0].split(':')
-                debug(item)
-                cost = -1
-                for param in item[1].split(' '):
-                    if param.split("=")[0] == 'cost':
-                        cost = param.split("=")[1]
-                face_info = (face_b, int(cost))
-                if face_a not in faces:
-                    faces[face_a] = [face_info]
-                else:
-                    faces[face_a].append(face_info)
-        except configparser.NoSectionError:
-            debug("Faces section is optional")
-            pass
+        for node1, node2, params in topology.links:
+            topo.addLink(node1, node2, **params)
 
-        return (topo, faces)
+        return (topo, topology.faces)
 
     def startMobility(self, max_x=1000, max_y=1000, **kwargs):
         """ Method to run a basic mobility setup on your net"""
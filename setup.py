@@ -8,6 +8,10 @@ setup(
     version = __version__,
     description='Mininet based NDN emulator',
     packages = find_packages(),
+    entry_points = {
+        'console_scripts': ['minindn-bench = minindn.bench:main',
+                            'minindn-analyze = minindn.analysis:main'],
+    },
 )
 
 print(find_packages())
@@ -0,0 +1,94 @@
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import math
+import unittest
+
+from minindn.apps.ndnping import parsePingOutput, CONTENT, NACK, TIMEOUT
+
+# ndnping -c 4 -t /ndn/b-site/b, ndn-tools 0.7
+ISO_OUTPUT = '''\
+PING /ndn/b-site/b
+20211018T123010.123456 - content from /ndn/b-site/b: seq=3944614125513155620 time=1.234 ms
+20211018T123011.124002 - timeout from /ndn/b-site/b: seq=3944614125513155621
+20211018T123012.125118 - nack from /ndn/b-site/b: seq=3944614125513155622 time=0.51 ms reason=NoRoute
+20211018T123013.126304 - content from /ndn/b-site/b: seq=3944614125513155623 time=2.766 ms
+
+--- /ndn/b-site/b ping statistics ---
+4 packets transmitted, 2 received, 50% lost
+    rtt min/avg/max/mdev = 1.234/2.000/2.766/0.766 ms
+'''
+
+# ndnping -c 2 -t /ndn/b-site/b, older ndn-tools printing the Unix time in milliseconds
+UNIX_MS_OUTPUT = '''\
+PING /ndn/b-site/b
+1634560210123 - content from /ndn/b-site/b: seq=42 time=1.5 ms
+1634560211124 - timeout from /ndn/b-site/b: seq=43
+
+--- /ndn/b-site/b ping statistics ---
+2 packets transmitted, 1 received, 50% lost
+    rtt min/avg/max/mdev = 1.500/1.500/1.500/0.000 ms
+'''
+
+# ndnping -c 2 /ndn/b-site/b, without -t
+PLAIN_OUTPUT = '''\
+PING /ndn/b-site/b
+content from /ndn/b-site/b: seq=7 time=3.25 ms
+content from /ndn/b-site/b: seq=8 time=2.75 ms
+'''
+
+class TestParsePingOutput(unittest.TestCase):
+    def testIsoTimestamps(self):
+        result = parsePingOutput(ISO_OUTPUT)
+        self.assertEqual(result.sent, 4)
+        self.assertEqual(result.received, 2)
+        self.assertAlmostEqual(result.lossRatio, 0.5)
+        self.assertEqual(list(result.status), [CONTENT, TIMEOUT, NACK, CONTENT])
+        self.assertEqual(int(result.seq[0]), 3944614125513155620)
+        self.assertAlmostEqual(result.timestamp[0], 1634560210.123456, places=5)
+        self.assertAlmostEqual(result.rtt[0], 1.234)
+        self.assertTrue(math.isnan(result.rtt[1]))
+        self.assertTrue(math.isnan(result.rtt[2]))
+        self.assertAlmostEqual(result.rttStats()['mean'], 2.0)
+
+    def testUnixMillisecondTimestamps(self):
+        result = parsePingOutput(UNIX_MS_OUTPUT)
+        self.assertEqual(list(result.seq), [42, 43])
+        self.assertAlmostEqual(result.timestamp[0], 1634560210.123, places=5)
+        self.assertAlmostEqual(result.timestamp[1], 1634560211.124, places=5)
+        self.assertEqual(result.received, 1)
+
+    def testNoTimestamps(self):
+        result = parsePingOutput(PLAIN_OUTPUT)
+        self.assertEqual(list(result.rtt), [3.25, 2.75])
+        self.assertTrue(all(math.isnan(t) for t in result.timestamp))
+        self.assertAlmostEqual(result.lossRatio, 0.0)
+
+    def testEmptyOutput(self):
+        result = parsePingOutput('')
+        self.assertEqual(result.sent, 0)
+        self.assertTrue(math.isnan(result.lossRatio))
+        self.assertIsNone(result.rttStats())
+
+if __name__ == '__main__':
+    unittest.main()
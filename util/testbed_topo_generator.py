@@ -31,11 +31,15 @@ import argparse
 import datetime
 import json
 import logging
+import sys
 from os import path
 from urllib.request import urlopen
 
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), '..'))
+from minindn.topology import Topology
+
 def testbedGen():
-    """Returns a string with the Mini-NDN topology version of the testbed"""
+    """Returns a Topology with the Mini-NDN topology version of the testbed"""
     topology = None
     connections = None
     hosts = []
@@ -58,9 +62,8 @@ def testbedGen():
         if node['neighbors']:
             radius = node['hr_radius']
             angle = node['hr_angle']
-            host_str = "{}: _ radius={} angle={}\n".format(node_name, radius, angle)
-            hosts.append(host_str)
-            logging.debug("Add node: {}".format(host_str)[:-1])
+            hosts.append((node_name, {'radius': str(radius), 'angle': str(angle)}))
+            logging.debug("Add node: {} radius={} angle={}".format(node_name, radius, angle))
         else:
             # A node without neighbors shouldn't be considered part of the testbed
             # for testing purposes
@@ -70,29 +73,28 @@ def testbedGen():
         node2 = link['end']
         # This value is equivalent to RTT in the testbed
         delay = link['nlsr_weight']
-        link_str = "{}:{} delay={}ms\n".format(node1, node2, delay)
-        logging.debug("Add link: {}".format(link_str)[:-1])
-        links.append(link_str.strip())
+        links.append((node1, node2, {'delay': '{}ms'.format(delay)}))
+        logging.debug("Add link: {}:{} delay={}ms".format(node1, node2, delay))
 
-    topo_str = "[nodes]\n"
-    for host in hosts:
-        topo_str = topo_str + host
-    topo_str = topo_str + "[links]\n"
-    for link in links:
-        topo_str = topo_str + link
-    return topo_str.strip()
+    testbed = Topology()
+    testbed.nodes['nodes'] = hosts
+    testbed.links = links
+    return testbed
 
 if __name__ == '__main__':
-    default_path = path.dirname(__file__) + '/../topologies/testbed{}.conf'.format(str(datetime.date.today()))
     parser = argparse.ArgumentParser()
     parser.add_argument("-l", "--log_level", help="Log level to output", default="info", choices=["debug", "info", "warning", "error"])
-    parser.add_argument("-o", "--output_dir", help="File output location", default=default_path)
+    parser.add_argument("-o", "--output_dir", help="File output location", default=None)
+    parser.add_argument("-f", "--format", help="Topology file format", default="conf", choices=["conf", "json"])
     args = parser.parse_args()
     log_level = getattr(logging, args.log_level.upper())
-    topologies_path = path.abspath(args.output_dir)
+    default_path = path.dirname(__file__) + '/../topologies/testbed{}.{}'.format(str(datetime.date.today()), args.format)
+    topologies_path = path.abspath(args.output_dir or default_path)
     logging.basicConfig(format="%(levelname)s: %(message)s", level=log_level)
     topo = testbedGen()
     logging.info("Testbed generated, writing to file...")
-    with open(topologies_path, "w") as file:
-        file.writelines(topo)
+    if args.format == "json":
+        topo.writeJson(topologies_path)
+    else:
+        topo.writeConf(topologies_path)
     logging.info("Finished")
\ No newline at end of file
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- Mode:python; c-file-style:"gnu"; indent-tabs-mode:nil -*- */
+#
+# Copyright (C) 2015-2021, The University of Memphis,
+#                          Arizona Board of Regents,
+#                          Regents of the University of California.
+#
+# This file is part of Mini-NDN.
+# See AUTHORS.md for a complete list of Mini-NDN authors and contributors.
+#
+# Mini-NDN is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Mini-NDN is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Mini-NDN, e.g., in COPYING.md file.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# This script measures the time needed to read synthetic topology files of
+# increasing size, the time per node should stay constant.
+# To use, run with python3 from the root of the repository
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from minindn.topology import TopologyFile
+
+def writeTopology(fileName, nNodes, degree, seed):
+    """Write a random connected topology with about nNodes * degree / 2 links"""
+    rand = random.Random(seed)
+    links = set()
+    for i in range(1, nNodes):
+        links.add((rand.randrange(i), i))
+    while len(links) < nNodes * degree // 2:
+        a, b = rand.randrange(nNodes), rand.randrange(nNodes)
+        if a != b and (a, b) not in links and (b, a) not in links:
+            links.add((a, b))
+
+    with open(fileName, 'w') as f:
+        f.write('[nodes]\n')
+        for i in range(nNodes):
+            f.write('n{}: _ radius={:.6f} angle={:.6f}\n'
+                    .format(i, rand.uniform(1, 30), rand.uniform(0, 6.28)))
+        f.write('[links]\n')
+        for a, b in links:
+            f.write('n{}:n{} delay={}ms bw={}\n'.format(a, b, rand.randint(1, 50), 100))
+    return len(links)
+
+def readTopology(fileName):
+    topoFile = TopologyFile.read(fileName)
+    nodes = topoFile.nodes('nodes', checkCoordinates=True)
+    links = topoFile.links()
+    return nodes, links
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the topology file reader')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000, 50000],
+                        help='Number of nodes of each synthetic topology')
+    parser.add_argument('--degree', type=int, default=4, help='Average node degree')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print('{:>8} {:>8} {:>10} {:>12}'.format('nodes', 'links', 'seconds', 'us/entry'))
+    with tempfile.TemporaryDirectory() as tmpDir:
+        for nNodes in args.sizes:
+            fileName = os.path.join(tmpDir, 'topo-{}.conf'.format(nNodes))
+            nLinks = writeTopology(fileName, nNodes, args.degree, args.seed)
+            start = time.time()
+            readTopology(fileName)
+            elapsed = time.time() - start
+            print('{:>8} {:>8} {:>10.3f} {:>12.2f}'
+                  .format(nNodes, nLinks, elapsed, elapsed * 1e6 / (nNodes + nLinks)))